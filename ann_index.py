@@ -0,0 +1,168 @@
+import os
+import numpy as np
+
+
+class IVFIndex:
+    """Inverted-file (k-means partitioned) approximate nearest-neighbour index.
+
+    Encodings are bucketed by their nearest k-means centroid. A search only scans
+    the ``n_probe`` buckets closest to the query, so raising ``n_probe`` trades
+    latency for recall (``n_probe == n_lists`` is an exact search).
+    """
+
+    def __init__(self, dim=128, n_lists=None, n_probe=8, n_iter=15, seed=0):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids = None
+        self._list_ids = []
+        self._list_vectors = []
+        self._assignment = {}
+
+    def __len__(self):
+        return len(self._assignment)
+
+    def __contains__(self, employee_id):
+        return employee_id in self._assignment
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    @property
+    def ids(self):
+        return list(self._assignment)
+
+    def _nearest_centroids(self, vectors, count=1):
+        sq_dist = (np.einsum('ij,ij->i', vectors, vectors)[:, None]
+                   + np.einsum('ij,ij->i', self.centroids, self.centroids)[None, :]
+                   - 2.0 * (vectors @ self.centroids.T))
+        if count == 1:
+            return np.argmin(sq_dist, axis=1)
+        count = min(count, len(self.centroids))
+        nearest = np.argpartition(sq_dist, count - 1, axis=1)[:, :count]
+        return nearest
+
+    def train(self, encodings, employee_ids):
+        """Run k-means over the encodings and rebuild every inverted list."""
+        vectors = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        if len(vectors) == 0:
+            raise ValueError("Cannot train an index without encodings")
+        n_lists = self.n_lists or max(1, int(4 * np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        rng = np.random.default_rng(self.seed)
+        self.centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+
+        for _ in range(self.n_iter):
+            assignment = self._nearest_centroids(vectors)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignment, vectors)
+            counts = np.bincount(assignment, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty lists from random points so no centroid is wasted
+                sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+                counts[empty] = 1
+            self.centroids = (sums / counts[:, None]).astype(np.float32)
+
+        self._list_ids = [[] for _ in range(n_lists)]
+        self._list_vectors = [np.empty((0, self.dim), dtype=np.float32) for _ in range(n_lists)]
+        self._assignment = {}
+        assignment = self._nearest_centroids(vectors)
+        ids = [int(employee_id) for employee_id in employee_ids]
+        for list_no in range(n_lists):
+            members = np.flatnonzero(assignment == list_no)
+            self._list_ids[list_no] = [ids[i] for i in members]
+            self._list_vectors[list_no] = vectors[members].copy()
+            for i in members:
+                self._assignment[ids[i]] = list_no
+
+    def add(self, employee_id, encoding):
+        if not self.is_trained:
+            raise RuntimeError("Index must be trained before adding encodings")
+        employee_id = int(employee_id)
+        self.remove(employee_id)
+        vector = np.asarray(encoding, dtype=np.float32).reshape(1, self.dim)
+        list_no = int(self._nearest_centroids(vector)[0])
+        self._list_ids[list_no].append(employee_id)
+        self._list_vectors[list_no] = np.vstack([self._list_vectors[list_no], vector])
+        self._assignment[employee_id] = list_no
+
+    def remove(self, employee_id):
+        list_no = self._assignment.pop(int(employee_id), None)
+        if list_no is None:
+            return False
+        position = self._list_ids[list_no].index(int(employee_id))
+        del self._list_ids[list_no][position]
+        self._list_vectors[list_no] = np.delete(self._list_vectors[list_no], position, axis=0)
+        return True
+
+    def search(self, face_encodings, n_probe=None):
+        """Return (employee_ids, distances) of the nearest entry for each query.
+
+        Queries with no candidates in their probed lists get id -1 and distance inf.
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.dim)
+        best_ids = np.full(len(queries), -1, dtype=np.int64)
+        best_distances = np.full(len(queries), np.inf, dtype=np.float32)
+        if not self.is_trained or len(queries) == 0:
+            return best_ids, best_distances
+
+        probes = self._nearest_centroids(queries, n_probe or self.n_probe)
+        probes = probes.reshape(len(queries), -1)
+        for q, query in enumerate(queries):
+            lists = [list_no for list_no in probes[q] if self._list_ids[list_no]]
+            if not lists:
+                continue
+            candidates = np.vstack([self._list_vectors[list_no] for list_no in lists])
+            candidate_ids = [employee_id for list_no in lists for employee_id in self._list_ids[list_no]]
+            sq_dist = np.einsum('ij,ij->i', candidates - query, candidates - query)
+            best = int(np.argmin(sq_dist))
+            best_ids[q] = candidate_ids[best]
+            best_distances[q] = np.sqrt(sq_dist[best])
+        return best_ids, best_distances
+
+    def save(self, path):
+        if not self.is_trained:
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        ids = np.array([i for ids in self._list_ids for i in ids], dtype=np.int64)
+        lists = np.array([n for n, ids in enumerate(self._list_ids) for _ in ids], dtype=np.int64)
+        vectors = (np.vstack(self._list_vectors) if ids.size
+                   else np.empty((0, self.dim), dtype=np.float32))
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, ids=ids, lists=lists, vectors=vectors,
+                 params=np.array([self.dim, len(self.centroids), self.n_probe], dtype=np.int64))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            dim, n_lists, n_probe = (int(v) for v in data['params'])
+            index = cls(dim=dim, n_lists=n_lists, n_probe=n_probe)
+            index.centroids = data['centroids'].astype(np.float32)
+            ids, lists, vectors = data['ids'], data['lists'], data['vectors'].astype(np.float32)
+        index._list_ids = [[] for _ in range(n_lists)]
+        index._list_vectors = [np.empty((0, dim), dtype=np.float32) for _ in range(n_lists)]
+        for list_no in range(n_lists):
+            members = np.flatnonzero(lists == list_no)
+            index._list_ids[list_no] = [int(ids[i]) for i in members]
+            index._list_vectors[list_no] = vectors[members]
+            for i in members:
+                index._assignment[int(ids[i])] = list_no
+        return index
+
+
+def measure_recall(index, encodings, employee_ids, queries, n_probe=None):
+    """Fraction of queries for which the index returns the brute-force nearest neighbour."""
+    encodings = np.asarray(encodings, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32).reshape(-1, encodings.shape[1])
+    employee_ids = np.asarray(employee_ids)
+    sq_dist = (np.einsum('ij,ij->i', queries, queries)[:, None]
+               + np.einsum('ij,ij->i', encodings, encodings)[None, :]
+               - 2.0 * (queries @ encodings.T))
+    exact_ids = employee_ids[np.argmin(sq_dist, axis=1)]
+    approx_ids, _ = index.search(queries, n_probe=n_probe)
+    return float(np.mean(approx_ids == exact_ids))
@@ -1,16 +1,39 @@
 from flask import Flask, render_template, jsonify, request, Response, make_response
 from flask_cors import CORS
-from flask_cors import CORS
 from attendance_system import AttendanceSystem
 from camera_utils import initialize_camera
+from video_pipeline import FramePipeline, parse_stream_profile
+from stream_broadcast import BroadcastStream
+from report_export import EXPORT_FORMATS, iter_report_rows
+from enrollment import summarize
+from metrics import CONTENT_TYPE, REGISTRY
 from datetime import datetime
-from models.database import Session, Employee, Attendance, DailyReport
-import cv2
+from models.database import Session, Employee, Attendance, DailyReport, RollupState
+import atexit
+import os
+import threading
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-attendance_system = AttendanceSystem()
+# Models load on the first video request unless preloading is asked for;
+# tracking, downscaled detection and the ANN index are opt-in (see README)
+attendance_system = AttendanceSystem(
+    preload_models=os.environ.get('ATTENDANCE_PRELOAD_MODELS') == '1',
+    detect_every_n=int(os.environ.get('ATTENDANCE_DETECT_EVERY_N', '1')),
+    detection_scale=float(os.environ.get('ATTENDANCE_DETECTION_SCALE', '1.0')),
+    use_ann_index=os.environ.get('ATTENDANCE_USE_ANN_INDEX') == '1',
+)
+atexit.register(attendance_system.close)
+
+def create_pipeline():
+    attendance_system.load_models()
+    return FramePipeline(attendance_system, camera_factory=initialize_camera)
+
+video_broadcast = BroadcastStream(create_pipeline)
+camera_start_lock = threading.Lock()
+# Pipeline referenced by /start_camera, if any
+camera_pipeline = None
 
 @app.after_request
 def after_request(response):
@@ -25,59 +48,55 @@ def index():
 
 @app.route('/start_camera')
 def start_camera():
-    camera = initialize_camera()
-    if not camera.isOpened():
-        return jsonify({'status': 'error', 'message': 'Camera initialization failed'})
-    
-    while True:
-        ret, frame = camera.read()
-        if not ret:
-            break
-            
-        processed_frame, detected_faces = attendance_system.process_frame(frame)
-        
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-            
-    camera.release()
+    global camera_pipeline
+    with camera_start_lock:
+        if camera_pipeline is None or not camera_pipeline.running:
+            # Hold a reference so recognition keeps running without viewers; a
+            # pipeline that died (e.g. camera unplugged) is started again
+            if camera_pipeline is not None:
+                video_broadcast.release(camera_pipeline)
+            camera_pipeline = video_broadcast.acquire()
+            if camera_pipeline is None:
+                return jsonify({'status': 'error', 'message': 'Camera initialization failed'})
     return jsonify({'status': 'success'})
 
 @app.route('/video_feed')
 def video_feed():
-    def generate_frames():
-        camera = initialize_camera()
-        try:
-            while True:
-                ret, frame = camera.read()
-                if not ret:
-                    break
-                    
-                processed_frame, _ = attendance_system.process_frame(frame)
-                
-                if processed_frame is not None:
-                    ret, buffer = cv2.imencode('.jpg', processed_frame)
-                    if ret:
-                        frame_bytes = buffer.tobytes()
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        finally:
-            camera.release()
-    
-    response = Response(generate_frames(),
+    # e.g. /video_feed?width=640&quality=60&fps=5 for a remote dashboard
+    try:
+        profile = parse_stream_profile(request.args)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        })
+    response = Response(video_broadcast.stream(profile),
                        mimetype='multipart/x-mixed-replace; boundary=frame')
     response.headers['Access-Control-Allow-Origin'] = '*'
     return response
 
+@app.route('/video_feed/metrics')
+def video_feed_metrics():
+    return jsonify({
+        'status': 'success',
+        'data': video_broadcast.metrics()
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # Rendered only when scraped; recording is a few additions per stage
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route('/users')
 def get_users():
     session = Session()
     try:
-        employees = session.query(Employee).all()
+        employees = session.query(Employee.id, Employee.name).all()
         users_list = [{
-            'id': emp.id,
-            'name': emp.name,
-            'status': attendance_system.get_current_attendance_status(emp.id)
-        } for emp in employees]
+            'id': emp_id,
+            'name': name,
+            'status': attendance_system.get_current_attendance_status(emp_id)
+        } for emp_id, name in employees]
         return jsonify({
             'status': 'success',
             'users': users_list
@@ -85,6 +104,28 @@ def get_users():
     finally:
         session.close()
 
+@app.route('/presence')
+def get_presence_snapshot():
+    return jsonify({
+        'status': 'success',
+        'data': attendance_system.presence_snapshot()
+    })
+
+@app.route('/presence/stream')
+def presence_stream():
+    # EventSource resends the last id it saw when reconnecting; the initial
+    # connection passes the snapshot's seq as ?since=
+    last_seq = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        last_seq = int(last_seq) if last_seq else None
+    except ValueError:
+        last_seq = None
+    response = Response(attendance_system.presence_events.stream(last_seq),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/users/delete-all', methods=['POST'])
 def delete_all_users():
     session = Session()
@@ -92,7 +133,12 @@ def delete_all_users():
         session.query(Employee).delete()
         session.query(Attendance).delete()
         session.query(DailyReport).delete()
+        session.query(RollupState).delete()
         session.commit()
+        attendance_system.report_engine.archive.clear()
+        # Presence first, so clients reloading on the reset event see it empty
+        attendance_system.attendance_writer.reset()
+        attendance_system.clear_known_faces()
         return jsonify({
             'status': 'success',
             'message': 'All users and related data deleted successfully'
@@ -124,10 +170,40 @@ def register_employee():
         'message': 'Registration failed'
     })
 
-@app.route('/reports/daily/<employee_id>')
+@app.route('/enroll', methods=['POST'])
+def enroll_employees():
+    # Enrolls every <id>_<name> folder under static/employee_photos, or only
+    # the given employee_ids, and updates the live gallery
+    data = request.get_json(silent=True) or {}
+    employee_ids = data.get('employee_ids')
+    try:
+        result = attendance_system.enroll_photos(
+            employee_ids={int(i) for i in employee_ids} if employee_ids else None,
+            min_samples=int(data.get('min_samples', 1))
+        )
+    except Exception as e:
+        print(f"Enrollment error: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'Enrollment failed'
+        }), 500
+    return jsonify({
+        'status': 'success',
+        'data': summarize(result)
+    })
+
+@app.route('/gallery/reload', methods=['POST'])
+def reload_gallery():
+    attendance_system.reload_known_faces()
+    return jsonify({
+        'status': 'success',
+        'faces': len(attendance_system.gallery)
+    })
+
+@app.route('/reports/daily/<int:employee_id>')
 def get_daily_report(employee_id):
     date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-    report = attendance_system.generate_daily_report(int(employee_id), date_str)
+    report = attendance_system.generate_daily_report(employee_id, date_str)
     
     if report:
         return jsonify({
@@ -139,7 +215,7 @@ def get_daily_report(employee_id):
         'message': 'Report generation failed'
     })
 
-@app.route('/reports/weekly/<employee_id>')
+@app.route('/reports/weekly/<int:employee_id>')
 def get_weekly_report(employee_id):
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
@@ -151,7 +227,7 @@ def get_weekly_report(employee_id):
         })
     
     report = attendance_system.generate_weekly_report(
-        int(employee_id),
+        employee_id,
         datetime.strptime(start_date, '%Y-%m-%d'),
         datetime.strptime(end_date, '%Y-%m-%d')
     )
@@ -166,9 +242,84 @@ def get_weekly_report(employee_id):
         'message': 'Weekly report generation failed'
     })
 
-@app.route('/status/<employee_id>')
+@app.route('/reports/bulk')
+def get_bulk_report():
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    export_format = request.args.get('format', 'csv')
+    employee_ids = request.args.get('employee_ids')
+    
+    if not start_date or not end_date:
+        return jsonify({
+            'status': 'error',
+            'message': 'Start and end dates are required'
+        })
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'status': 'error',
+            'message': f"Unsupported format, use one of: {', '.join(sorted(EXPORT_FORMATS))}"
+        })
+    
+    try:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d')
+        end_date = datetime.strptime(end_date, '%Y-%m-%d')
+        if employee_ids:
+            employee_ids = [int(employee_id) for employee_id in employee_ids.split(',')]
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid date or employee id'
+        })
+    
+    serialize, mimetype = EXPORT_FORMATS[export_format]
+    rows = iter_report_rows(attendance_system.report_rollup, start_date, end_date, employee_ids or None)
+    response = Response(serialize(rows), mimetype=mimetype)
+    filename = f"attendance_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{export_format}"
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+@app.route('/attendance/archive', methods=['POST'])
+def archive_attendance():
+    data = request.get_json(silent=True) or {}
+    try:
+        archived = attendance_system.archive_attendance(keep_months=int(data.get('keep_months', 3)),
+                                                        dry_run=bool(data.get('dry_run', False)))
+    except Exception as e:
+        print(f"Attendance archive error: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': 'Archiving failed'
+        }), 500
+    return jsonify({
+        'status': 'success',
+        'data': archived
+    })
+
+@app.route('/attendance/writer')
+def get_writer_metrics():
+    return jsonify({
+        'status': 'success',
+        'data': attendance_system.attendance_writer.metrics()
+    })
+
+@app.route('/recognition/cache')
+def get_recognition_cache_metrics():
+    cache = attendance_system.recognition_cache
+    return jsonify({
+        'status': 'success',
+        'data': cache.metrics() if cache is not None else {'enabled': False}
+    })
+
+@app.route('/recognition/quality')
+def get_face_quality_stats():
+    return jsonify({
+        'status': 'success',
+        'data': attendance_system.quality_filter.stats()
+    })
+
+@app.route('/status/<int:employee_id>')
 def get_status(employee_id):
-    status = attendance_system.get_current_attendance_status(int(employee_id))
+    status = attendance_system.get_current_attendance_status(employee_id)
     if status:
         return jsonify({
             'status': 'success',
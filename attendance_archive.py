@@ -0,0 +1,236 @@
+"""Monthly archival of raw attendance events.
+
+Closed months older than the retention window are written to
+data/archive/attendances_YYYY-MM.csv.gz, their daily totals stay in the
+daily_reports rollups, and the raw rows are deleted before the database is
+vacuumed. ReportEngine reads archived months back transparently.
+
+Usage: python attendance_archive.py [--keep-months 3] [--dry-run]
+"""
+import argparse
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import and_, func, select, text
+
+from models.database import Session, Attendance, ArchivedMonth, engine
+
+ARCHIVE_DIR = os.path.join('data', 'archive')
+COLUMNS = ['id', 'employee_id', 'timestamp', 'event_type']
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def month_key(month):
+    return month.strftime('%Y-%m')
+
+
+def latest_event_ids(session):
+    """Select of each employee's newest attendance id, which is never archived"""
+    latest = session.query(Attendance.employee_id,
+                           func.max(Attendance.timestamp).label('timestamp'))\
+        .group_by(Attendance.employee_id).subquery()
+    return select(Attendance.id).join(
+        latest, and_(Attendance.employee_id == latest.c.employee_id,
+                     Attendance.timestamp == latest.c.timestamp))
+
+
+class AttendanceArchive:
+    """Moves closed months of attendance rows into compressed per-month files.
+
+    The newest event of every employee always stays in the live table, since
+    the presence table and the entry/exit toggle are warmed from it; readers
+    drop the resulting duplicate by id.
+    """
+
+    def __init__(self, session_factory=Session, archive_dir=ARCHIVE_DIR, cache_months=12):
+        self.session_factory = session_factory
+        self.archive_dir = archive_dir
+        self.cache_months = cache_months
+        # Archive files never change once written, so parsed months are cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path_for(self, month):
+        return os.path.join(self.archive_dir, f"attendances_{month_key(month)}.csv.gz")
+
+    def archived_months(self, start=None, end=None):
+        """{'YYYY-MM': path} of archived months, optionally overlapping [start, end)"""
+        session = self.session_factory()
+        try:
+            query = session.query(ArchivedMonth.month, ArchivedMonth.path)
+            if start is not None:
+                query = query.filter(ArchivedMonth.month >= month_key(start))
+            if end is not None:
+                query = query.filter(ArchivedMonth.month <= month_key(end - timedelta(microseconds=1)))
+            return dict(query.all())
+        finally:
+            session.close()
+
+    def closed_months(self, keep_months=3, now=None):
+        """Months with archivable live rows that ended more than keep_months months ago"""
+        cutoff = month_start(now or datetime.now())
+        for _ in range(keep_months):
+            cutoff = month_start(cutoff - timedelta(days=1))
+        session = self.session_factory()
+        try:
+            # Only months that still hold rows, ignoring the newest event of
+            # each employee, which stays live anyway
+            months = session.query(func.strftime('%Y-%m', Attendance.timestamp))\
+                .filter(Attendance.timestamp < cutoff)\
+                .filter(~Attendance.id.in_(latest_event_ids(session)))\
+                .distinct().all()
+        finally:
+            session.close()
+        return sorted(datetime.strptime(month, '%Y-%m') for month, in months)
+
+    def archive_month(self, month, report_rollup):
+        """Archive one month; returns the number of live rows deleted."""
+        month = month_start(month)
+        end = next_month(month)
+        # Daily totals for the month must be in the rollups before rows leave
+        report_rollup.refresh()
+
+        session = self.session_factory()
+        try:
+            rows = session.query(Attendance.id, Attendance.employee_id, Attendance.timestamp,
+                                 Attendance.event_type)\
+                .filter(Attendance.timestamp >= month, Attendance.timestamp < end)\
+                .order_by(Attendance.id).all()
+            if not rows:
+                return 0
+            events = pd.DataFrame(rows, columns=COLUMNS)
+            path = self.path_for(month)
+            if os.path.exists(path):
+                # Late events (e.g. a footage backfill) for an archived month
+                archived = self._read(path)
+                if not events['id'].isin(archived['id']).all():
+                    events = pd.concat([archived, events]).drop_duplicates('id').sort_values('id')
+                    self._write(events, path)
+                else:
+                    events = archived
+            else:
+                self._write(events, path)
+
+            deleted = session.query(Attendance)\
+                .filter(Attendance.timestamp >= month, Attendance.timestamp < end)\
+                .filter(~Attendance.id.in_(latest_event_ids(session)))\
+                .delete(synchronize_session=False)
+
+            record = session.get(ArchivedMonth, month_key(month))
+            if record is None:
+                record = ArchivedMonth(month=month_key(month))
+                session.add(record)
+            record.path = path
+            record.row_count = len(events)
+            record.archived_at = datetime.now()
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        with self._lock:
+            self._cache.pop(path, None)
+        return deleted
+
+    def run(self, report_rollup, keep_months=3, dry_run=False):
+        """Archive every closed month and vacuum; returns {'YYYY-MM': rows deleted}"""
+        months = self.closed_months(keep_months)
+        if dry_run:
+            return {month_key(month): 0 for month in months}
+        archived = {month_key(month): self.archive_month(month, report_rollup) for month in months}
+        if any(archived.values()):
+            self.vacuum()
+        return archived
+
+    def vacuum(self):
+        """Reclaim the space of deleted rows; needs no other open transaction"""
+        Session.remove()
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(text('PRAGMA wal_checkpoint(TRUNCATE)'))
+            connection.execute(text('VACUUM'))
+
+    def clear(self):
+        """Delete every archive file and manifest row, e.g. with all attendance data"""
+        session = self.session_factory()
+        try:
+            for path, in session.query(ArchivedMonth.path):
+                if os.path.exists(path):
+                    os.remove(path)
+            session.query(ArchivedMonth).delete()
+            session.commit()
+        finally:
+            session.close()
+        with self._lock:
+            self._cache.clear()
+
+    def load_events(self, start, end, employee_ids=None):
+        """Archived events in [start, end) as a DataFrame with COLUMNS, or None"""
+        paths = self.archived_months(start, end)
+        if not paths:
+            return None
+        frames = []
+        for path in paths.values():
+            events = self._load(path)
+            mask = (events['timestamp'] >= start) & (events['timestamp'] < end)
+            if employee_ids is not None:
+                mask &= events['employee_id'].isin(list(employee_ids))
+            frames.append(events[mask])
+        return pd.concat(frames, ignore_index=True)
+
+    def _load(self, path):
+        with self._lock:
+            events = self._cache.get(path)
+            if events is not None:
+                self._cache.move_to_end(path)
+                return events
+        events = self._read(path)
+        with self._lock:
+            self._cache[path] = events
+            while len(self._cache) > self.cache_months:
+                self._cache.popitem(last=False)
+        return events
+
+    @staticmethod
+    def _read(path):
+        return pd.read_csv(path, parse_dates=['timestamp'], compression='gzip')
+
+    @staticmethod
+    def _write(events, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        events.to_csv(tmp_path, index=False, compression='gzip', date_format='%Y-%m-%d %H:%M:%S.%f')
+        if len(pd.read_csv(tmp_path, usecols=['id'], compression='gzip')) != len(events):
+            os.remove(tmp_path)
+            raise IOError(f"Archive verification failed for {path}")
+        os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive closed months of attendance events')
+    parser.add_argument('--keep-months', type=int, default=3, help='full months kept in the live table')
+    parser.add_argument('--dry-run', action='store_true', help='only list the months to archive')
+    args = parser.parse_args()
+
+    from report_rollup import ReportRollup
+
+    rollup = ReportRollup()
+    archived = rollup.report_engine.archive.run(rollup, keep_months=args.keep_months, dry_run=args.dry_run)
+    if not archived:
+        print("Nothing to archive")
+    for month, deleted in archived.items():
+        print(f"{month}: {'would be archived' if args.dry_run else f'{deleted} rows archived'}")
+
+
+if __name__ == '__main__':
+    main()
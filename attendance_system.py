@@ -1,197 +1,410 @@
 import cv2
-import face_recognition
-import numpy as np
-from datetime import datetime, timedelta, time
-from models.database import Session, Employee, Attendance, DailyReport
-import pickle
-import dlib
+from models.database import Session, Employee
+from face_gallery import FaceGallery
+from ann_index import IVFIndex
+from attendance_writer import AttendanceWriter
+from presence import PresenceTable
+from presence_events import PresenceEvents
+from face_tracker import FaceTracker
+from report_engine import ReportEngine
+from report_rollup import ReportRollup
+from gallery_snapshot import (gallery_fingerprint, load_gallery_arrays,
+                              load_gallery_snapshot, save_gallery_snapshot)
+from models.migrations import migrate_face_encodings
+from enrollment import PHOTO_ROOT, enroll_people, scan_photo_tree
+from face_detection import compute_descriptors, detect_faces, face_landmarks, load_face_models
+from face_quality import FaceQualityFilter
+from recognition_cache import RecognitionCache
+from metrics import DB_QUEUE_DEPTH, FACES_PER_FRAME, FRAMES_PROCESSED, STAGE_SECONDS
 import os
-from pathlib import Path
-from sqlalchemy import func
+import threading
+import time
+
+ANN_INDEX_PATH = os.path.join('data', 'gallery_ivf.npz')
+
 
 class AttendanceSystem:
-    def __init__(self):
-        self.known_face_encodings = []
-        self.known_face_names = []
-        self.face_detector = dlib.get_frontal_face_detector()
-        
-        base_path = Path(__file__).parent
-        model_path = base_path / "models" / "data" / "shape_predictor_68_face_landmarks.dat"
-        recognition_model_path = base_path / "models" / "data" / "dlib_face_recognition_resnet_model_v1.dat"
-        
-        if not model_path.exists():
-            raise FileNotFoundError(f"Shape predictor model not found at {model_path}")
-        if not recognition_model_path.exists():
-            raise FileNotFoundError(f"Recognition model not found at {recognition_model_path}")
-            
-        self.shape_predictor = dlib.shape_predictor(str(model_path))
-        self.face_encoder = dlib.face_recognition_model_v1(str(recognition_model_path))
+    def __init__(self, tolerance=0.6, use_ann_index=False, ann_n_lists=None, ann_n_probe=8,
+                 detect_every_n=1, tracker_type='mil', detection_scale=1.0, detection_roi=None,
+                 preload_models=False, recognition_cache_size=64, recognition_cache_ttl=2.0,
+                 quality_thresholds=None):
+        self.gallery = FaceGallery(tolerance=tolerance)
+        self.use_ann_index = use_ann_index
+        self.ann_n_lists = ann_n_lists
+        self.ann_n_probe = ann_n_probe
+        # detect_every_n > 1 enables tracking mode: full detection and
+        # recognition only every N frames, tracked boxes in between
+        self.detect_every_n = detect_every_n
+        self.face_tracker = FaceTracker(tracker_type=tracker_type)
+        self._frames_since_detection = detect_every_n
+        # Detection runs on a downscaled grayscale copy, optionally cropped to a
+        # (left, top, right, bottom) region such as the doorway
+        self.detection_scale = detection_scale
+        self.detection_roi = detection_roi
+        # Tiny, dark, blurred or profile faces are dropped before the descriptor;
+        # in tracking mode they are retried on the next detection pass
+        self.quality_filter = FaceQualityFilter(**(quality_thresholds or {}))
+        # Recent decisions are reused for a person who stays in front of the
+        # camera; a size of 0 disables the cache
+        self.recognition_cache = (RecognitionCache(max_entries=recognition_cache_size,
+                                                   ttl=recognition_cache_ttl)
+                                  if recognition_cache_size else None)
+        self.presence = PresenceTable()
+        self.report_engine = ReportEngine()
+        self.report_rollup = ReportRollup(self.report_engine)
+        self.presence_events = PresenceEvents()
+        self.attendance_writer = AttendanceWriter(presence=self.presence, events=self.presence_events)
+        DB_QUEUE_DEPTH.set_function(self.attendance_writer.queue_depth)
+        # The dlib models are only needed for recognition, so they are loaded on
+        # the first frame rather than when the reporting side starts up
+        self._models = None
+        self._models_lock = threading.Lock()
+        # The shape predictor and the ResNet are shared with enrollment, which
+        # runs on request threads; every landmark and descriptor call holds this
+        self.models_lock = threading.Lock()
+        if preload_models:
+            self.load_models()
         self.load_known_faces()
+        self.presence.warm()
+        self.attendance_writer.start()
         
-    def load_known_faces(self):
+    def load_models(self):
+        """Load the detector, shape predictor and encoder once; safe to call from any thread"""
+        if self._models is None:
+            with self._models_lock:
+                if self._models is None:
+                    start = time.perf_counter()
+                    self._models = load_face_models()
+                    print(f"Face models loaded in {time.perf_counter() - start:.2f}s")
+        return self._models
+    
+    @property
+    def models_loaded(self):
+        return self._models is not None
+    
+    @property
+    def face_detector(self):
+        return self.load_models()[0]
+    
+    @property
+    def shape_predictor(self):
+        return self.load_models()[1]
+    
+    @property
+    def face_encoder(self):
+        return self.load_models()[2]
+    
+    def load_known_faces(self, use_snapshot=True):
         session = Session()
         try:
-            employees = session.query(Employee).all()
-            for employee in employees:
-                face_encoding = pickle.loads(employee.face_encoding)
-                self.known_face_encodings.append(face_encoding)
-                self.known_face_names.append(employee.name)
-            print(f"Successfully loaded {len(employees)} employee faces")
+            fingerprint = gallery_fingerprint(session)
+            snapshot = load_gallery_snapshot(fingerprint) if use_snapshot else None
+            if snapshot is not None:
+                self.gallery.load_arrays(*snapshot)
+                print(f"Successfully loaded {len(self.gallery)} employee faces from snapshot")
+            else:
+                employee_ids, names, encodings, legacy_ids = load_gallery_arrays(session)
+                if legacy_ids:
+                    print(f"Converting {len(legacy_ids)} pickled face encodings")
+                    session.close()
+                    migrate_face_encodings()
+                    # The migration bumps updated_at, so the fingerprint changed too
+                    fingerprint = gallery_fingerprint(session)
+                    employee_ids, names, encodings, legacy_ids = load_gallery_arrays(session)
+                self.gallery.load_arrays(employee_ids, names, encodings)
+                save_gallery_snapshot(self.gallery, fingerprint)
+                print(f"Successfully loaded {len(self.gallery)} employee faces")
         except Exception as e:
             print(f"Face loading error: {str(e)}")
         finally:
             session.close()
+        
+        if self.use_ann_index:
+            self.load_ann_index()
+    
+    def load_ann_index(self):
+        """Attach the persisted ANN index, rebuilding it if missing or unreadable"""
+        index = None
+        if os.path.exists(ANN_INDEX_PATH):
+            try:
+                index = IVFIndex.load(ANN_INDEX_PATH)
+                index.n_probe = self.ann_n_probe
+            except Exception as e:
+                print(f"ANN index loading error: {str(e)}")
+        if index is None:
+            index = IVFIndex(n_lists=self.ann_n_lists, n_probe=self.ann_n_probe)
+        if self.gallery.attach_index(index):
+            self.save_ann_index()
+            print(f"ANN index ready with {len(index)} faces in {len(index.centroids)} lists")
+    
+    def save_ann_index(self):
+        if self.gallery.index is not None:
+            self.gallery.index.save(ANN_INDEX_PATH)
+    
+    def add_known_face(self, employee_id, name, face_encoding):
+        """Add or update an enrolled face without reloading the gallery"""
+        self.add_known_faces([(employee_id, name, face_encoding)])
+    
+    def add_known_faces(self, faces):
+        """Add or update several (employee_id, name, encoding) faces, saving once"""
+        if not faces:
+            return
+        for employee_id, name, face_encoding in faces:
+            self.gallery.add(employee_id, name, face_encoding)
+        if self.use_ann_index and self.gallery.index is None:
+            self.load_ann_index()
+        else:
+            self.save_ann_index()
+        self.save_gallery_snapshot()
+        self.presence_events.publish_reset('employees_changed')
+    
+    def remove_known_face(self, employee_id):
+        if self.gallery.remove(employee_id):
+            self.face_tracker.reset()
+            self.save_ann_index()
+            self.save_gallery_snapshot()
+            self.presence_events.publish_reset('employees_changed')
+    
+    def clear_known_faces(self):
+        self.gallery.clear()
+        self.face_tracker.reset()
+        if os.path.exists(ANN_INDEX_PATH):
+            os.remove(ANN_INDEX_PATH)
+        self.save_gallery_snapshot()
+        self.presence_events.publish_reset('employees_changed')
+    
+    def reload_known_faces(self):
+        """Reload the gallery from the database, e.g. after a command-line enrollment"""
+        self.face_tracker.reset()
+        self.load_known_faces(use_snapshot=False)
+        self.presence_events.publish_reset('employees_changed')
+    
+    def enroll_photos(self, root=PHOTO_ROOT, employee_ids=None, workers=None, min_samples=1):
+        """Enroll every <id>_<name> photo folder under root and update the live gallery"""
+        people = scan_photo_tree(root, employee_ids)
+        if not any(paths for _, _, paths in people):
+            # Nothing to encode, so the models need not be loaded
+            return {'enrolled': [], 'rejected': {},
+                    'skipped': {employee_id: '0 usable photos of 0' for employee_id, _, _ in people}}
+        # Threads with the loaded models, never a spawned pool from the server
+        result = enroll_people(people, workers=workers, min_samples=min_samples,
+                               models=self.load_models(), models_lock=self.models_lock)
+        self.add_known_faces([(employee_id, name, encoding)
+                              for employee_id, name, encoding, _ in result['enrolled']])
+        return result
+    
+    def register_employee(self, name, employee_id, root=PHOTO_ROOT):
+        """Enroll one employee from their photo folder; returns True on success"""
+        try:
+            employee_id = int(employee_id)
+            people = [(found_id, name, paths) for found_id, _, paths in scan_photo_tree(root, {employee_id})]
+            if not people:
+                print(f"No photo folder for employee {employee_id} under {root}")
+                return False
+            result = enroll_people(people, models=self.load_models(), models_lock=self.models_lock)
+            if not result['enrolled']:
+                print(f"Registration rejected for employee {employee_id}: {result['rejected']}")
+                return False
+            self.add_known_faces([(found_id, found_name, encoding)
+                                  for found_id, found_name, encoding, _ in result['enrolled']])
+            return True
+        except Exception as e:
+            print(f"Registration error: {str(e)}")
+            return False
+    
+    def save_gallery_snapshot(self):
+        """Rewrite the startup snapshot after the gallery changed"""
+        session = Session()
+        try:
+            save_gallery_snapshot(self.gallery, gallery_fingerprint(session))
+        except Exception as e:
+            print(f"Gallery snapshot error: {str(e)}")
+        finally:
+            session.close()
             
     def process_frame(self, frame):
         if frame is None:
             return None, []
-            
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_locations = self.face_detector(rgb_frame)
-        detected_faces = []
         
-        for face_location in face_locations:
-            shape = self.shape_predictor(rgb_frame, face_location)
-            face_encoding = np.array(self.face_encoder.compute_face_descriptor(rgb_frame, shape))
-            
-            if self.known_face_encodings:
-                matches = face_recognition.compare_faces(
-                    self.known_face_encodings, 
-                    face_encoding,
-                    tolerance=0.6
-                )
+        with STAGE_SECONDS.time(stage='frame'):
+            if self.detect_every_n > 1:
+                result = self._process_tracked_frame(frame)
+            else:
+                result = self.process_frames([frame])[0]
+        FRAMES_PROCESSED.inc()
+        return result
+    
+    def process_frames(self, frames):
+        """Recognize faces across several frames with one batched descriptor pass.
+        
+        Every frame gets a full detection (tracking mode does not apply here).
+        Returns a (frame, detected_faces) tuple per input frame.
+        """
+        results = [(frame, []) for frame in frames]
+        batch = []
+        for i, frame in enumerate(frames):
+            if frame is None:
+                results[i] = (None, [])
+                continue
+            face_locations = self.detect_faces(frame)
+            if face_locations and len(self.gallery):
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                faces = self._recognizable_faces(frame, rgb_frame, face_locations)
+                if faces:
+                    batch.append((i, rgb_frame, [(face_locations[n], shape) for n, shape in faces]))
+        
+        if not batch:
+            return results
+        
+        with self.models_lock:
+            encodings = compute_descriptors(self.face_encoder,
+                                            [rgb_frame for _, rgb_frame, _ in batch],
+                                            [[shape for _, shape in faces] for _, _, faces in batch])
+        matches = iter(self.match_faces([encoding for frame_encodings in encodings
+                                         for encoding in frame_encodings]))
+        
+        for i, _, faces in batch:
+            frame, detected_faces = results[i]
+            for face_location, _ in faces:
+                employee_id, name, distance = next(matches)
+                if employee_id is None:
+                    continue
                 
-                if True in matches:
-                    first_match_index = matches.index(True)
-                    name = self.known_face_names[first_match_index]
-                    
-                    status = self.get_current_attendance_status(name)
-                    color = (0, 255, 0) if status.get('status') == 'entry' else (0, 0, 255)
-                    
-                    left = face_location.left()
-                    top = face_location.top()
-                    right = face_location.right()
-                    bottom = face_location.bottom()
-                    
-                    detected_faces.append({
-                        'name': name,
-                        'location': (left, top, right, bottom),
-                        'status': status.get('status', 'unknown')
-                    })
-                    
-                    cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
-                    status_text = f"{name} ({status.get('status', 'unknown')})"
-                    cv2.putText(frame, status_text, (left, top - 10), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.75, color, 2)
-                    
-                    self.log_attendance(name)
+                box = (face_location.left(), face_location.top(),
+                       face_location.right(), face_location.bottom())
+                detected_faces.append(self._annotate_face(frame, employee_id, name, distance, box))
+                self.log_attendance(employee_id)
+        
+        return results
+    
+    def _process_tracked_frame(self, frame):
+        """Run detection every N frames and carry tracked identities in between"""
+        detected_faces = []
+        run_detection = (self._frames_since_detection >= self.detect_every_n - 1
+                         or self.face_tracker.lost_tracking)
+        
+        if not run_detection:
+            self._frames_since_detection += 1
+            with STAGE_SECONDS.time(stage='track'):
+                tracks = self.face_tracker.predict(frame)
+            for track in tracks:
+                if track.recognized:
+                    detected_faces.append(self._annotate_face(
+                        frame, track.employee_id, track.name, track.distance, track.box))
+            return frame, detected_faces
+        
+        self._frames_since_detection = 0
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        face_locations = self.detect_faces(frame)
+        boxes = [(rect.left(), rect.top(), rect.right(), rect.bottom()) for rect in face_locations]
+        tracks = self.face_tracker.update(boxes, frame)
+        
+        # Only faces on new or still unidentified tracks need a descriptor, and
+        # a track that was just found to be a stranger is not re-encoded
+        pending = [(track, rect) for track, rect in zip(tracks, face_locations)
+                   if not track.recognized and not self._recently_unknown(track)]
+        if pending and len(self.gallery):
+            faces = self._recognizable_faces(frame, rgb_frame, [rect for _, rect in pending])
+            pending = [pending[n] for n, _ in faces]
+            with self.models_lock:
+                encodings = compute_descriptors(self.face_encoder, [rgb_frame],
+                                                [[shape for _, shape in faces]])[0]
+            for (track, _), match in zip(pending, self.match_faces(encodings)):
+                track.employee_id, track.name, track.distance = match
+                if self.recognition_cache is not None and match[0] is None:
+                    self.recognition_cache.put_track(track.track_id, match, self.gallery.version)
+        
+        for track in tracks:
+            if track.recognized:
+                detected_faces.append(self._annotate_face(
+                    frame, track.employee_id, track.name, track.distance, track.box))
+                self.log_attendance(track.employee_id)
         
         return frame, detected_faces
+    
+    def _recognizable_faces(self, frame, rgb_frame, face_locations):
+        """(index, landmarks) of the faces that pass the quality checks"""
+        candidates = [n for n, rect in enumerate(face_locations)
+                      if self.quality_filter.check_box(frame, rect) is None]
+        if not candidates:
+            return []
+        with self.models_lock:
+            shapes = face_landmarks(self.shape_predictor, rgb_frame, [face_locations[n] for n in candidates])
+        return [(n, shape) for n, shape in zip(candidates, shapes)
+                if self.quality_filter.check_pose(shape) is None]
+    
+    def match_faces(self, encodings):
+        """Gallery matches for a batch of encodings, answering repeats from the cache"""
+        if self.recognition_cache is None:
+            with STAGE_SECONDS.time(stage='match'):
+                return self.gallery.match(encodings)
+        version = self.gallery.version
+        with STAGE_SECONDS.time(stage='match'):
+            matches = self.recognition_cache.lookup(encodings, version)
+            missing = [i for i, match in enumerate(matches) if match is None]
+            if missing:
+                fresh = self.gallery.match([encodings[i] for i in missing])
+                self.recognition_cache.store([encodings[i] for i in missing], fresh, version)
+                for i, match in zip(missing, fresh):
+                    matches[i] = match
+        return matches
+    
+    def _recently_unknown(self, track):
+        return (self.recognition_cache is not None
+                and self.recognition_cache.get_track(track.track_id, self.gallery.version) is not None)
+    
+    def detect_faces(self, frame, scale=None):
+        """Detect faces at the configured scale and ROI, returning full-resolution rectangles"""
+        scale = self.detection_scale if scale is None else scale
+        with STAGE_SECONDS.time(stage='detect'):
+            face_locations = detect_faces(self.face_detector, frame, scale=scale, roi=self.detection_roi)
+        FACES_PER_FRAME.observe(len(face_locations))
+        return face_locations
+    
+    def _annotate_face(self, frame, employee_id, name, distance, box):
+        if self.recognition_cache is not None:
+            status = self.recognition_cache.status(employee_id, self.get_current_attendance_status)
+        else:
+            status = self.get_current_attendance_status(employee_id)
+        color = (0, 255, 0) if status.get('status') == 'entry' else (0, 0, 255)
+        left, top, right, bottom = box
+        
+        cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+        status_text = f"{name} ({status.get('status', 'unknown')})"
+        cv2.putText(frame, status_text, (left, top - 10), 
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.75, color, 2)
+        
+        return {
+            'employee_id': employee_id,
+            'name': name,
+            'distance': distance,
+            'location': box,
+            'status': status.get('status', 'unknown')
+        }
             
-    def log_attendance(self, name):
-        session = Session()
-        try:
-            employee = session.query(Employee).filter_by(name=name).first()
-            if not employee:
-                print(f"Employee {name} not found")
-                return
-                
-            last_record = session.query(Attendance)\
-                .filter_by(employee_id=employee.id)\
-                .order_by(Attendance.timestamp.desc())\
-                .first()
-                
-            current_time = datetime.now()
-            
-            if not last_record:
-                event_type = 'entry'
-            else:
-                event_type = 'exit' if last_record.event_type == 'entry' else 'entry'
-                time_diff = (current_time - last_record.timestamp).total_seconds()
-                if time_diff < 30:
-                    return
-            
-            attendance = Attendance(
-                employee_id=employee.id,
-                timestamp=current_time,
-                event_type=event_type
-            )
-            session.add(attendance)
-            session.commit()
-            
-            print(f"Successfully logged {event_type} for {name} at {current_time.strftime('%H:%M:%S')}")
-            
-        except Exception as e:
-            print(f"Attendance logging error: {str(e)}")
-            session.rollback()
-        finally:
-            session.close()
+    def log_attendance(self, employee_id, timestamp=None):
+        """Queue a recognition event; the writer thread debounces and persists it"""
+        with STAGE_SECONDS.time(stage='log_submit'):
+            submitted = self.attendance_writer.submit(employee_id, timestamp)
+        if not submitted:
+            print(f"Attendance queue full, dropped event for employee {employee_id}")
+    
+    def close(self):
+        self.attendance_writer.stop()
 
     def calculate_total_time_inside(self, employee_id, date):
-        session = Session()
-        try:
-            start_date = datetime.strptime(date, '%Y-%m-%d').replace(hour=0, minute=0, second=0)
-            end_date = start_date.replace(hour=23, minute=59, second=59)
-            
-            attendance_records = session.query(Attendance)\
-                .filter_by(employee_id=employee_id)\
-                .filter(Attendance.timestamp.between(start_date, end_date))\
-                .order_by(Attendance.timestamp).all()
-            
-            total_time_inside = timedelta()
-            entry_time = None
-            time_blocks = []
-            
-            for record in attendance_records:
-                if record.event_type == 'entry':
-                    entry_time = record.timestamp
-                elif record.event_type == 'exit' and entry_time:
-                    duration = record.timestamp - entry_time
-                    total_time_inside += duration
-                    time_blocks.append({
-                        'entry': entry_time.strftime('%H:%M:%S'),
-                        'exit': record.timestamp.strftime('%H:%M:%S'),
-                        'duration': str(duration)
-                    })
-                    entry_time = None
-            
-            total_seconds = total_time_inside.total_seconds()
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            
-            return {
-                'total_hours': hours,
-                'total_minutes': minutes,
-                'formatted_time': f"{int(hours)}h {int(minutes)}m",
-                'total_seconds': total_seconds,
-                'time_blocks': time_blocks,
-                'date': date
-            }
-            
-        finally:
-            session.close()
+        return self.report_engine.daily_report(employee_id, date)
             
     def generate_daily_report(self, employee_id, date):
-        session = Session()
         try:
-            report_date = datetime.strptime(date, '%Y-%m-%d') if isinstance(date, str) else date
-            start_date = report_date.replace(hour=0, minute=0, second=0)
-            end_date = report_date.replace(hour=23, minute=59, second=59)
-            
-            attendance_records = session.query(Attendance)\
-                .filter_by(employee_id=employee_id)\
-                .filter(Attendance.timestamp.between(start_date, end_date))\
-                .order_by(Attendance.timestamp).all()
-            
-            time_stats = self.calculate_total_time_inside(employee_id, date)
-            attendance_details = time_stats['time_blocks']
+            time_stats = self.report_rollup.daily_report(employee_id, date)
             
             report = {
-                'date': report_date.strftime('%Y-%m-%d'),
+                'date': time_stats['date'],
                 'total_hours': time_stats['total_hours'],
                 'total_minutes': time_stats['total_minutes'],
                 'formatted_time': time_stats['formatted_time'],
-                'details': attendance_details,
+                'details': time_stats['time_blocks'],
                 'time_analysis': {
                     'total_time_inside': time_stats['formatted_time'],
                     'time_blocks': time_stats['time_blocks']
@@ -203,64 +416,38 @@ class AttendanceSystem:
         except Exception as e:
             print(f"Daily report generation error: {str(e)}")
             return None
-        finally:
-            session.close()
         
     def generate_weekly_report(self, employee_id, start_date, end_date):
-        session = Session()
         try:
-            daily_reports = []
-            current_date = start_date
-            
-            while current_date <= end_date:
-                daily_stats = self.calculate_total_time_inside(employee_id, current_date.strftime('%Y-%m-%d'))
-                daily_reports.append({
-                    'date': current_date.strftime('%Y-%m-%d'),
-                    'hours': daily_stats['total_hours'],
-                    'minutes': daily_stats['total_minutes'],
-                    'formatted_time': daily_stats['formatted_time']
-                })
-                current_date += timedelta(days=1)
-            
-            total_seconds = sum(report['hours'] * 3600 + report['minutes'] * 60 for report in daily_reports)
-            total_hours = total_seconds // 3600
-            total_minutes = (total_seconds % 3600) // 60
-            
-            return {
-                'total_time': f"{int(total_hours)}h {int(total_minutes)}m",
-                'daily_breakdown': daily_reports
-            }
-            
+            return self.report_rollup.weekly_report(employee_id, start_date, end_date)
         except Exception as e:
             print(f"Weekly report generation error: {str(e)}")
             return None
-        finally:
-            session.close()
         
-    def get_current_attendance_status(self, name):
+    def archive_attendance(self, keep_months=3, dry_run=False):
+        """Move closed months of raw events to the archive; reports keep reading them"""
+        return self.report_engine.archive.run(self.report_rollup, keep_months=keep_months,
+                                              dry_run=dry_run)
+    
+    def presence_snapshot(self):
+        """Compact status of every employee for the dashboard's initial load.
+        
+        ``seq`` is the last presence event already reflected, so the client can
+        subscribe to /presence/stream from there without missing a delta.
+        """
+        seq = self.presence_events.last_seq
+        events = self.presence.snapshot()
         session = Session()
         try:
-            employee = session.query(Employee).filter_by(name=name).first()
-            if not employee:
-                return {'status': 'unknown', 'last_timestamp': None}
-                
-            last_record = session.query(Attendance)\
-                .filter_by(employee_id=employee.id)\
-                .order_by(Attendance.timestamp.desc())\
-                .first()
-                
-            if last_record:
-                return {
-                    'status': last_record.event_type,
-                    'last_timestamp': last_record.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                }
-            return {
-                'status': 'unknown',
-                'last_timestamp': None
-            }
-            
-        except Exception as e:
-            print(f"Status check error: {str(e)}")
-            return {'status': 'unknown', 'last_timestamp': None}
+            employees = session.query(Employee.id, Employee.name).order_by(Employee.id).all()
         finally:
             session.close()
+        rows = []
+        for employee_id, name in employees:
+            event_type, timestamp = events.get(employee_id, ('unknown', None))
+            rows.append([employee_id, name, event_type,
+                         timestamp.strftime('%Y-%m-%d %H:%M:%S') if timestamp else None])
+        return {'seq': seq, 'fields': ['id', 'name', 'status', 'last_timestamp'], 'employees': rows}
+    
+    def get_current_attendance_status(self, employee_id):
+        return self.presence.status(int(employee_id))
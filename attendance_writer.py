@@ -0,0 +1,175 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+from metrics import ATTENDANCE_EVENTS, STAGE_SECONDS
+from models.database import Session, Attendance
+from presence import PresenceTable
+
+_STOP = object()
+
+
+class AttendanceWriter:
+    """Background writer that turns recognition events into attendance rows.
+
+    The camera loop only enqueues (employee_id, timestamp) events. A worker thread
+    applies the debounce window and entry/exit toggle against the presence table
+    and inserts the resulting rows in batched transactions.
+    """
+
+    def __init__(self, session_factory=Session, presence=None, max_queue=1024, batch_size=64,
+                 flush_interval=0.5, debounce_seconds=30, events=None):
+        self.session_factory = session_factory
+        self.presence = presence if presence is not None else PresenceTable(session_factory)
+        # Optional PresenceEvents that receives every committed entry/exit
+        self.events = events
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.debounce_seconds = debounce_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._state_lock = threading.Lock()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'dropped': 0,
+            'debounced': 0,
+            'written': 0,
+            'failed': 0,
+            'flushes': 0,
+            'flush_seconds_total': 0.0,
+            'flush_seconds_max': 0.0,
+            'last_flush_seconds': 0.0,
+        }
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='attendance-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Flush everything already queued and stop the worker thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, employee_id, timestamp=None):
+        """Queue a recognition event without blocking; returns False if the queue is full."""
+        event = (employee_id, timestamp or datetime.now())
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('submitted')
+        return True
+
+    def reset(self):
+        """Forget cached last events, e.g. after attendance rows were deleted."""
+        with self._state_lock:
+            self.presence.clear()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def metrics(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_capacity'] = self._queue.maxsize
+        stats['flush_seconds_avg'] = (stats['flush_seconds_total'] / stats['flushes']
+                                      if stats['flushes'] else 0.0)
+        return stats
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+        ATTENDANCE_EVENTS.inc(amount, result=key)
+
+    def _run(self):
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    running = False
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if not running:
+                # Drain whatever was queued before the stop request
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        session = self.session_factory()
+        records = []
+        try:
+            with self._state_lock:
+                if not self.presence.warmed:
+                    self.presence.warm()
+
+                for employee_id, timestamp in sorted(batch, key=lambda event: event[1]):
+                    last = self.presence.last_event(employee_id)
+                    if last is None:
+                        event_type = 'entry'
+                    else:
+                        last_type, last_timestamp = last
+                        if (timestamp - last_timestamp).total_seconds() < self.debounce_seconds:
+                            self._count('debounced')
+                            continue
+                        event_type = 'exit' if last_type == 'entry' else 'entry'
+                    self.presence.update(employee_id, event_type, timestamp)
+                    records.append(Attendance(
+                        employee_id=employee_id,
+                        timestamp=timestamp,
+                        event_type=event_type
+                    ))
+
+            logged = [(record.employee_id, record.event_type, record.timestamp) for record in records]
+            if records:
+                session.add_all(records)
+                session.commit()
+                for employee_id, event_type, timestamp in logged:
+                    print(f"Successfully logged {event_type} for employee {employee_id} "
+                          f"at {timestamp.strftime('%H:%M:%S')}")
+                if self.events is not None:
+                    self.events.publish_attendance(logged)
+            self._count('written', len(records))
+        except Exception as e:
+            print(f"Attendance logging error: {str(e)}")
+            session.rollback()
+            self._count('failed', len(records))
+            # Presence was updated ahead of the commit, reload it from the database
+            self.presence.warmed = False
+        finally:
+            session.close()
+            elapsed = time.perf_counter() - start
+            STAGE_SECONDS.observe(elapsed, stage='db_flush')
+            with self._stats_lock:
+                self._stats['flushes'] += 1
+                self._stats['flush_seconds_total'] += elapsed
+                self._stats['last_flush_seconds'] = elapsed
+                self._stats['flush_seconds_max'] = max(self._stats['flush_seconds_max'], elapsed)
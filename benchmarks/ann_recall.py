@@ -0,0 +1,66 @@
+"""Recall and latency of the IVF index against brute-force matching.
+
+Usage: python benchmarks/ann_recall.py --size 20000 --queries 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import IVFIndex, measure_recall
+from face_gallery import FaceGallery
+
+
+def synthetic_encodings(count, dim=128, seed=0):
+    """Random descriptors with roughly unit norm, like dlib's 128-d output"""
+    rng = np.random.default_rng(seed)
+    encodings = rng.normal(size=(count, dim)).astype(np.float32)
+    encodings /= np.linalg.norm(encodings, axis=1, keepdims=True)
+    return encodings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--n-lists', type=int, default=None)
+    parser.add_argument('--noise', type=float, default=0.02)
+    args = parser.parse_args()
+
+    encodings = synthetic_encodings(args.size)
+    ids = np.arange(1, args.size + 1)
+    rng = np.random.default_rng(1)
+    picked = rng.choice(args.size, args.queries, replace=False)
+    queries = encodings[picked] + rng.normal(scale=args.noise, size=(args.queries, encodings.shape[1]))
+
+    gallery = FaceGallery(capacity=args.size)
+    for employee_id, encoding in zip(ids, encodings):
+        gallery.add(int(employee_id), str(employee_id), encoding)
+
+    start = time.perf_counter()
+    gallery.match(queries)
+    brute_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    index = IVFIndex(n_lists=args.n_lists)
+    start = time.perf_counter()
+    index.train(encodings, ids)
+    print(f"Trained {len(index.centroids)} lists over {args.size} faces "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"brute force: {brute_ms:.3f} ms/query")
+
+    n_probe = 1
+    while n_probe <= len(index.centroids):
+        start = time.perf_counter()
+        index.search(queries, n_probe=n_probe)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / args.queries
+        recall = measure_recall(index, encodings, ids, queries, n_probe=n_probe)
+        print(f"n_probe={n_probe:<4d} recall@1={recall:.3f}  {elapsed_ms:.3f} ms/query")
+        n_probe *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Per-face vs batched dlib face descriptor computation.
+
+Faces are detected once per image; the benchmark then times only the
+landmark + descriptor step for (a) one compute_face_descriptor call per face,
+(b) one call per image and (c) one call for all images together.
+
+Usage: python benchmarks/descriptor_batching.py path/to/images [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_detection import (detect_faces, encode_faces, encode_faces_batch,
+                            encode_faces_individually, load_face_models)
+from benchmarks.detection_scale import load_images
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('images', help='directory of sample frames (ideally several faces each)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    face_detector, shape_predictor, face_encoder = load_face_models()
+    images = load_images(args.images)
+    rgb_frames = [cv2.cvtColor(image, cv2.COLOR_BGR2RGB) for image in images]
+    locations = [detect_faces(face_detector, image) for image in images]
+    faces = sum(len(face_locations) for face_locations in locations)
+    if not faces:
+        sys.exit("No faces detected in the sample images")
+    print(f"{len(images)} images, {faces} faces")
+
+    scenarios = {
+        'per-face': lambda: [encode_faces_individually(shape_predictor, face_encoder, rgb, loc)
+                             for rgb, loc in zip(rgb_frames, locations)],
+        'per-frame batch': lambda: [encode_faces(shape_predictor, face_encoder, rgb, loc)
+                                    for rgb, loc in zip(rgb_frames, locations)],
+        'multi-frame batch': lambda: encode_faces_batch(shape_predictor, face_encoder,
+                                                        rgb_frames, locations),
+    }
+    baseline = None
+    for name, function in scenarios.items():
+        seconds = timed(function, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:<18} {seconds * 1000 / faces:8.2f} ms/face  {baseline / seconds:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
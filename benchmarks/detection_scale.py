@@ -0,0 +1,67 @@
+"""Detection time and recall of the dlib HOG detector at several downscale factors.
+
+Recall is measured against the detections at full resolution (scale 1.0) on the
+same images, counting a face as found when boxes overlap with IoU >= 0.5.
+
+Usage: python benchmarks/detection_scale.py path/to/images [--scales 1.0 0.5 0.35 0.25]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import dlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_detection import detect_faces
+from face_tracker import box_iou
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+
+def load_images(directory):
+    images = []
+    for path in sorted(Path(directory).rglob('*')):
+        if path.suffix.lower() in IMAGE_SUFFIXES:
+            image = cv2.imread(str(path))
+            if image is not None:
+                images.append(image)
+    return images
+
+
+def to_boxes(rects):
+    return [(r.left(), r.top(), r.right(), r.bottom()) for r in rects]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('images', help='directory of sample frames')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0, 0.75, 0.5, 0.35, 0.25])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        sys.exit(f"No images found in {args.images}")
+    detector = dlib.get_frontal_face_detector()
+    reference = [to_boxes(detect_faces(detector, image)) for image in images]
+    total_faces = sum(len(boxes) for boxes in reference)
+    print(f"{len(images)} images, {total_faces} faces at full resolution")
+
+    for scale in args.scales:
+        found = 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            detections = [to_boxes(detect_faces(detector, image, scale=scale)) for image in images]
+        elapsed_ms = (time.perf_counter() - start) * 1000 / (args.repeat * len(images))
+        for expected, boxes in zip(reference, detections):
+            found += sum(1 for box in expected if any(box_iou(box, other) >= 0.5 for other in boxes))
+        recall = found / total_faces if total_faces else 1.0
+        print(f"scale={scale:<5.2f} {elapsed_ms:8.2f} ms/frame  recall={recall:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Latency of the hot attendance queries before and after indexes and pragmas.
+
+Builds a synthetic database (default: 1,000 employees, one year of weekday
+entry/exit events) in a temporary directory, then times the status, logging
+and report queries on a copy without indexes using SQLite defaults, and on a
+copy with the schema indexes and the pragmas from models/database.py.
+
+Usage: python benchmarks/query_benchmark.py [--employees 1000] [--days 365]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, Employee, Attendance, apply_sqlite_pragmas
+from benchmarks.synthetic import generate_attendance_history, generate_gallery
+
+
+def build_database(path, employees, days):
+    """Create the schema and bulk-load synthetic employees and attendance"""
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    generate_gallery(path, employees)
+    return generate_attendance_history(path, employees, days)
+
+
+def drop_indexes(path):
+    connection = sqlite3.connect(path)
+    for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'ix_%'").fetchall():
+        connection.execute(f'DROP INDEX {name}')
+    connection.execute('PRAGMA journal_mode=DELETE')
+    connection.commit()
+    connection.close()
+
+
+def time_queries(path, tuned, employees, first_day, samples, seed=1):
+    engine = create_engine(f'sqlite:///{path}')
+    if tuned:
+        event.listen(engine, 'connect', apply_sqlite_pragmas)
+    Session = sessionmaker(bind=engine)
+    rng = random.Random(seed)
+    timings = {'status': [], 'log_attendance': [], 'monthly_report': []}
+
+    for _ in range(samples):
+        employee_id = rng.randint(1, employees)
+        session = Session()
+        start = time.perf_counter()
+        session.query(Attendance).filter_by(employee_id=employee_id)\
+            .order_by(Attendance.timestamp.desc()).first()
+        timings['status'].append(time.perf_counter() - start)
+        session.close()
+
+        session = Session()
+        start = time.perf_counter()
+        employee = session.query(Employee).filter_by(name=f'Employee {employee_id}').first()
+        last = session.query(Attendance).filter_by(employee_id=employee.id)\
+            .order_by(Attendance.timestamp.desc()).first()
+        session.add(Attendance(employee_id=employee.id, timestamp=datetime.now(),
+                               event_type='exit' if last.event_type == 'entry' else 'entry'))
+        session.commit()
+        timings['log_attendance'].append(time.perf_counter() - start)
+        session.close()
+
+        session = Session()
+        month_start = first_day + timedelta(days=rng.randint(0, 300))
+        start = time.perf_counter()
+        session.query(Attendance.timestamp, Attendance.event_type)\
+            .filter(Attendance.employee_id == employee_id)\
+            .filter(Attendance.timestamp.between(month_start, month_start + timedelta(days=30)))\
+            .order_by(Attendance.timestamp).all()
+        timings['monthly_report'].append(time.perf_counter() - start)
+        session.close()
+    engine.dispose()
+    return {name: statistics.median(values) * 1000 for name, values in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--samples', type=int, default=50)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='attendance_bench_')
+    try:
+        tuned_path = os.path.join(directory, 'tuned.db')
+        baseline_path = os.path.join(directory, 'baseline.db')
+        start = time.perf_counter()
+        count, first_day = build_database(tuned_path, args.employees, args.days)
+        print(f"Built {count} attendance rows for {args.employees} employees "
+              f"in {time.perf_counter() - start:.1f}s")
+        shutil.copy(tuned_path, baseline_path)
+        drop_indexes(baseline_path)
+
+        baseline = time_queries(baseline_path, False, args.employees, first_day, args.samples)
+        tuned = time_queries(tuned_path, True, args.employees, first_day, args.samples)
+        print(f"{'query':<16}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for name in baseline:
+            print(f"{name:<16}{baseline[name]:>12.3f}{tuned[name]:>12.3f}{baseline[name] / tuned[name]:>9.1f}x")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
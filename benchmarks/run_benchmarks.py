@@ -0,0 +1,224 @@
+"""End-to-end benchmark suite writing JSON results for regression tracking.
+
+Scenarios:
+  gallery_match        batched gallery matching time for each gallery size
+  log_attendance       AttendanceWriter throughput from submit to commit
+  reports              report engine and rollup timings over a synthetic history
+  recognition_latency  per-frame process_frame latency on a video file or image
+                       directory (needs the dlib models; skipped otherwise)
+
+Everything runs against a throwaway database in a temporary directory.
+
+Usage: python benchmarks/run_benchmarks.py --output results.json [--frames path] [--quick]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        'p50_ms': statistics.median(values) * 1000,
+        'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+        'mean_ms': statistics.fmean(values) * 1000,
+        'count': len(values),
+    }
+
+
+def bench_gallery_match(sizes, queries_per_frame=4, repeat=50):
+    from face_gallery import FaceGallery
+    from benchmarks.synthetic import random_encodings
+
+    results = {}
+    for size in sizes:
+        encodings = random_encodings(size, seed=size)
+        gallery = FaceGallery(capacity=size)
+        for employee_id, encoding in enumerate(encodings, start=1):
+            gallery.add(employee_id, str(employee_id), encoding)
+        queries = encodings[:queries_per_frame] + 0.01
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            gallery.match(queries)
+            timings.append(time.perf_counter() - start)
+        results[str(size)] = percentiles(timings)
+    return results
+
+
+def bench_log_attendance(employees, events):
+    from attendance_writer import AttendanceWriter
+    from presence import PresenceTable
+
+    presence = PresenceTable()
+    presence.warm()
+    writer = AttendanceWriter(presence=presence, max_queue=events + 1, batch_size=256, flush_interval=0.05)
+    writer.start()
+    base = datetime.now()
+    start = time.perf_counter()
+    submit_timings = []
+    for n in range(events):
+        # Space each employee's events past the debounce window so they are written
+        timestamp = base + timedelta(seconds=31 * (n // employees))
+        submitted = time.perf_counter()
+        writer.submit(n % employees + 1, timestamp)
+        submit_timings.append(time.perf_counter() - submitted)
+    writer.stop(timeout=120)
+    elapsed = time.perf_counter() - start
+    metrics = writer.metrics()
+    return {
+        'events': events,
+        'written': metrics['written'],
+        'events_per_second': events / elapsed,
+        'submit': percentiles(submit_timings),
+        'flush_avg_ms': metrics['flush_seconds_avg'] * 1000,
+        'flush_max_ms': metrics['flush_seconds_max'] * 1000,
+    }
+
+
+def bench_reports(employees, last_day):
+    from report_engine import ReportEngine
+    from report_rollup import ReportRollup
+
+    engine = ReportEngine()
+    rollup = ReportRollup(engine)
+    month_start = last_day - timedelta(days=30)
+    results = {}
+
+    start = time.perf_counter()
+    engine.daily_totals(month_start, last_day)
+    results['month_all_employees_s'] = time.perf_counter() - start
+
+    timings = []
+    for employee_id in range(1, min(employees, 20) + 1):
+        start = time.perf_counter()
+        engine.weekly_report(employee_id, last_day - timedelta(days=6), last_day)
+        timings.append(time.perf_counter() - start)
+    results['weekly_single_employee'] = percentiles(timings)
+
+    start = time.perf_counter()
+    days = rollup.refresh()
+    results['rollup_full_refresh_s'] = time.perf_counter() - start
+    results['rollup_days'] = days
+
+    timings = []
+    for employee_id in range(1, min(employees, 20) + 1):
+        start = time.perf_counter()
+        rollup.weekly_report(employee_id, last_day - timedelta(days=6), last_day - timedelta(days=1))
+        timings.append(time.perf_counter() - start)
+    results['weekly_from_rollup'] = percentiles(timings)
+    return results
+
+
+def bench_recognition(frames_path, max_frames):
+    from camera_config import CameraConfig
+    try:
+        from attendance_system import AttendanceSystem
+        attendance_system = AttendanceSystem(preload_models=True)
+    except (ImportError, FileNotFoundError) as e:
+        return {'skipped': str(e)}
+
+    capture = CameraConfig.open_source(frames_path)
+    timings = []
+    faces = 0
+    try:
+        while len(timings) < max_frames:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            start = time.perf_counter()
+            _, detected_faces = attendance_system.process_frame(frame)
+            timings.append(time.perf_counter() - start)
+            faces += len(detected_faces)
+    finally:
+        capture.release()
+        attendance_system.close()
+    result = percentiles(timings)
+    result['recognized_faces'] = faces
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--frames', help='video file or image directory for recognition latency')
+    parser.add_argument('--max-frames', type=int, default=200)
+    parser.add_argument('--gallery-sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--log-events', type=int, default=20000)
+    parser.add_argument('--quick', action='store_true', help='small sizes for a smoke run')
+    args = parser.parse_args()
+    if args.quick:
+        args.gallery_sizes, args.employees, args.days, args.log_events = [100, 1000], 50, 60, 2000
+
+    output = os.path.abspath(args.output)
+    frames = os.path.abspath(args.frames) if args.frames else None
+    directory = tempfile.mkdtemp(prefix='attendance_bench_')
+    db_path = os.path.join(directory, 'data', 'attendance.db')
+    os.environ['ATTENDANCE_DATABASE_URL'] = f'sqlite:///{db_path}'
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        # Imported here so the models bind to the temporary database
+        import models.database
+        from benchmarks.synthetic import generate_attendance_history, generate_gallery
+
+        results = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'processor': platform.processor(),
+                'cpu_count': os.cpu_count(),
+                'args': {k: v for k, v in vars(args).items() if k != 'output'},
+            },
+            'scenarios': {},
+        }
+        scenarios = results['scenarios']
+
+        print("gallery_match...")
+        scenarios['gallery_match'] = bench_gallery_match(args.gallery_sizes)
+
+        generate_gallery(db_path, args.employees)
+        print("log_attendance...")
+        scenarios['log_attendance'] = bench_log_attendance(args.employees, args.log_events)
+
+        models.database.Session.remove()
+        connection = sqlite3.connect(db_path)
+        connection.execute('DELETE FROM attendances')
+        connection.commit()
+        connection.close()
+        rows, _ = generate_attendance_history(db_path, args.employees, args.days)
+        print(f"reports over {rows} attendance rows...")
+        scenarios['reports'] = bench_reports(args.employees, datetime.now() - timedelta(days=1))
+        scenarios['reports']['attendance_rows'] = rows
+
+        if frames:
+            print("recognition_latency...")
+            scenarios['recognition_latency'] = bench_recognition(frames, args.max_frames)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+    print(json.dumps(results['scenarios'], indent=2, default=str))
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
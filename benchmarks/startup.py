@@ -0,0 +1,56 @@
+"""Measure app import time and resident memory with lazy versus preloaded models.
+
+Each mode runs in a fresh interpreter that imports app.py (which builds the
+AttendanceSystem) and reports wall time and peak RSS; the lazy run then loads
+the models to show the deferred cost paid by the first video request.
+
+Usage: python benchmarks/startup.py [--repeat 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+result = {'import_s': time.perf_counter() - start,
+          'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+if not app.attendance_system.models_loaded:
+    start = time.perf_counter()
+    app.attendance_system.load_models()
+    result['first_model_load_s'] = time.perf_counter() - start
+    result['rss_after_models_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+app.attendance_system.close()
+print(json.dumps(result))
+"""
+
+
+def run_probe(preload):
+    env = dict(os.environ, ATTENDANCE_PRELOAD_MODELS='1' if preload else '0')
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, preload in (('preloaded', True), ('lazy', False)):
+        runs = [run_probe(preload) for _ in range(args.repeat)]
+        results[mode] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        summary = ', '.join(f"{key}={value:.2f}" for key, value in results[mode].items())
+        print(f"{mode:>10}: {summary}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
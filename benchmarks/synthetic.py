@@ -0,0 +1,61 @@
+"""Synthetic data generators shared by the benchmark scripts."""
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from models.encoding import encode_face_encoding
+
+
+def random_encodings(count, dim=128, seed=0):
+    """Random descriptors with roughly unit norm, like dlib's 128-d output"""
+    rng = np.random.default_rng(seed)
+    encodings = rng.normal(size=(count, dim)).astype(np.float32)
+    encodings /= np.linalg.norm(encodings, axis=1, keepdims=True)
+    return encodings
+
+
+def generate_gallery(db_path, count, dim=128, seed=0):
+    """Insert ``count`` employees with random encodings; returns the encodings"""
+    encodings = random_encodings(count, dim, seed)
+    connection = sqlite3.connect(db_path)
+    connection.executemany(
+        'INSERT INTO employees (id, name, face_encoding) VALUES (?, ?, ?)',
+        [(i + 1, f'Employee {i + 1}', encode_face_encoding(encoding)) for i, encoding in enumerate(encodings)]
+    )
+    connection.commit()
+    connection.close()
+    return encodings
+
+
+def generate_attendance_history(db_path, employees, days, end=None, seed=0):
+    """Insert weekday entry/lunch/return/leave events for every employee.
+
+    Returns (row_count, first_day).
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_day = end - timedelta(days=days)
+    connection = sqlite3.connect(db_path)
+    insert = 'INSERT INTO attendances (employee_id, timestamp, event_type) VALUES (?, ?, ?)'
+    rows = []
+    for day in range(days):
+        date = first_day + timedelta(days=day)
+        if date.weekday() >= 5:
+            continue
+        for employee_id in range(1, employees + 1):
+            entry = date + timedelta(hours=8, minutes=rng.randint(0, 90))
+            lunch = entry + timedelta(hours=4, minutes=rng.randint(0, 30))
+            back = lunch + timedelta(minutes=rng.randint(30, 60))
+            leave = back + timedelta(hours=4, minutes=rng.randint(0, 60))
+            for timestamp, event_type in ((entry, 'entry'), (lunch, 'exit'), (back, 'entry'), (leave, 'exit')):
+                rows.append((employee_id, timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'), event_type))
+        if len(rows) > 200000:
+            connection.executemany(insert, rows)
+            rows = []
+    connection.executemany(insert, rows)
+    connection.commit()
+    count = connection.execute('SELECT COUNT(*) FROM attendances').fetchone()[0]
+    connection.close()
+    return count, first_day
@@ -1,6 +1,10 @@
 import cv2
+import json
 import platform
 import os
+from camera_utils import ImageDirectoryCapture
+
+CAMERA_SOURCES_PATH = os.environ.get('CAMERA_SOURCES', 'camera_sources.json')
 
 class CameraConfig:
     @staticmethod
@@ -28,3 +32,40 @@ class CameraConfig:
                     
         # Default fallback for other systems
         return cv2.VideoCapture(0)
+
+    @staticmethod
+    def open_source(source):
+        """Open a device index, image directory, video file or stream URL (e.g. rtsp://...)"""
+        if isinstance(source, str) and os.path.isdir(source):
+            return ImageDirectoryCapture(source)
+        if isinstance(source, int) or str(source).isdigit():
+            camera = cv2.VideoCapture(int(source))
+            camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+            camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            camera.set(cv2.CAP_PROP_FPS, 30)
+            return camera
+        return cv2.VideoCapture(str(source))
+
+    @staticmethod
+    def load_sources(path=CAMERA_SOURCES_PATH):
+        """Read the list of camera sources, defaulting to device 0.
+
+        The file holds a JSON list such as
+        [{"name": "front-door", "source": 0},
+         {"name": "garage", "source": "rtsp://10.0.0.5/stream"},
+         {"name": "replay", "source": "samples/door.mp4", "loop": true}]
+        """
+        if not os.path.exists(path):
+            return [{'name': 'camera-0', 'source': 0, 'loop': False}]
+        with open(path) as f:
+            entries = json.load(f)
+        sources = []
+        for n, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                entry = {'source': entry}
+            sources.append({
+                'name': entry.get('name', f'camera-{n}'),
+                'source': entry['source'],
+                'loop': bool(entry.get('loop', False)),
+            })
+        return sources
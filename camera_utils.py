@@ -15,3 +15,40 @@ def initialize_camera():
     camera.set(cv2.CAP_PROP_FPS, 30)
     
     return camera
+
+
+class ImageDirectoryCapture:
+    """cv2.VideoCapture-like source that replays the images in a directory"""
+    
+    IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.bmp')
+    
+    def __init__(self, directory, loop=False):
+        self.paths = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(directory)
+            for name in names
+            if name.lower().endswith(self.IMAGE_SUFFIXES)
+        )
+        self.loop = loop
+        self.position = 0
+    
+    def isOpened(self):
+        return bool(self.paths)
+    
+    def read(self):
+        if self.position >= len(self.paths):
+            if not self.loop or not self.paths:
+                return False, None
+            self.position = 0
+        frame = cv2.imread(self.paths[self.position])
+        self.position += 1
+        return frame is not None, frame
+    
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = int(value)
+            return True
+        return False
+    
+    def release(self):
+        self.paths = []
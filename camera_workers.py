@@ -0,0 +1,251 @@
+import argparse
+import multiprocessing as mp
+import queue
+import threading
+import time
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from camera_config import CameraConfig
+from face_gallery import FaceGallery
+from face_quality import FaceQualityFilter
+
+# Worker messages are (camera, employee_id, timestamp) recognitions, or
+# (camera, FRAMES or DONE, frames_processed) progress reports
+FRAMES = 'frames'
+DONE = 'done'
+# Seconds between progress reports from a running worker
+PROGRESS_INTERVAL = 1.0
+
+
+class SharedGallerySnapshot:
+    """Read-only copy of the gallery encodings in a shared-memory block.
+
+    Worker processes map the block instead of each holding a private copy of
+    the encoding matrix.
+    """
+
+    def __init__(self, gallery):
+        employee_ids, names, encodings = gallery.snapshot()
+        self.shape = encodings.shape
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, encodings.nbytes))
+        np.ndarray(self.shape, dtype=np.float32, buffer=self.shm.buf)[:] = encodings
+        self.descriptor = {
+            'shm_name': self.shm.name,
+            'shape': self.shape,
+            'employee_ids': employee_ids.tolist(),
+            'names': names,
+            'tolerance': gallery.tolerance,
+        }
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_gallery(descriptor):
+    shm = shared_memory.SharedMemory(name=descriptor['shm_name'])
+    encodings = np.ndarray(descriptor['shape'], dtype=np.float32, buffer=shm.buf)
+    encodings.flags.writeable = False
+    gallery = FaceGallery.from_arrays(descriptor['employee_ids'], descriptor['names'],
+                                      encodings, tolerance=descriptor['tolerance'])
+    return shm, gallery
+
+
+def camera_worker(source, gallery_descriptor, events, stop_event, detection_scale=1.0, sample_every=1,
+                  quality_thresholds=None):
+    """Recognition loop for one camera source, run in its own process.
+
+    Faces go through the same quality checks as the in-process pipeline.
+    Recognized faces are sent as (camera, employee_id, timestamp) events, the
+    frame count every PROGRESS_INTERVAL as (camera, FRAMES, frames_processed),
+    and a final (camera, DONE, frames_processed) marks the end of the source.
+    """
+    # Imported here so the pool itself (and the backfill planning that shares
+    # this module) does not need dlib
+    from face_detection import compute_descriptors, detect_faces, face_landmarks, load_face_models
+
+    cv2.setNumThreads(1)
+    shm, gallery = attach_gallery(gallery_descriptor)
+    face_detector, shape_predictor, face_encoder = load_face_models()
+    quality_filter = FaceQualityFilter(**(quality_thresholds or {}))
+    camera = CameraConfig.open_source(source['source'])
+    frames_read = frames_processed = 0
+    next_report = time.monotonic() + PROGRESS_INTERVAL
+    try:
+        if not camera.isOpened():
+            print(f"[{source['name']}] Could not open source {source['source']}")
+            return
+        while not stop_event.is_set():
+            ret, frame = camera.read()
+            if not ret:
+                if source['loop'] and frames_read:
+                    camera.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                break
+            frames_read += 1
+            if frames_read % sample_every:
+                continue
+            frames_processed += 1
+            if time.monotonic() >= next_report:
+                next_report += PROGRESS_INTERVAL
+                try:
+                    events.put_nowait((source['name'], FRAMES, frames_processed))
+                except queue.Full:
+                    pass  # the next report carries the count
+
+            face_locations = detect_faces(face_detector, frame, scale=detection_scale)
+            if not face_locations or not len(gallery):
+                continue
+            candidates = [rect for rect in face_locations if quality_filter.check_box(frame, rect) is None]
+            if not candidates:
+                continue
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            timestamp = datetime.now()
+            shapes = [shape for shape in face_landmarks(shape_predictor, rgb_frame, candidates)
+                      if quality_filter.check_pose(shape) is None]
+            if not shapes:
+                continue
+            encodings = compute_descriptors(face_encoder, [rgb_frame], [shapes])[0]
+            for employee_id, _, _ in gallery.match(encodings):
+                if employee_id is not None:
+                    events.put((source['name'], employee_id, timestamp))
+    finally:
+        camera.release()
+        events.put((source['name'], DONE, frames_processed))
+        del gallery
+        shm.close()
+
+
+class CameraWorkerPool:
+    """Runs one recognition process per camera source.
+
+    All workers share one read-only gallery snapshot and feed a single
+    attendance writer in this process, so debouncing spans every entrance.
+    """
+
+    def __init__(self, sources, gallery, attendance_writer, detection_scale=1.0, sample_every=1,
+                 quality_thresholds=None):
+        self.sources = sources
+        self.gallery = gallery
+        self.attendance_writer = attendance_writer
+        self.detection_scale = detection_scale
+        self.sample_every = sample_every
+        self.quality_thresholds = quality_thresholds
+        self._context = mp.get_context('spawn')
+        self._processes = []
+        self._snapshot = None
+        self._collector = None
+        self._events = None
+        self._stop_event = None
+        self._finished = set()
+        self._stats_lock = threading.Lock()
+        self.recognitions = {}
+        self.frames_processed = {}
+        self.started_at = None
+
+    def start(self):
+        self._snapshot = SharedGallerySnapshot(self.gallery)
+        self._events = self._context.Queue(maxsize=4096)
+        self._stop_event = self._context.Event()
+        self._finished = set()
+        self.started_at = time.perf_counter()
+        for source in self.sources:
+            process = self._context.Process(
+                target=camera_worker,
+                name=f"camera-{source['name']}",
+                args=(source, self._snapshot.descriptor, self._events, self._stop_event,
+                      self.detection_scale, self.sample_every, self.quality_thresholds),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        self._collector = threading.Thread(target=self._collect, name='camera-events', daemon=True)
+        self._collector.start()
+
+    def _collect(self):
+        while len(self._finished) < len(self._processes):
+            try:
+                camera, employee_id, payload = self._events.get(timeout=0.5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in self._processes):
+                    break
+                continue
+            with self._stats_lock:
+                if employee_id in (FRAMES, DONE):
+                    self.frames_processed[camera] = payload
+                    if employee_id == DONE:
+                        self._finished.add(camera)
+                    continue
+                self.recognitions[camera] = self.recognitions.get(camera, 0) + 1
+            self.attendance_writer.submit(employee_id, payload)
+
+    def join(self):
+        """Wait until every source has ended (e.g. non-looping video files)."""
+        for process in self._processes:
+            process.join()
+        if self._collector is not None:
+            self._collector.join()
+
+    def stop(self, timeout=5.0):
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        if self._collector is not None:
+            self._collector.join(timeout)
+        self._processes = []
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def reload_gallery(self):
+        """Restart the workers against a fresh snapshot after enrollment changes."""
+        self.stop()
+        self.start()
+
+    def metrics(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        with self._stats_lock:
+            frames = sum(self.frames_processed.values())
+            return {
+                'workers_alive': sum(1 for process in self._processes if process.is_alive()),
+                'recognitions': dict(self.recognitions),
+                'frames_processed': dict(self.frames_processed),
+                'fps': frames / elapsed if elapsed else 0.0,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run recognition on every configured camera source')
+    parser.add_argument('--sources', default=None, help='camera sources JSON file')
+    parser.add_argument('--scale', type=float, default=1.0, help='detection downscale factor')
+    parser.add_argument('--sample-every', type=int, default=1, help='process every Nth frame')
+    args = parser.parse_args()
+
+    from attendance_system import AttendanceSystem
+
+    sources = CameraConfig.load_sources(args.sources) if args.sources else CameraConfig.load_sources()
+    attendance_system = AttendanceSystem()
+    pool = CameraWorkerPool(sources, attendance_system.gallery, attendance_system.attendance_writer,
+                            detection_scale=args.scale, sample_every=args.sample_every,
+                            quality_thresholds=attendance_system.quality_filter.thresholds)
+    print(f"Starting {len(sources)} camera workers: {', '.join(s['name'] for s in sources)}")
+    pool.start()
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        print("Stopping camera workers...")
+    finally:
+        pool.stop()
+        attendance_system.close()
+    print(pool.metrics())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""Bulk enrollment from a directory tree of employee photos.
+
+Layout: <root>/<employee_id>_<name>/*.jpg, e.g. static/employee_photos/42_Jane_Doe/.
+Photos are decoded, detected and encoded across a process pool (threads when
+called from the running server); images without
+exactly one usable face are rejected, the remaining descriptors are averaged per
+employee and every employee is upserted in a single transaction.
+
+Usage: python enrollment.py [--root static/employee_photos] [--workers 4]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+
+from face_quality import FaceQualityFilter
+from models.database import Session, Employee
+from models.encoding import encode_face_encoding
+
+PHOTO_ROOT = os.path.join('static', 'employee_photos')
+PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+FOLDER_PATTERN = re.compile(r'^(\d+)(?:_(.+))?$')
+# Photos are detected at most this many pixels on the long side
+DETECTION_MAX_SIDE = 1024
+# Enrollment photos are held to a higher bar than live frames; the other
+# FaceQualityFilter checks keep their defaults
+ENROLLMENT_QUALITY = {'min_size': 80, 'min_sharpness': 60.0}
+
+_worker_models = None
+_worker_quality_filter = None
+
+
+def scan_photo_tree(root=PHOTO_ROOT, employee_ids=None):
+    """Return [(employee_id, name, [photo paths])] for each <id>_<name> folder"""
+    if not os.path.isdir(root):
+        print(f"Photo directory {root} not found")
+        return []
+    people = []
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+        match = FOLDER_PATTERN.match(entry.name)
+        if not entry.is_dir() or match is None:
+            continue
+        employee_id = int(match.group(1))
+        if employee_ids is not None and employee_id not in employee_ids:
+            continue
+        name = (match.group(2) or '').replace('_', ' ').strip() or str(employee_id)
+        photos = sorted(os.path.join(entry.path, filename) for filename in os.listdir(entry.path)
+                        if os.path.splitext(filename)[1].lower() in PHOTO_EXTENSIONS)
+        people.append((employee_id, name, photos))
+    return people
+
+
+def encode_photo(path, models, quality_filter, models_lock=None):
+    """Return (path, descriptor, None) for a usable photo or (path, None, reason).
+
+    models_lock is held around the landmark and descriptor calls when the
+    models are shared with other threads.
+    """
+    # Imported here so scanning and upserting work without dlib
+    from face_detection import compute_descriptors, detect_faces, face_landmarks
+
+    face_detector, shape_predictor, face_encoder = models
+    image = cv2.imread(path)
+    if image is None:
+        return path, None, 'unreadable'
+    scale = min(1.0, DETECTION_MAX_SIDE / max(image.shape[:2]))
+    face_locations = detect_faces(face_detector, image, scale=scale, upsample=1)
+    if len(face_locations) == 0:
+        return path, None, 'no_face'
+    if len(face_locations) > 1:
+        return path, None, 'multiple_faces'
+    reason = quality_filter.check_box(image, face_locations[0])
+    if reason is not None:
+        return path, None, reason
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    with models_lock or nullcontext():
+        shapes = face_landmarks(shape_predictor, rgb_image, face_locations)
+    reason = quality_filter.check_pose(shapes[0])
+    if reason is not None:
+        return path, None, reason
+    with models_lock or nullcontext():
+        descriptor = compute_descriptors(face_encoder, [rgb_image], [shapes])[0][0]
+    return path, np.asarray(descriptor, dtype=np.float32), None
+
+
+def _init_worker(quality_thresholds):
+    global _worker_models, _worker_quality_filter
+    from face_detection import load_face_models
+
+    cv2.setNumThreads(1)
+    _worker_models = load_face_models()
+    _worker_quality_filter = FaceQualityFilter(**quality_thresholds)
+
+
+def _encode_in_worker(path):
+    return encode_photo(path, _worker_models, _worker_quality_filter)
+
+
+def encode_photos(paths, workers=None, models=None, quality_thresholds=ENROLLMENT_QUALITY,
+                  models_lock=None):
+    """Encode photos in a process pool, or with threads in this process when models are given.
+
+    The server passes its loaded models and the lock its frame pipeline holds
+    around them: spawned workers would re-import the app module and build a
+    second AttendanceSystem each. Returns
+    {path: (descriptor or None, rejection reason or None)}.
+    """
+    results = {}
+    if not paths:
+        return results
+    workers = workers or min(4, os.cpu_count() or 1)
+    if models is not None or workers == 1:
+        if models is None:
+            from face_detection import load_face_models
+            models = load_face_models()
+        quality_filter = FaceQualityFilter(**quality_thresholds)
+        # Decoding and detection overlap; the ResNet keeps per-call state
+        models_lock = models_lock or threading.Lock()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for path, descriptor, reason in executor.map(
+                    lambda path: encode_photo(path, models, quality_filter, models_lock), paths):
+                results[path] = (descriptor, reason)
+        return results
+
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'),
+                             initializer=_init_worker, initargs=(quality_thresholds,)) as executor:
+        for path, descriptor, reason in executor.map(_encode_in_worker, paths, chunksize=chunksize):
+            results[path] = (descriptor, reason)
+    return results
+
+
+def upsert_employees(enrolled, session_factory=Session):
+    """Insert or update (employee_id, name, encoding) rows in one transaction"""
+    if not enrolled:
+        return
+    session = session_factory()
+    try:
+        existing = {employee.id: employee for employee in
+                    session.query(Employee).filter(Employee.id.in_([row[0] for row in enrolled]))}
+        for employee_id, name, encoding in enrolled:
+            employee = existing.get(employee_id)
+            if employee is None:
+                session.add(Employee(id=employee_id, name=name,
+                                     face_encoding=encode_face_encoding(encoding)))
+            else:
+                employee.name = name
+                employee.face_encoding = encode_face_encoding(encoding)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def enroll_people(people, workers=None, models=None, min_samples=1, session_factory=Session,
+                  models_lock=None):
+    """Encode, average and store the photos of each (employee_id, name, paths) entry.
+
+    Returns {'enrolled': [(employee_id, name, encoding, samples)],
+             'rejected': {path: reason}, 'skipped': {employee_id: reason}}.
+    """
+    encoded = encode_photos([path for _, _, paths in people for path in paths],
+                            workers=workers, models=models, models_lock=models_lock)
+    enrolled, rejected, skipped = [], {}, {}
+    for employee_id, name, paths in people:
+        samples = []
+        for path in paths:
+            descriptor, reason = encoded[path]
+            if descriptor is None:
+                rejected[path] = reason
+            else:
+                samples.append(descriptor)
+        if len(samples) < max(1, min_samples):
+            skipped[employee_id] = f"{len(samples)} usable photos of {len(paths)}"
+            continue
+        enrolled.append((employee_id, name, np.mean(samples, axis=0), len(samples)))
+
+    upsert_employees([(employee_id, name, encoding) for employee_id, name, encoding, _ in enrolled],
+                     session_factory)
+    return {'enrolled': enrolled, 'rejected': rejected, 'skipped': skipped}
+
+
+def summarize(result):
+    return {
+        'enrolled': [{'employee_id': employee_id, 'name': name, 'samples': samples}
+                     for employee_id, name, _, samples in result['enrolled']],
+        'rejected': result['rejected'],
+        'skipped': {str(employee_id): reason for employee_id, reason in result['skipped'].items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enroll employees from a directory of photos')
+    parser.add_argument('--root', default=PHOTO_ROOT, help='directory of <id>_<name> folders')
+    parser.add_argument('--workers', type=int, default=None, help='encoding processes')
+    parser.add_argument('--min-samples', type=int, default=1, help='usable photos needed per employee')
+    args = parser.parse_args()
+
+    people = scan_photo_tree(args.root)
+    print(f"Found {sum(len(paths) for _, _, paths in people)} photos of {len(people)} employees")
+    result = enroll_people(people, workers=args.workers, min_samples=args.min_samples)
+    for path, reason in sorted(result['rejected'].items()):
+        print(f"Rejected {path}: {reason}")
+    for employee_id, reason in sorted(result['skipped'].items()):
+        print(f"Skipped employee {employee_id}: {reason}")
+    print(f"Enrolled {len(result['enrolled'])} employees; "
+          f"POST /gallery/reload to pick them up in a running server")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import cv2
+import dlib
+from pathlib import Path
+
+from metrics import STAGE_SECONDS
+
+MODELS_DIR = Path(__file__).parent / "models" / "data"
+SHAPE_PREDICTOR_PATH = MODELS_DIR / "shape_predictor_68_face_landmarks.dat"
+RECOGNITION_MODEL_PATH = MODELS_DIR / "dlib_face_recognition_resnet_model_v1.dat"
+
+
+def load_face_models():
+    """Load the dlib detector, 68-point shape predictor and ResNet face encoder"""
+    if not SHAPE_PREDICTOR_PATH.exists():
+        raise FileNotFoundError(f"Shape predictor model not found at {SHAPE_PREDICTOR_PATH}")
+    if not RECOGNITION_MODEL_PATH.exists():
+        raise FileNotFoundError(f"Recognition model not found at {RECOGNITION_MODEL_PATH}")
+
+    face_detector = dlib.get_frontal_face_detector()
+    shape_predictor = dlib.shape_predictor(str(SHAPE_PREDICTOR_PATH))
+    face_encoder = dlib.face_recognition_model_v1(str(RECOGNITION_MODEL_PATH))
+    return face_detector, shape_predictor, face_encoder
+
+
+def detect_faces(detector, frame, scale=1.0, roi=None, upsample=0):
+    """Run a dlib detector on a downscaled grayscale copy of a BGR frame.
+
+    ``roi`` is an optional (left, top, right, bottom) region in full-resolution
+    pixels; only that area is searched. Returned rectangles are mapped back to
+    full-resolution coordinates so they can feed the shape predictor directly.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    offset_x = offset_y = 0
+    if roi is not None:
+        left, top, right, bottom = roi
+        gray = gray[top:bottom, left:right]
+        offset_x, offset_y = left, top
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    face_locations = dlib.rectangles()
+    for rect in detector(gray, upsample):
+        face_locations.append(dlib.rectangle(
+            int(rect.left() / scale) + offset_x,
+            int(rect.top() / scale) + offset_y,
+            int(rect.right() / scale) + offset_x,
+            int(rect.bottom() / scale) + offset_y
+        ))
+    return face_locations
+
+
+def _landmarks(shape_predictor, rgb_frame, face_locations):
+    shapes = dlib.full_object_detections()
+    for face_location in face_locations:
+        shapes.append(shape_predictor(rgb_frame, face_location))
+    return shapes
+
+
+def face_landmarks(shape_predictor, rgb_frame, face_locations):
+    """68-point landmarks for each face, e.g. to check pose before encoding"""
+    with STAGE_SECONDS.time(stage='landmarks'):
+        return _landmarks(shape_predictor, rgb_frame, face_locations)
+
+
+def compute_descriptors(face_encoder, rgb_frames, shapes_per_frame):
+    """Descriptors for already landmarked faces of several frames in one ResNet pass.
+
+    ``shapes_per_frame`` holds a sequence of landmarks per frame; returns one
+    list of descriptors per frame.
+    """
+    frames, batches = [], []
+    for rgb_frame, shapes in zip(rgb_frames, shapes_per_frame):
+        if len(shapes):
+            detections = shapes
+            if not isinstance(shapes, dlib.full_object_detections):
+                detections = dlib.full_object_detections()
+                for shape in shapes:
+                    detections.append(shape)
+            frames.append(rgb_frame)
+            batches.append(detections)
+    with STAGE_SECONDS.time(stage='encode'):
+        descriptors = iter(face_encoder.compute_face_descriptor(frames, batches) if frames else [])
+        return [list(next(descriptors)) if len(shapes) else [] for shapes in shapes_per_frame]
+
+
+def encode_faces(shape_predictor, face_encoder, rgb_frame, face_locations):
+    """Compute a 128-d descriptor for each detected face in one batched call"""
+    if not len(face_locations):
+        return []
+    shapes = face_landmarks(shape_predictor, rgb_frame, face_locations)
+    return compute_descriptors(face_encoder, [rgb_frame], [shapes])[0]
+
+
+def encode_faces_batch(shape_predictor, face_encoder, rgb_frames, face_locations_per_frame):
+    """Compute descriptors for the faces of several frames in a single ResNet pass.
+
+    Returns one list of descriptors per frame.
+    """
+    with STAGE_SECONDS.time(stage='landmarks'):
+        shapes_per_frame = [_landmarks(shape_predictor, rgb_frame, face_locations)
+                            if len(face_locations) else []
+                            for rgb_frame, face_locations in zip(rgb_frames, face_locations_per_frame)]
+    return compute_descriptors(face_encoder, rgb_frames, shapes_per_frame)
+
+
+def encode_faces_individually(shape_predictor, face_encoder, rgb_frame, face_locations):
+    """One ResNet forward pass per face; kept as the baseline for benchmarks"""
+    return [face_encoder.compute_face_descriptor(rgb_frame, shape_predictor(rgb_frame, face_location))
+            for face_location in face_locations]
@@ -0,0 +1,213 @@
+import threading
+import numpy as np
+
+
+class FaceGallery:
+    """In-memory gallery of enrolled face encodings for nearest-neighbour matching.
+
+    All encodings live in one contiguous float32 matrix with their squared norms
+    precomputed, so every face in a frame is matched with a single matrix product.
+    An optional approximate index (see ``ann_index.IVFIndex``) replaces the
+    brute-force scan for very large galleries.
+    """
+
+    def __init__(self, dim=128, tolerance=0.6, capacity=64, index=None):
+        self.dim = dim
+        self.tolerance = tolerance
+        self.index = index
+        self._encodings = np.empty((capacity, dim), dtype=np.float32)
+        self._sq_norms = np.empty(capacity, dtype=np.float32)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._names = []
+        self._rows = {}
+        self._size = 0
+        self._lock = threading.RLock()
+        # Bumped on every change so caches of match results can tell they are stale
+        self.version = 0
+
+    @classmethod
+    def from_arrays(cls, employee_ids, names, encodings, tolerance=0.6):
+        """Wrap existing arrays (e.g. a shared-memory block) without copying them.
+
+        The gallery treats the arrays as its backing store; adding beyond their
+        length reallocates, so read-only arrays should only be matched against.
+        """
+        encodings = np.asarray(encodings, dtype=np.float32)
+        gallery = cls(dim=encodings.shape[1], tolerance=tolerance, capacity=0)
+        gallery.load_arrays(employee_ids, names, encodings)
+        return gallery
+
+    def load_arrays(self, employee_ids, names, encodings):
+        """Replace the whole gallery with the given arrays, without copying them.
+
+        Read-only arrays (shared memory, memory-mapped snapshots) are copied on
+        the first add or remove.
+        """
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            self._encodings = encodings
+            self._ids = np.asarray(employee_ids, dtype=np.int64)
+            self._sq_norms = np.einsum('ij,ij->i', encodings, encodings)
+            self._names = list(names)
+            self._rows = {int(employee_id): row for row, employee_id in enumerate(self._ids)}
+            self._size = len(encodings)
+            self.index = None
+            self.version += 1
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, employee_id):
+        return employee_id in self._rows
+
+    @property
+    def encodings(self):
+        return self._encodings[:self._size]
+
+    @property
+    def employee_ids(self):
+        return self._ids[:self._size]
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    def snapshot(self):
+        """Consistent copies of (employee_ids, names, encodings)."""
+        with self._lock:
+            return (self._ids[:self._size].copy(), list(self._names),
+                    self._encodings[:self._size].copy())
+
+    def _grow(self, min_capacity):
+        capacity = max(min_capacity, 2 * len(self._ids))
+        encodings = np.empty((capacity, self.dim), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        ids = np.empty(capacity, dtype=np.int64)
+        encodings[:self._size] = self._encodings[:self._size]
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        ids[:self._size] = self._ids[:self._size]
+        self._encodings, self._sq_norms, self._ids = encodings, sq_norms, ids
+
+    def add(self, employee_id, name, encoding):
+        """Add or replace the encoding for an employee."""
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            if not self._encodings.flags.writeable:
+                self._grow(self._size + 1)
+            row = self._rows.get(employee_id)
+            if row is None:
+                if self._size == len(self._ids):
+                    self._grow(self._size + 1)
+                row = self._size
+                self._size += 1
+                self._names.append(name)
+                self._rows[employee_id] = row
+            else:
+                self._names[row] = name
+            self._encodings[row] = encoding
+            self._sq_norms[row] = np.dot(encoding, encoding)
+            self._ids[row] = employee_id
+            if self.index is not None and self.index.is_trained:
+                self.index.add(employee_id, encoding)
+            self.version += 1
+
+    def remove(self, employee_id):
+        """Remove an employee, moving the last row into the freed slot."""
+        with self._lock:
+            row = self._rows.pop(employee_id, None)
+            if row is None:
+                return False
+            if self.index is not None:
+                self.index.remove(employee_id)
+            if not self._encodings.flags.writeable:
+                self._grow(self._size)
+            last = self._size - 1
+            if row != last:
+                self._encodings[row] = self._encodings[last]
+                self._sq_norms[row] = self._sq_norms[last]
+                self._ids[row] = self._ids[last]
+                self._names[row] = self._names[last]
+                self._rows[int(self._ids[row])] = row
+            self._names.pop()
+            self._size = last
+            self.version += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._names = []
+            self._rows = {}
+            self._size = 0
+            self.index = None
+            self.version += 1
+
+    def attach_index(self, index):
+        """Use an approximate index for matching, syncing it with the gallery contents.
+
+        An untrained index is trained on the current gallery; a trained (e.g. loaded
+        from disk) index has stale entries dropped and missing employees added.
+        """
+        with self._lock:
+            if not index.is_trained:
+                if self._size == 0:
+                    return False
+                index.train(self.encodings, self.employee_ids)
+            else:
+                for employee_id in set(index.ids) - set(self._rows):
+                    index.remove(employee_id)
+                for employee_id, row in self._rows.items():
+                    if employee_id not in index:
+                        index.add(employee_id, self._encodings[row])
+            self.index = index
+            return True
+
+    def distances(self, face_encodings):
+        """Euclidean distances between each query encoding and every gallery entry."""
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            gallery = self._encodings[:self._size]
+            sq_norms = self._sq_norms[:self._size]
+            sq_dist = (np.einsum('ij,ij->i', queries, queries)[:, None]
+                       + sq_norms[None, :]
+                       - 2.0 * (queries @ gallery.T))
+        np.maximum(sq_dist, 0.0, out=sq_dist)
+        return np.sqrt(sq_dist)
+
+    def match(self, face_encodings):
+        """Match a batch of encodings against the gallery.
+
+        Returns one (employee_id, name, distance) tuple per query. Queries whose
+        nearest neighbour is farther than the tolerance come back as
+        (None, None, distance).
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.dim)
+        if len(queries) == 0:
+            return []
+        with self._lock:
+            if self._size == 0:
+                return [(None, None, float('inf'))] * len(queries)
+            if self.index is not None and self.index.is_trained:
+                return self._match_indexed(queries)
+            distances = self.distances(queries)
+            best = np.argmin(distances, axis=1)
+            best_distances = distances[np.arange(len(queries)), best]
+            results = []
+            for row, distance in zip(best, best_distances):
+                distance = float(distance)
+                if distance <= self.tolerance:
+                    results.append((int(self._ids[row]), self._names[row], distance))
+                else:
+                    results.append((None, None, distance))
+            return results
+
+    def _match_indexed(self, queries):
+        employee_ids, distances = self.index.search(queries)
+        results = []
+        for employee_id, distance in zip(employee_ids, distances):
+            distance = float(distance)
+            row = self._rows.get(int(employee_id))
+            if row is not None and distance <= self.tolerance:
+                results.append((int(employee_id), self._names[row], distance))
+            else:
+                results.append((None, None, distance))
+        return results
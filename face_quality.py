@@ -0,0 +1,124 @@
+import math
+import threading
+
+import cv2
+
+from metrics import FACE_QUALITY
+
+# 68-point landmark indices used for the pose estimate
+JAW_LEFT, JAW_RIGHT = 0, 16
+NOSE_TIP = 30
+LEFT_EYE_OUTER, RIGHT_EYE_OUTER = 36, 45
+
+
+def face_crop(image, rect):
+    """Clip a dlib rectangle to the image and return that crop"""
+    height, width = image.shape[:2]
+    left, top = max(0, rect.left()), max(0, rect.top())
+    right, bottom = min(width, rect.right()), min(height, rect.bottom())
+    return image[top:bottom, left:right]
+
+
+def sharpness(gray_crop):
+    """Variance of the Laplacian; low values mean a blurred face"""
+    if gray_crop.size == 0:
+        return 0.0
+    return float(cv2.Laplacian(gray_crop, cv2.CV_64F).var())
+
+
+def pose_angles(shape):
+    """Rough (yaw, roll) from 68-point landmarks.
+
+    Yaw is the left/right imbalance of the nose-to-jaw distances, 0 for a
+    frontal face and approaching 1 in profile; roll is the eye line angle in
+    degrees.
+    """
+    nose = shape.part(NOSE_TIP)
+    jaw_left, jaw_right = shape.part(JAW_LEFT), shape.part(JAW_RIGHT)
+    left = math.hypot(nose.x - jaw_left.x, nose.y - jaw_left.y)
+    right = math.hypot(nose.x - jaw_right.x, nose.y - jaw_right.y)
+    yaw = (left - right) / (left + right) if left + right else 0.0
+    eye_left, eye_right = shape.part(LEFT_EYE_OUTER), shape.part(RIGHT_EYE_OUTER)
+    roll = math.degrees(math.atan2(eye_right.y - eye_left.y, eye_right.x - eye_left.x))
+    return yaw, roll
+
+
+class FaceQualityFilter:
+    """Cheap checks that keep hopeless faces away from the ResNet encoder.
+
+    Box checks (size, brightness, blur) run on the detection rectangle before
+    landmarking; the pose check runs on the landmarks before the descriptor.
+    Set a threshold to None to disable that check. Rejections are counted per
+    reason, each one being a descriptor that was not computed.
+    """
+
+    def __init__(self, min_size=50, min_sharpness=25.0, min_brightness=40, max_brightness=220,
+                 max_yaw=0.45, max_roll=30.0):
+        self.min_size = min_size
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.max_yaw = max_yaw
+        self.max_roll = max_roll
+        self._lock = threading.Lock()
+        self._counts = {'passed': 0}
+
+    @property
+    def thresholds(self):
+        """Keyword arguments that rebuild this filter, e.g. in a worker process"""
+        return {'min_size': self.min_size, 'min_sharpness': self.min_sharpness,
+                'min_brightness': self.min_brightness, 'max_brightness': self.max_brightness,
+                'max_yaw': self.max_yaw, 'max_roll': self.max_roll}
+
+    def _count(self, result):
+        with self._lock:
+            self._counts[result] = self._counts.get(result, 0) + 1
+        FACE_QUALITY.inc(result=result)
+
+    def check_box(self, frame, rect):
+        """Reason to reject a detection before landmarking, or None"""
+        reason = None
+        if self.min_size is not None and min(rect.width(), rect.height()) < self.min_size:
+            reason = 'face_too_small'
+        else:
+            crop = face_crop(frame, rect)
+            if crop.ndim == 3 and crop.size:
+                crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+            if crop.size == 0:
+                reason = 'face_too_small'
+            elif self.min_brightness is not None and crop.mean() < self.min_brightness:
+                reason = 'too_dark'
+            elif self.max_brightness is not None and crop.mean() > self.max_brightness:
+                reason = 'too_bright'
+            elif self.min_sharpness is not None and sharpness(crop) < self.min_sharpness:
+                reason = 'blurry'
+        if reason is not None:
+            self._count(reason)
+        return reason
+
+    def check_pose(self, shape):
+        """Reason to reject a landmarked face before encoding, or None"""
+        yaw, roll = pose_angles(shape)
+        reason = None
+        if self.max_yaw is not None and abs(yaw) > self.max_yaw:
+            reason = 'profile'
+        elif self.max_roll is not None and abs(roll) > self.max_roll:
+            reason = 'tilted'
+        self._count(reason or 'passed')
+        return reason
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        passed = counts.pop('passed')
+        rejected = sum(counts.values())
+        checked = passed + rejected
+        return {
+            'checked': checked,
+            'passed': passed,
+            'rejected': counts,
+            'descriptors_avoided': rejected,
+            'landmarks_avoided': sum(count for reason, count in counts.items()
+                                     if reason not in ('profile', 'tilted')),
+            'avoided_ratio': rejected / checked if checked else 0.0,
+        }
@@ -0,0 +1,142 @@
+import itertools
+import cv2
+
+
+def box_iou(a, b):
+    """Intersection over union of two (left, top, right, bottom) boxes"""
+    left, top = max(a[0], b[0]), max(a[1], b[1])
+    right, bottom = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, right - left) * max(0, bottom - top)
+    if intersection == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return intersection / float(area_a + area_b - intersection)
+
+
+# KCF, CSRT and MOSSE need opencv-contrib-python; MIL ships with opencv-python
+TRACKER_FACTORIES = {
+    'kcf': ['TrackerKCF_create', 'legacy.TrackerKCF_create'],
+    'csrt': ['TrackerCSRT_create', 'legacy.TrackerCSRT_create'],
+    'mosse': ['legacy.TrackerMOSSE_create'],
+    'mil': ['TrackerMIL_create'],
+}
+
+
+def create_opencv_tracker(tracker_type):
+    """Return an OpenCV single-object tracker, or None if this build lacks it"""
+    for name in TRACKER_FACTORIES.get(tracker_type, []):
+        target = cv2
+        for part in name.split('.'):
+            target = getattr(target, part, None)
+            if target is None:
+                break
+        if target is not None:
+            return target()
+    return None
+
+
+class Track:
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = box
+        self.employee_id = None
+        self.name = None
+        self.distance = None
+        self.misses = 0
+        self.tracker = None
+
+    @property
+    def recognized(self):
+        return self.employee_id is not None
+
+
+class FaceTracker:
+    """Carries face boxes and identities between full detection passes.
+
+    Detections are associated with existing tracks by IoU, so a track keeps the
+    identity it was recognized with. Between detections, boxes are moved forward
+    by an optional OpenCV tracker, or simply held in place when none is available.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_misses=3, tracker_type='mil'):
+        if tracker_type and tracker_type not in TRACKER_FACTORIES:
+            raise ValueError(f"Unknown tracker type {tracker_type!r}, expected one of {sorted(TRACKER_FACTORIES)}")
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.tracker_type = tracker_type
+        self.tracks = []
+        self.lost_tracking = False
+        self._ids = itertools.count(1)
+
+    def reset(self):
+        self.tracks = []
+        self.lost_tracking = False
+
+    def _start_tracker(self, track, frame):
+        if not self.tracker_type:
+            return
+        tracker = create_opencv_tracker(self.tracker_type)
+        if tracker is None:
+            print(f"OpenCV tracker '{self.tracker_type}' is not available in this build, "
+                  f"holding boxes in place between detections")
+            self.tracker_type = None
+            return
+        left, top, right, bottom = track.box
+        tracker.init(frame, (left, top, right - left, bottom - top))
+        track.tracker = tracker
+
+    def update(self, boxes, frame):
+        """Associate a fresh set of detections with the existing tracks.
+
+        Returns one Track per detected box, in the same order as ``boxes``.
+        """
+        pairs = sorted(
+            ((box_iou(track.box, box), t, d)
+             for t, track in enumerate(self.tracks)
+             for d, box in enumerate(boxes)),
+            reverse=True
+        )
+        assigned = [None] * len(boxes)
+        used_tracks = set()
+        for iou, t, d in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in used_tracks or assigned[d] is not None:
+                continue
+            used_tracks.add(t)
+            assigned[d] = self.tracks[t]
+
+        kept = []
+        for t, track in enumerate(self.tracks):
+            if t not in used_tracks:
+                track.misses += 1
+                if track.misses <= self.max_misses:
+                    kept.append(track)
+
+        for d, box in enumerate(boxes):
+            track = assigned[d]
+            if track is None:
+                track = Track(next(self._ids), box)
+                assigned[d] = track
+            track.box = box
+            track.misses = 0
+            self._start_tracker(track, frame)
+            kept.append(track)
+
+        self.tracks = kept
+        self.lost_tracking = False
+        return assigned
+
+    def predict(self, frame):
+        """Advance every live track to the current frame without running detection."""
+        for track in self.tracks:
+            if track.misses or track.tracker is None:
+                continue
+            ok, (x, y, w, h) = track.tracker.update(frame)
+            if ok:
+                track.box = (int(x), int(y), int(x + w), int(y + h))
+            else:
+                track.tracker = None
+                self.lost_tracking = True
+        return [track for track in self.tracks if track.misses == 0]
@@ -0,0 +1,112 @@
+import json
+import os
+
+import numpy as np
+from sqlalchemy import func
+
+from models.database import Session, Employee
+from models.encoding import decode_face_encoding, is_encoded
+
+SNAPSHOT_PATH = os.path.join('data', 'gallery_snapshot.npy')
+SNAPSHOT_VERSION = 2
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def gallery_fingerprint(session):
+    """Cheap summary of the employees table used to detect stale snapshots.
+
+    Ids catch inserts and deletes, the newest updated_at catches encodings or
+    names changed in place.
+    """
+    count, max_id, id_sum, updated_at = session.query(
+        func.count(Employee.id), func.max(Employee.id), func.sum(Employee.id), func.max(Employee.updated_at)
+    ).one()
+    return [int(count or 0), int(max_id or 0), int(id_sum or 0), str(updated_at or '')]
+
+
+def load_gallery_arrays(session, dim=128):
+    """Read every encoding with one column-only query into a preallocated matrix.
+
+    Returns (employee_ids, names, encodings, legacy_ids); rows still in the old
+    pickled format are skipped and reported in legacy_ids.
+    """
+    rows = session.query(Employee.id, Employee.name, Employee.face_encoding).all()
+    encodings = np.empty((len(rows), dim), dtype=np.float32)
+    employee_ids = np.empty(len(rows), dtype=np.int64)
+    names = []
+    legacy_ids = []
+    size = 0
+    for employee_id, name, blob in rows:
+        if not is_encoded(blob):
+            legacy_ids.append(employee_id)
+            continue
+        decode_face_encoding(blob, out=encodings[size])
+        employee_ids[size] = employee_id
+        names.append(name)
+        size += 1
+    return employee_ids[:size], names, encodings[:size], legacy_ids
+
+
+def save_gallery_snapshot(gallery, fingerprint, path=SNAPSHOT_PATH):
+    """Write the gallery as a memory-mappable .npy matrix plus a JSON sidecar"""
+    employee_ids, names, encodings = gallery.snapshot()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, encodings)
+    os.replace(tmp_path, path)
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'fingerprint': fingerprint,
+        'employee_ids': employee_ids.tolist(),
+        'names': names,
+    }
+    tmp_meta = f"{_meta_path(path)}.tmp"
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, _meta_path(path))
+
+
+def load_gallery_snapshot(fingerprint, path=SNAPSHOT_PATH):
+    """Memory-map a snapshot if it matches the database, else return None.
+
+    Returns (employee_ids, names, encodings) with encodings as a read-only memmap.
+    """
+    if not (os.path.exists(path) and os.path.exists(_meta_path(path))):
+        return None
+    try:
+        with open(_meta_path(path)) as f:
+            meta = json.load(f)
+        if meta.get('version') != SNAPSHOT_VERSION or meta.get('fingerprint') != fingerprint:
+            return None
+        encodings = np.load(path, mmap_mode='r')
+        if len(encodings) != len(meta['employee_ids']):
+            return None
+        return np.array(meta['employee_ids'], dtype=np.int64), meta['names'], encodings
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Gallery snapshot loading error: {str(e)}")
+        return None
+
+
+def build_gallery_snapshot(path=SNAPSHOT_PATH):
+    """Rebuild the snapshot from the database, e.g. as a deployment step"""
+    from face_gallery import FaceGallery
+
+    session = Session()
+    try:
+        fingerprint = gallery_fingerprint(session)
+        employee_ids, names, encodings, legacy_ids = load_gallery_arrays(session)
+    finally:
+        session.close()
+    if legacy_ids:
+        print(f"Skipped {len(legacy_ids)} pickled encodings, run python -m models.migrations first")
+    gallery = FaceGallery()
+    gallery.load_arrays(employee_ids, names, encodings)
+    save_gallery_snapshot(gallery, fingerprint, path)
+    return len(gallery)
+
+
+if __name__ == '__main__':
+    print(f"Wrote gallery snapshot with {build_gallery_snapshot()} faces to {SNAPSHOT_PATH}")
@@ -0,0 +1,199 @@
+import bisect
+import threading
+import time
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in values]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from a callback at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from ``function`` only when scraped."""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                return [f'{self.name} {_format_value(self._function())}']
+            except Exception as e:
+                print(f"Metric {self.name} collection error: {str(e)}")
+                return []
+        return super()._samples()
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Histogram(_Metric):
+    """Cumulative histogram; observing is a bisect and a few additions."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts plus one overflow slot, then sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][position] += 1
+            state[1] += value
+
+    def time(self, **labels):
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def _samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Holds the process metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'attendance_stage_seconds',
+    'Latency of each recognition, logging and streaming stage',
+    ['stage']))
+FRAMES_PROCESSED = REGISTRY.register(Counter(
+    'attendance_frames_processed_total',
+    'Frames run through process_frame'))
+FRAMES_DROPPED = REGISTRY.register(Counter(
+    'attendance_frames_dropped_total',
+    'Frames skipped by a pipeline stage because a newer one arrived',
+    ['stage']))
+FACES_PER_FRAME = REGISTRY.register(Histogram(
+    'attendance_faces_per_frame',
+    'Faces detected per processed frame',
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16)))
+ATTENDANCE_EVENTS = REGISTRY.register(Counter(
+    'attendance_events_total',
+    'Recognition events by outcome in the attendance writer',
+    ['result']))
+RECOGNITION_CACHE = REGISTRY.register(Counter(
+    'attendance_recognition_cache_total',
+    'Recognition cache lookups by result (hit/miss by descriptor, track_hit/track_miss by track id)',
+    ['result']))
+FACE_QUALITY = REGISTRY.register(Counter(
+    'attendance_face_quality_total',
+    'Faces checked before encoding, by result (passed or rejection reason)',
+    ['result']))
+DB_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'attendance_db_queue_depth',
+    'Recognition events waiting for the attendance writer'))
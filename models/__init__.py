@@ -1,3 +1,5 @@
-from .database import Employee, Attendance, DailyReport, Session, Base
+from .database import Employee, Attendance, DailyReport, RollupState, ArchivedMonth, Session, Base
+from .encoding import encode_face_encoding, decode_face_encoding
 
-__all__ = ['Employee', 'Attendance', 'DailyReport', 'Session', 'Base']
+__all__ = ['Employee', 'Attendance', 'DailyReport', 'RollupState', 'ArchivedMonth', 'Session', 'Base',
+           'encode_face_encoding', 'decode_face_encoding']
@@ -1,13 +1,35 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy import create_engine, event, inspect, text, Column, Index, Integer, String, Text, DateTime, Float, ForeignKey, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker, relationship
+from datetime import datetime
 import os
 
 # Create the database directory if it doesn't exist
 os.makedirs('data', exist_ok=True)
 
-# Initialize database with thread-safe session
-engine = create_engine('sqlite:///data/attendance.db', connect_args={'check_same_thread': False})
+# Connection settings applied to every SQLite connection. WAL lets the report
+# endpoints read while the attendance writer commits, and synchronous=NORMAL
+# is durable across application crashes in WAL mode.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,        # KiB, i.e. 64 MB of page cache
+    'mmap_size': 268435456,      # 256 MB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,        # ms
+}
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+# Initialize database with thread-safe session; ATTENDANCE_DATABASE_URL points
+# tools such as the benchmarks at a different file
+DATABASE_URL = os.environ.get('ATTENDANCE_DATABASE_URL', 'sqlite:///data/attendance.db')
+engine = create_engine(DATABASE_URL, connect_args={'check_same_thread': False})
+event.listen(engine, 'connect', apply_sqlite_pragmas)
 session_factory = sessionmaker(bind=engine)
 Session = scoped_session(session_factory)
 
@@ -18,9 +40,15 @@ class Employee(Base):
     
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
-    face_encoding = Column(String, nullable=False)  # Stored as pickled numpy array
+    face_encoding = Column(LargeBinary, nullable=False)  # float32 bytes, see models/encoding.py
+    # Part of the gallery snapshot fingerprint, so in-place updates invalidate it
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     attendances = relationship('Attendance', back_populates='employee')
     reports = relationship('DailyReport', back_populates='employee')
+    
+    __table_args__ = (
+        Index('ix_employees_name', 'name'),
+    )
 
 class Attendance(Base):
     __tablename__ = 'attendances'
@@ -30,6 +58,10 @@ class Attendance(Base):
     timestamp = Column(DateTime, nullable=False)
     event_type = Column(String(10), nullable=False)  # 'entry' or 'exit'
     employee = relationship('Employee', back_populates='attendances')
+    
+    __table_args__ = (
+        Index('ix_attendances_employee_timestamp', 'employee_id', 'timestamp'),
+    )
 
 class DailyReport(Base):
     __tablename__ = 'daily_reports'
@@ -38,7 +70,59 @@ class DailyReport(Base):
     employee_id = Column(Integer, ForeignKey('employees.id'), nullable=False)
     date = Column(DateTime, nullable=False)
     total_hours = Column(Float, nullable=False)
+    total_seconds = Column(Float, nullable=False, default=0.0)
+    block_count = Column(Integer, nullable=False, default=0)
+    time_blocks = Column(Text)  # JSON list of {entry, exit, duration}
+    updated_at = Column(DateTime)
     employee = relationship('Employee', back_populates='reports')
+    
+    __table_args__ = (
+        Index('ix_daily_reports_employee_date', 'employee_id', 'date'),
+    )
+
+class RollupState(Base):
+    __tablename__ = 'rollup_state'
+    
+    name = Column(String(50), primary_key=True)
+    last_attendance_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+class ArchivedMonth(Base):
+    __tablename__ = 'archived_months'
+    
+    month = Column(String(7), primary_key=True)  # 'YYYY-MM'
+    path = Column(String(255), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
+
+# Columns added after the first release, with the DDL used to add them to
+# databases created before they existed
+ADDED_COLUMNS = {
+    'employees': {
+        'updated_at': 'DATETIME',
+    },
+    'daily_reports': {
+        'total_seconds': 'FLOAT NOT NULL DEFAULT 0',
+        'block_count': 'INTEGER NOT NULL DEFAULT 0',
+        'time_blocks': 'TEXT',
+        'updated_at': 'DATETIME',
+    },
+}
+
+def upgrade_schema(engine):
+    """Add columns and indexes missing from tables created by older versions"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
 
 # Create all tables
 Base.metadata.create_all(engine)
+upgrade_schema(engine)
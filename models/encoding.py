@@ -0,0 +1,32 @@
+import struct
+import numpy as np
+
+# Stored layout: 2-byte magic, format version, pad byte, little-endian uint16
+# dimension, then the descriptor as little-endian float32 values.
+ENCODING_MAGIC = b'FE'
+ENCODING_VERSION = 1
+_HEADER = struct.Struct('<2sBxH')
+
+
+def encode_face_encoding(face_encoding):
+    """Serialize a face descriptor to compact float32 bytes with a header"""
+    values = np.asarray(face_encoding, dtype='<f4').ravel()
+    return _HEADER.pack(ENCODING_MAGIC, ENCODING_VERSION, values.size) + values.tobytes()
+
+
+def is_encoded(blob):
+    return blob is not None and bytes(blob[:2]) == ENCODING_MAGIC
+
+
+def decode_face_encoding(blob, out=None):
+    """Deserialize bytes written by encode_face_encoding, optionally into ``out``"""
+    magic, version, dim = _HEADER.unpack_from(blob)
+    if magic != ENCODING_MAGIC:
+        raise ValueError("Face encoding is not in the binary format; run python -m models.migrations")
+    if version != ENCODING_VERSION:
+        raise ValueError(f"Unsupported face encoding version {version}")
+    values = np.frombuffer(blob, dtype='<f4', count=dim, offset=_HEADER.size)
+    if out is None:
+        return values.astype(np.float32)
+    out[:] = values
+    return out
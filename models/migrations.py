@@ -0,0 +1,42 @@
+import pickle
+
+from .database import Session, Employee, engine, upgrade_schema
+from .encoding import encode_face_encoding, is_encoded
+
+
+def migrate_face_encodings():
+    """Convert legacy pickled face encodings to the binary float32 format.
+
+    Only rows still in the old format are unpickled and rewritten, so running
+    it repeatedly is safe. Returns the number of converted rows.
+    """
+    session = Session()
+    converted = 0
+    try:
+        rows = session.query(Employee.id, Employee.face_encoding).all()
+        for employee_id, blob in rows:
+            if is_encoded(blob):
+                continue
+            face_encoding = pickle.loads(blob)
+            session.query(Employee).filter_by(id=employee_id)\
+                .update({'face_encoding': encode_face_encoding(face_encoding)},
+                        synchronize_session=False)
+            converted += 1
+        session.commit()
+        return converted
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def run_migrations():
+    upgrade_schema(engine)
+    print("Schema columns and indexes are up to date")
+    converted = migrate_face_encodings()
+    print(f"Converted {converted} pickled face encodings")
+
+
+if __name__ == '__main__':
+    run_migrations()
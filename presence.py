@@ -0,0 +1,68 @@
+import threading
+
+from sqlalchemy import func
+
+from models.database import Session, Attendance
+
+
+class PresenceTable:
+    """Authoritative in-process view of each employee's latest attendance event.
+
+    Warmed with one aggregate query and then kept current write-through by the
+    attendance writer, so status lookups never touch the database.
+    """
+
+    def __init__(self, session_factory=Session):
+        self.session_factory = session_factory
+        self._events = {}
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def __len__(self):
+        return len(self._events)
+
+    def warm(self):
+        """Load the latest event of every employee in a single query."""
+        session = self.session_factory()
+        try:
+            latest = session.query(Attendance.employee_id,
+                                   func.max(Attendance.timestamp).label('timestamp'))\
+                .group_by(Attendance.employee_id)\
+                .subquery()
+            rows = session.query(Attendance.employee_id, Attendance.event_type, Attendance.timestamp)\
+                .join(latest, (Attendance.employee_id == latest.c.employee_id)
+                      & (Attendance.timestamp == latest.c.timestamp))\
+                .all()
+            with self._lock:
+                self._events = {employee_id: (event_type, timestamp)
+                                for employee_id, event_type, timestamp in rows}
+                self.warmed = True
+        finally:
+            session.close()
+
+    def last_event(self, employee_id):
+        """Return (event_type, timestamp) of the latest event, or None."""
+        return self._events.get(employee_id)
+
+    def update(self, employee_id, event_type, timestamp):
+        with self._lock:
+            self._events[employee_id] = (event_type, timestamp)
+
+    def clear(self):
+        with self._lock:
+            self._events = {}
+
+    def snapshot(self):
+        """Copy of {employee_id: (event_type, timestamp)} for every employee seen."""
+        with self._lock:
+            return dict(self._events)
+
+    def status(self, employee_id):
+        last = self._events.get(employee_id)
+        if last is None:
+            return {'status': 'unknown', 'last_timestamp': None}
+        event_type, timestamp = last
+        return {
+            'status': event_type,
+            'last_timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S')
+        }
@@ -0,0 +1,100 @@
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+HEARTBEAT_SECONDS = 15.0
+
+
+def format_sse(seq, event, data):
+    return f"id: {seq}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class PresenceEvents:
+    """Fan-out of attendance deltas to Server-Sent Events subscribers.
+
+    The attendance writer publishes each committed entry/exit once; every
+    subscriber gets its own bounded queue so a stalled browser cannot hold up
+    the writer. A short history lets a reconnecting client replay what it
+    missed from its Last-Event-ID; a client that fell too far behind is told
+    to reload the snapshot instead.
+    """
+
+    def __init__(self, history=1024, subscriber_queue=256):
+        self._seq = itertools.count(1)
+        self.last_seq = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._subscriber_queue = subscriber_queue
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def _publish(self, event, data):
+        with self._lock:
+            seq = next(self._seq)
+            self.last_seq = seq
+            message = format_sse(seq, event, data)
+            self._history.append((seq, message))
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # Too slow to keep up; it gets a reset once it catches up
+                    self._subscribers.discard(subscriber)
+                    subscriber.overflowed = True
+            return seq
+
+    def publish_attendance(self, events):
+        """Publish committed (employee_id, event_type, timestamp) tuples"""
+        for employee_id, event_type, timestamp in events:
+            self._publish('presence', {
+                'employee_id': employee_id,
+                'status': event_type,
+                'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            })
+
+    def publish_reset(self, reason):
+        """Tell every client to reload the snapshot, e.g. after employees changed"""
+        self._publish('reset', {'reason': reason})
+
+    def subscribe(self, last_seq=None):
+        subscriber = queue.Queue(maxsize=self._subscriber_queue)
+        subscriber.overflowed = False
+        with self._lock:
+            if last_seq is not None and last_seq < self.last_seq:
+                missed = [message for seq, message in self._history if seq > last_seq]
+                oldest = self._history[0][0] if self._history else self.last_seq + 1
+                if last_seq + 1 < oldest:
+                    missed = [format_sse(self.last_seq, 'reset', {'reason': 'history_expired'})]
+                elif len(missed) > self._subscriber_queue:
+                    # Replaying only the newest would silently lose the rest
+                    missed = [format_sse(self.last_seq, 'reset', {'reason': 'overflow'})]
+                for message in missed:
+                    subscriber.put_nowait(message)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, last_seq=None, heartbeat=HEARTBEAT_SECONDS):
+        """SSE generator for one client, with comment heartbeats to keep proxies open"""
+        subscriber = self.subscribe(last_seq)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if subscriber.overflowed and subscriber.empty():
+                    # The browser reconnects and reloads the snapshot
+                    yield format_sse(self.last_seq, 'reset', {'reason': 'overflow'})
+                    return
+                try:
+                    yield subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
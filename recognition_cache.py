@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import RECOGNITION_CACHE
+
+
+class RecognitionCache:
+    """Short-lived cache of recent recognition decisions.
+
+    Descriptors of a person standing in front of the camera barely move between
+    frames, so a query within ``radius`` of a recently matched descriptor reuses
+    that decision instead of scanning the gallery. Decisions can also be keyed
+    by track id. Entries expire after ``ttl`` seconds, the least recently used
+    entry is evicted when full, and everything is dropped when the gallery
+    version changes. Attendance statuses are cached the same way.
+    """
+
+    def __init__(self, max_entries=64, ttl=2.0, radius=0.3, dim=128):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.radius = radius
+        self._encodings = np.zeros((max_entries, dim), dtype=np.float32)
+        self._expires = np.zeros(max_entries)
+        self._last_used = np.zeros(max_entries)
+        self._results = [None] * max_entries
+        self._tracks = OrderedDict()
+        self._statuses = {}
+        self._gallery_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.track_hits = 0
+        self.track_misses = 0
+
+    def _check_version(self, gallery_version):
+        if gallery_version != self._gallery_version:
+            self._clear()
+            self._gallery_version = gallery_version
+
+    def _clear(self):
+        self._expires[:] = 0.0
+        self._results = [None] * self.max_entries
+        self._tracks.clear()
+        self._statuses.clear()
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+
+    def _count(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+        if hits:
+            RECOGNITION_CACHE.inc(hits, result='hit')
+        if misses:
+            RECOGNITION_CACHE.inc(misses, result='miss')
+
+    def lookup(self, encodings, gallery_version, now=None):
+        """Return a cached (employee_id, name, distance) or None for each encoding."""
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self._encodings.shape[1])
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._check_version(gallery_version)
+            live = np.flatnonzero(self._expires > now)
+            if len(queries) == 0 or len(live) == 0:
+                self._count(0, len(queries))
+                return [None] * len(queries)
+            cached = self._encodings[live]
+            sq_dist = (np.einsum('ij,ij->i', queries, queries)[:, None]
+                       + np.einsum('ij,ij->i', cached, cached)[None, :]
+                       - 2.0 * (queries @ cached.T))
+            nearest = np.argmin(sq_dist, axis=1)
+            results = []
+            for query, column in enumerate(nearest):
+                if sq_dist[query, column] <= self.radius * self.radius:
+                    slot = live[column]
+                    self._last_used[slot] = now
+                    results.append(self._results[slot])
+                else:
+                    results.append(None)
+            hits = sum(result is not None for result in results)
+            self._count(hits, len(results) - hits)
+            return results
+
+    def store(self, encodings, results, gallery_version, now=None):
+        """Remember fresh gallery decisions, evicting expired or least recently used slots."""
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self._encodings.shape[1])
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._check_version(gallery_version)
+            for encoding, result in zip(queries, results):
+                expired = np.flatnonzero(self._expires <= now)
+                slot = expired[0] if len(expired) else int(np.argmin(self._last_used))
+                self._encodings[slot] = encoding
+                self._results[slot] = result
+                self._expires[slot] = now + self.ttl
+                self._last_used[slot] = now
+
+    def get_track(self, track_id, gallery_version, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._check_version(gallery_version)
+            entry = self._tracks.get(track_id)
+            if entry is None or entry[0] <= now:
+                self._tracks.pop(track_id, None)
+                self.track_misses += 1
+                RECOGNITION_CACHE.inc(result='track_miss')
+                return None
+            self._tracks.move_to_end(track_id)
+            self.track_hits += 1
+            RECOGNITION_CACHE.inc(result='track_hit')
+            return entry[1]
+
+    def put_track(self, track_id, result, gallery_version, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._check_version(gallery_version)
+            self._tracks[track_id] = (now + self.ttl, result)
+            self._tracks.move_to_end(track_id)
+            while len(self._tracks) > self.max_entries:
+                self._tracks.popitem(last=False)
+
+    def status(self, employee_id, loader, now=None):
+        """Attendance status of an employee, calling ``loader`` at most once per ttl."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._statuses.get(employee_id)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        status = loader(employee_id)
+        with self._lock:
+            if len(self._statuses) >= self.max_entries:
+                self._statuses = {key: value for key, value in self._statuses.items() if value[0] > now}
+            self._statuses[employee_id] = (now + self.ttl, status)
+        return status
+
+    def metrics(self):
+        with self._lock:
+            now = time.monotonic()
+            total = self.hits + self.misses
+            track_total = self.track_hits + self.track_misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'track_hits': self.track_hits,
+                'track_misses': self.track_misses,
+                'track_hit_rate': self.track_hits / track_total if track_total else 0.0,
+                'entries': int(np.count_nonzero(self._expires > now)),
+                'tracks': len(self._tracks),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+            }
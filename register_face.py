@@ -1,12 +1,14 @@
 import cv2
-import face_recognition
 import numpy as np
 from models.database import Session, Employee
-import pickle
+from models.encoding import encode_face_encoding
+from face_detection import detect_faces, encode_faces, load_face_models
 import time
 
 def register_employee_face():
     print("Starting employee registration...")
+    # Same dlib models as the recognizer, so enrolled and live descriptors match
+    face_detector, shape_predictor, face_encoder = load_face_models()
     cap = cv2.VideoCapture(0)
     
     # Set camera properties for better quality
@@ -27,16 +29,18 @@ def register_employee_face():
             cv2.imshow('Registration', frame)
             
             # Find faces in the frame
-            face_locations = face_recognition.face_locations(frame)
+            face_locations = detect_faces(face_detector, frame)
             
             if face_locations:
                 # Get face encoding
-                face_encoding = face_recognition.face_encodings(frame, face_locations)[0]
-                face_samples.append(face_encoding)
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                face_encoding = encode_faces(shape_predictor, face_encoder, rgb_frame, [face_locations[0]])[0]
+                face_samples.append(np.array(face_encoding))
                 print(f"Sample {len(face_samples)} captured!")
                 
                 # Draw rectangle around face
-                top, right, bottom, left = face_locations[0]
+                rect = face_locations[0]
+                left, top, right, bottom = rect.left(), rect.top(), rect.right(), rect.bottom()
                 cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
                 cv2.imshow('Registration', frame)
                 
@@ -58,7 +62,7 @@ def register_employee_face():
         employee = Employee(
             id=int(employee_id),
             name=name,
-            face_encoding=pickle.dumps(final_encoding)
+            face_encoding=encode_face_encoding(final_encoding)
         )
         session.add(employee)
         session.commit()
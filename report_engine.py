@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+
+from attendance_archive import AttendanceArchive
+from models.database import Session, Attendance
+
+DAY = pd.Timedelta(days=1)
+# An entry whose exit comes later than this is taken as a missed exit and not
+# counted; it also bounds how far past a range events are fetched
+MAX_SESSION = timedelta(hours=16)
+EVENT_COLUMNS = ['id', 'employee_id', 'timestamp', 'event_type']
+
+
+def format_duration(total_seconds):
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    return hours, minutes, f"{int(hours)}h {int(minutes)}m"
+
+
+def build_daily_report(day, total_seconds, time_blocks):
+    hours, minutes, formatted = format_duration(total_seconds)
+    return {
+        'total_hours': hours,
+        'total_minutes': minutes,
+        'formatted_time': formatted,
+        'total_seconds': total_seconds,
+        'time_blocks': time_blocks,
+        'date': day.strftime('%Y-%m-%d')
+    }
+
+
+def build_weekly_report(seconds_per_day, start_date, end_date):
+    """Assemble the weekly response from a {'YYYY-MM-DD': seconds} mapping"""
+    daily_reports = []
+    current_date = day_start(start_date)
+    last_date = day_start(end_date)
+    total_seconds = 0.0
+    while current_date <= last_date:
+        key = current_date.strftime('%Y-%m-%d')
+        seconds = seconds_per_day.get(key, 0.0)
+        total_seconds += seconds
+        hours, minutes, formatted = format_duration(seconds)
+        daily_reports.append({
+            'date': key,
+            'hours': hours,
+            'minutes': minutes,
+            'formatted_time': formatted
+        })
+        current_date += timedelta(days=1)
+
+    _, _, total_formatted = format_duration(total_seconds)
+    return {
+        'total_time': total_formatted,
+        'daily_breakdown': daily_reports
+    }
+
+
+def day_start(value):
+    """Midnight of a 'YYYY-MM-DD' string, date or datetime"""
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d')
+    return datetime(value.year, value.month, value.day)
+
+
+class ReportEngine:
+    """Set-based attendance reports.
+
+    A date range is fetched for one or many employees in a single query, entry
+    and exit events are paired in one vectorized pass, and the resulting
+    intervals are split at midnight so overnight sessions count on both days.
+
+    Pairing is seeded with each employee's last event before the range and
+    sessions longer than max_session are dropped, so a day's total is the same
+    whichever range it is reported in.
+    """
+
+    def __init__(self, session_factory=Session, max_session=MAX_SESSION, archive=None):
+        self.session_factory = session_factory
+        # Archived months are read alongside the live table
+        self.archive = archive if archive is not None else AttendanceArchive(session_factory)
+        self.max_session = max_session
+
+    def fetch_events(self, start, end, employee_ids=None):
+        """Return a DataFrame of employee_id, timestamp, event_type ordered per employee.
+
+        Holds the events in [start, end + max_session) plus each employee's last
+        event before start, which is all pairing needs for sessions overlapping
+        the range.
+        """
+        fetch_end = end + self.max_session
+        session = self.session_factory()
+        try:
+            columns = (Attendance.id, Attendance.employee_id, Attendance.timestamp, Attendance.event_type)
+            query = session.query(*columns)\
+                .filter(Attendance.timestamp >= start)\
+                .filter(Attendance.timestamp < fetch_end)
+            latest = session.query(Attendance.employee_id, func.max(Attendance.timestamp).label('timestamp'))\
+                .filter(Attendance.timestamp < start)
+            if employee_ids is not None:
+                query = query.filter(Attendance.employee_id.in_(list(employee_ids)))
+                latest = latest.filter(Attendance.employee_id.in_(list(employee_ids)))
+            latest = latest.group_by(Attendance.employee_id).subquery()
+            previous = session.query(*columns)\
+                .join(latest, (Attendance.employee_id == latest.c.employee_id)
+                      & (Attendance.timestamp == latest.c.timestamp))
+            rows = previous.all() + query.all()
+        finally:
+            session.close()
+        events = pd.DataFrame(rows, columns=EVENT_COLUMNS)
+        events['timestamp'] = pd.to_datetime(events['timestamp'])
+
+        # Archived months may hold the last event before start, unless it is too
+        # old to pair with anything in the range anyway
+        archived = self.archive.load_events(start - self.max_session, fetch_end, employee_ids)
+        if archived is not None and len(archived):
+            # Each employee's newest event is kept live after archiving, so drop it by id
+            events = pd.concat([archived, events], ignore_index=True).drop_duplicates('id')
+        events = events.sort_values(['employee_id', 'timestamp', 'id'], kind='stable', ignore_index=True)
+        before = events['timestamp'] < start
+        last_before = before & ~before.groupby(events['employee_id']).shift(-1, fill_value=False)
+        events = events[~before | last_before].reset_index(drop=True)
+        return events.drop(columns='id')
+
+    def pair_events(self, events):
+        """Pair each entry with the exit that directly follows it for the same employee.
+
+        Matches the original loop: a repeated entry replaces the pending one and
+        an exit without a pending entry is ignored. Pairs longer than
+        max_session are dropped as a missed exit.
+        """
+        next_type = events.groupby('employee_id')['event_type'].shift(-1)
+        next_time = events.groupby('employee_id')['timestamp'].shift(-1)
+        paired = (events['event_type'] == 'entry') & (next_type == 'exit')
+        paired &= (next_time - events['timestamp']) <= pd.Timedelta(self.max_session)
+        return pd.DataFrame({
+            'employee_id': events.loc[paired, 'employee_id'].to_numpy(),
+            'entry': events.loc[paired, 'timestamp'].to_numpy(),
+            'exit': next_time[paired].to_numpy(),
+        })
+
+    @staticmethod
+    def split_by_day(intervals, start, end):
+        """Clip intervals to [start, end) and split them into one segment per calendar day."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        intervals = intervals.assign(entry=intervals['entry'].clip(lower=start),
+                                     exit=intervals['exit'].clip(upper=end))
+        intervals = intervals[intervals['exit'] > intervals['entry']]
+        if intervals.empty:
+            return intervals.assign(date=pd.Series(dtype='datetime64[ns]'))
+
+        first_day = intervals['entry'].dt.floor('D')
+        # An exit exactly at midnight belongs to the previous day
+        last_day = (intervals['exit'] - pd.Timedelta(microseconds=1)).dt.floor('D')
+        day_counts = ((last_day - first_day) // DAY).astype(int) + 1
+
+        segments = intervals.loc[intervals.index.repeat(day_counts)].reset_index(drop=True)
+        offsets = np.concatenate([np.arange(count) for count in day_counts])
+        segments['date'] = first_day.repeat(day_counts).to_numpy() + pd.to_timedelta(offsets, unit='D')
+        segments['entry'] = segments['entry'].where(segments['entry'] > segments['date'], segments['date'])
+        day_end = segments['date'] + DAY
+        segments['exit'] = segments['exit'].where(segments['exit'] < day_end, day_end)
+        return segments
+
+    def segments(self, start, end, employee_ids=None):
+        events = self.fetch_events(start, end, employee_ids)
+        segments = self.split_by_day(self.pair_events(events), start, end)
+        return segments.assign(seconds=(segments['exit'] - segments['entry']).dt.total_seconds())
+
+    def daily_totals(self, start_date, end_date, employee_ids=None):
+        """Total seconds per employee per day over an inclusive date range.
+
+        Returns a DataFrame indexed by (employee_id, date) with total_seconds and
+        block_count columns; days without attendance are absent.
+        """
+        start = day_start(start_date)
+        end = day_start(end_date) + timedelta(days=1)
+        segments = self.segments(start, end, employee_ids)
+        return segments.groupby(['employee_id', 'date'])['seconds']\
+            .agg(total_seconds='sum', block_count='count')
+
+    @staticmethod
+    def time_blocks(segments):
+        blocks = []
+        for entry, exit_time, date in zip(segments['entry'], segments['exit'], segments['date']):
+            blocks.append({
+                'entry': entry.strftime('%H:%M:%S'),
+                'exit': '24:00:00' if exit_time == date + DAY else exit_time.strftime('%H:%M:%S'),
+                'duration': str((exit_time - entry).to_pytimedelta())
+            })
+        return blocks
+
+    def daily_report(self, employee_id, date):
+        day = day_start(date)
+        segments = self.segments(day, day + timedelta(days=1), [employee_id])
+        return build_daily_report(day, float(segments['seconds'].sum()), self.time_blocks(segments))
+
+    def weekly_report(self, employee_id, start_date, end_date):
+        totals = self.daily_totals(start_date, end_date, [employee_id])
+        seconds_per_day = {date.strftime('%Y-%m-%d'): seconds
+                           for (_, date), seconds in totals['total_seconds'].items()}
+        return build_weekly_report(seconds_per_day, start_date, end_date)
@@ -0,0 +1,107 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import timedelta
+
+from models.database import Session, Employee
+from report_engine import day_start, format_duration
+from report_rollup import ReportRollup
+
+EXPORT_FIELDS = ['employee_id', 'name', 'date', 'total_seconds', 'total_hours', 'formatted_time']
+
+
+def iter_report_rows(rollup, start_date, end_date, employee_ids=None, chunk_size=500,
+                     session_factory=Session):
+    """Yield one row per employee per day, fetching employees in chunks.
+
+    Each chunk costs one employees query and one rollup query, so memory stays
+    flat however many employees or days are exported.
+    """
+    start = day_start(start_date)
+    end = day_start(end_date)
+    days = []
+    current = start
+    while current <= end:
+        days.append(current.strftime('%Y-%m-%d'))
+        current += timedelta(days=1)
+
+    last_id = None
+    while True:
+        session = session_factory()
+        try:
+            query = session.query(Employee.id, Employee.name)
+            if employee_ids is not None:
+                query = query.filter(Employee.id.in_(list(employee_ids)))
+            if last_id is not None:
+                query = query.filter(Employee.id > last_id)
+            employees = query.order_by(Employee.id).limit(chunk_size).all()
+        finally:
+            session.close()
+        if not employees:
+            return
+        last_id = employees[-1][0]
+
+        seconds = rollup.seconds_per_day(start, end, [employee_id for employee_id, _ in employees])
+        for employee_id, name in employees:
+            per_day = seconds.get(employee_id, {})
+            for day in days:
+                total_seconds = per_day.get(day, 0.0)
+                _, _, formatted = format_duration(total_seconds)
+                yield {
+                    'employee_id': employee_id,
+                    'name': name,
+                    'date': day,
+                    'total_seconds': total_seconds,
+                    'total_hours': round(total_seconds / 3600, 2),
+                    'formatted_time': formatted
+                }
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export daily hours for all employees')
+    parser.add_argument('--start', required=True, help='first day, YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='last day, YYYY-MM-DD')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--employee-ids', help='comma-separated employee ids (default: all)')
+    parser.add_argument('--output', help='output file (default: stdout)')
+    args = parser.parse_args()
+
+    employee_ids = ([int(i) for i in args.employee_ids.split(',')] if args.employee_ids else None)
+    serialize, _ = EXPORT_FORMATS[args.format]
+    rows = iter_report_rows(ReportRollup(), args.start, args.end, employee_ids)
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        for line in serialize(rows):
+            output.write(line)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
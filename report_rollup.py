@@ -0,0 +1,171 @@
+import itertools
+import json
+import math
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Attendance, DailyReport, RollupState, engine
+from report_engine import ReportEngine, build_daily_report, build_weekly_report, day_start
+
+ROLLUP_NAME = 'daily_reports'
+
+
+class ReportRollup:
+    """Materializes per-employee daily totals into the daily_reports table.
+
+    A watermark on the attendance id records which events are already rolled up.
+    Each refresh recomputes only the (employee, day) pairs touched by newer
+    events, plus the days a session through them can reach (the report engine's
+    max_session either side). Reports for closed days are then served straight
+    from the rollups.
+    """
+
+    def __init__(self, report_engine=None, session_factory=None):
+        # Own sessions, not the scoped Session: the report engine closes the
+        # thread's scoped session, which would detach the pending RollupState
+        self.session_factory = session_factory or sessionmaker(bind=engine)
+        self.report_engine = report_engine or ReportEngine(self.session_factory)
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Roll up attendance events newer than the watermark; returns days refreshed."""
+        with self._lock:
+            session = self.session_factory()
+            try:
+                state = session.get(RollupState, ROLLUP_NAME)
+                watermark = state.last_attendance_id if state is not None else 0
+                max_id = session.query(func.max(Attendance.id)).scalar() or 0
+                if max_id <= watermark:
+                    return 0
+                touched = session.query(Attendance.employee_id, func.date(Attendance.timestamp))\
+                    .filter(Attendance.id > watermark, Attendance.id <= max_id)\
+                    .distinct().all()
+            finally:
+                session.close()
+
+            # A new event changes the sessions ending or starting at it, and
+            # no counted session is longer than max_session
+            reach = math.ceil(self.report_engine.max_session / timedelta(days=1))
+            days = set()
+            for employee_id, day in touched:
+                day = datetime.strptime(day, '%Y-%m-%d')
+                for offset in range(-reach, reach + 1):
+                    days.add((employee_id, day + timedelta(days=offset)))
+            # Computed outside the write session to keep its transaction short
+            computed = self._compute_days(days)
+
+            session = self.session_factory()
+            try:
+                self._store_days(session, days, computed)
+                state = session.get(RollupState, ROLLUP_NAME)
+                if state is None:
+                    state = RollupState(name=ROLLUP_NAME)
+                    session.add(state)
+                state.last_attendance_id = max_id
+                state.updated_at = datetime.now()
+                session.commit()
+                return len(days)
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+    def _compute_days(self, days):
+        """{(employee_id, day): (total_seconds, time_blocks)} for the requested days"""
+        employee_ids = {employee_id for employee_id, _ in days}
+        start = min(day for _, day in days)
+        end = max(day for _, day in days) + timedelta(days=1)
+        segments = self.report_engine.segments(start, end, employee_ids)\
+            .sort_values(['employee_id', 'date', 'entry'])
+
+        computed = {}
+        rows = zip(segments['employee_id'].tolist(), segments['date'].tolist(),
+                   segments['entry'].tolist(), segments['exit'].tolist(), segments['seconds'].tolist())
+        for (employee_id, day), group in itertools.groupby(rows, key=lambda row: (row[0], row[1])):
+            key = (int(employee_id), day.to_pydatetime())
+            if key not in days:
+                continue
+            group = list(group)
+            blocks = self.report_engine.time_blocks({
+                'entry': [row[2] for row in group],
+                'exit': [row[3] for row in group],
+                'date': [row[1] for row in group],
+            })
+            computed[key] = (float(sum(row[4] for row in group)), blocks)
+        return computed
+
+    def _store_days(self, session, days, computed):
+        employee_ids = {employee_id for employee_id, _ in days}
+        start = min(day for _, day in days)
+        end = max(day for _, day in days) + timedelta(days=1)
+        existing = {
+            (report.employee_id, report.date): report
+            for report in session.query(DailyReport)
+            .filter(DailyReport.employee_id.in_(employee_ids))
+            .filter(DailyReport.date >= start, DailyReport.date < end)
+        }
+        now = datetime.now()
+        for key in days:
+            report = existing.get(key)
+            if key not in computed:
+                if report is not None:
+                    session.delete(report)
+                continue
+            if report is None:
+                report = DailyReport(employee_id=key[0], date=key[1])
+                session.add(report)
+            total_seconds, blocks = computed[key]
+            report.total_seconds = total_seconds
+            report.total_hours = total_seconds / 3600
+            report.block_count = len(blocks)
+            report.time_blocks = json.dumps(blocks)
+            report.updated_at = now
+
+    def daily_report(self, employee_id, date):
+        day = day_start(date)
+        if day >= day_start(datetime.now()):
+            # Today is still open, compute it from the raw events
+            return self.report_engine.daily_report(employee_id, day)
+        self.refresh()
+        session = self.session_factory()
+        try:
+            report = session.query(DailyReport.total_seconds, DailyReport.time_blocks)\
+                .filter_by(employee_id=employee_id, date=day).first()
+        finally:
+            session.close()
+        if report is None:
+            return build_daily_report(day, 0.0, [])
+        return build_daily_report(day, report.total_seconds, json.loads(report.time_blocks or '[]'))
+
+    def seconds_per_day(self, start_date, end_date, employee_ids=None):
+        """{employee_id: {'YYYY-MM-DD': seconds}} from rollups, with today computed live."""
+        start = day_start(start_date)
+        end = day_start(end_date) + timedelta(days=1)
+        today = day_start(datetime.now())
+        self.refresh()
+        session = self.session_factory()
+        try:
+            query = session.query(DailyReport.employee_id, DailyReport.date, DailyReport.total_seconds)\
+                .filter(DailyReport.date >= start, DailyReport.date < min(end, today))
+            if employee_ids is not None:
+                query = query.filter(DailyReport.employee_id.in_(list(employee_ids)))
+            rows = query.all()
+        finally:
+            session.close()
+
+        result = {}
+        for employee_id, day, seconds in rows:
+            result.setdefault(employee_id, {})[day.strftime('%Y-%m-%d')] = seconds
+        if start <= today < end:
+            live = self.report_engine.daily_totals(today, today, employee_ids)
+            for (employee_id, day), seconds in live['total_seconds'].items():
+                result.setdefault(int(employee_id), {})[day.strftime('%Y-%m-%d')] = float(seconds)
+        return result
+
+    def weekly_report(self, employee_id, start_date, end_date):
+        seconds_per_day = self.seconds_per_day(start_date, end_date, [employee_id]).get(employee_id, {})
+        return build_weekly_report(seconds_per_day, start_date, end_date)
@@ -3,7 +3,6 @@ document.addEventListener('DOMContentLoaded', function() {
     updateClock();
     setInterval(updateClock, 1000);
     listUsers();
-    setInterval(listUsers, 30000);
 });
 
 function startVideoFeed() {
@@ -21,45 +20,81 @@ function updateClock() {
     clockElement.textContent = `${dateString} ${timeString}`;
 }
 
+let presenceSource = null;
+
 function listUsers() {
-    fetch('/users')
+    // Compact snapshot once, then live deltas over Server-Sent Events
+    fetch('/presence')
         .then(response => response.json())
         .then(data => {
             if (data.status === 'success') {
-                const userList = document.getElementById('userList');
-                let html = `
-                    <div class="user-list-container">
-                        <h3>Registered Users</h3>
-                        <table class="report-table">
-                            <thead>
-                                <tr>
-                                    <th>ID</th>
-                                    <th>Name</th>
-                                    <th>Current Status</th>
-                                    <th>Last Update</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                `;
-                
-                data.users.forEach(user => {
-                    html += `
-                        <tr>
-                            <td>${user.id}</td>
-                            <td>${user.name}</td>
-                            <td class="status-${user.status.status}">${user.status.status}</td>
-                            <td>${user.status.last_timestamp || 'N/A'}</td>
-                        </tr>
-                    `;
-                });
-                
-                html += '</tbody></table></div>';
-                userList.innerHTML = html;
+                renderUserTable(data.data);
+                subscribePresence(data.data.seq);
             }
         })
         .catch(error => showAlert('Error fetching users: ' + error, 'error'));
 }
 
+function renderUserTable(snapshot) {
+    const userList = document.getElementById('userList');
+    let html = `
+        <div class="user-list-container">
+            <h3>Registered Users</h3>
+            <table class="report-table">
+                <thead>
+                    <tr>
+                        <th>ID</th>
+                        <th>Name</th>
+                        <th>Current Status</th>
+                        <th>Last Update</th>
+                    </tr>
+                </thead>
+                <tbody>
+    `;
+    
+    snapshot.employees.forEach(([id, name, status, lastTimestamp]) => {
+        html += `
+            <tr id="user-row-${id}">
+                <td>${id}</td>
+                <td>${name}</td>
+                <td class="status-${status}">${status}</td>
+                <td>${lastTimestamp || 'N/A'}</td>
+            </tr>
+        `;
+    });
+    
+    html += '</tbody></table></div>';
+    userList.innerHTML = html;
+}
+
+function subscribePresence(seq) {
+    if (!window.EventSource) {
+        if (!presenceSource) {
+            presenceSource = setInterval(listUsers, 30000);
+        }
+        return;
+    }
+    if (presenceSource) {
+        presenceSource.close();
+    }
+    presenceSource = new EventSource(`/presence/stream?since=${seq}`);
+    presenceSource.addEventListener('presence', event => updateUserRow(JSON.parse(event.data)));
+    presenceSource.addEventListener('reset', () => listUsers());
+}
+
+function updateUserRow(update) {
+    const row = document.getElementById(`user-row-${update.employee_id}`);
+    if (!row) {
+        // Someone not in the table yet, reload the snapshot
+        listUsers();
+        return;
+    }
+    const statusCell = row.children[2];
+    statusCell.className = `status-${update.status}`;
+    statusCell.textContent = update.status;
+    row.children[3].textContent = update.timestamp;
+}
+
 function deleteAllUsers() {
     if (confirm('Are you sure you want to delete all users? This action cannot be undone.')) {
         fetch('/users/delete-all', {
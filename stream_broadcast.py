@@ -0,0 +1,72 @@
+import threading
+
+from video_pipeline import DEFAULT_PROFILE
+
+
+class BroadcastStream:
+    """Process-wide MJPEG producer shared by every viewer.
+
+    The underlying FramePipeline owns the only camera handle. It is reference
+    counted: the first subscriber starts it and the last one to leave stops it.
+    Subscribers asking for the same stream profile receive the same immutable
+    bytes object for each frame, so fan-out costs one encode per profile.
+    """
+
+    def __init__(self, pipeline_factory):
+        self.pipeline_factory = pipeline_factory
+        self.pipeline = None
+        self._subscribers = 0
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self):
+        return self._subscribers
+
+    def acquire(self):
+        """Take a reference on the producer, starting it if needed; returns the pipeline or None."""
+        with self._lock:
+            if self.pipeline is not None and not self.pipeline.running:
+                # Stopped on its own, e.g. a camera read failure: its viewers are
+                # leaving and their references die with it
+                self.pipeline.stop()
+                self.pipeline = None
+                self._subscribers = 0
+            if self.pipeline is None:
+                pipeline = self.pipeline_factory()
+                if not pipeline.start():
+                    return None
+                self.pipeline = pipeline
+            self._subscribers += 1
+            return self.pipeline
+
+    def release(self, pipeline):
+        """Drop a reference taken by acquire() on pipeline."""
+        with self._lock:
+            if pipeline is not self.pipeline:
+                # That producer already died and was replaced
+                return
+            self._subscribers = max(0, self._subscribers - 1)
+            if self._subscribers == 0:
+                self.pipeline.stop()
+                self.pipeline = None
+
+    def stream(self, profile=DEFAULT_PROFILE):
+        """Generator of multipart JPEG parts for one viewer."""
+        pipeline = self.acquire()
+        if pipeline is None:
+            return
+        try:
+            yield from pipeline.mjpeg_parts(profile)
+        finally:
+            self.release(pipeline)
+
+    def metrics(self):
+        with self._lock:
+            pipeline = self.pipeline
+            subscribers = self._subscribers
+        return {
+            'subscribers': subscribers,
+            'running': pipeline is not None and pipeline.running,
+            'stages': pipeline.metrics() if pipeline is not None else {},
+            'profiles': pipeline.profiles() if pipeline is not None else [],
+        }
@@ -0,0 +1,50 @@
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# models.database binds its engine at import time; keep the suite away from
+# data/attendance.db before any module under test imports it
+_scratch = tempfile.mkdtemp(prefix='attendance-tests-')
+os.environ.setdefault('ATTENDANCE_DATABASE_URL', f"sqlite:///{os.path.join(_scratch, 'attendance.db')}")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, Attendance, Employee, apply_sqlite_pragmas
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Plain sessionmaker bound to a fresh database file"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'attendance.db'}",
+                           connect_args={'check_same_thread': False})
+    event.listen(engine, 'connect', apply_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def employees(session_factory):
+    """Three enrolled employees, ids 1-3"""
+    session = session_factory()
+    session.add_all([Employee(id=employee_id, name=f'Employee {employee_id}', face_encoding=b'')
+                     for employee_id in (1, 2, 3)])
+    session.commit()
+    session.close()
+    return [1, 2, 3]
+
+
+@pytest.fixture
+def add_events(session_factory):
+    """Insert (employee_id, event_type, 'YYYY-MM-DD HH:MM') attendance rows"""
+    def add(events):
+        session = session_factory()
+        session.add_all([Attendance(employee_id=employee_id, event_type=event_type,
+                                    timestamp=datetime.strptime(timestamp, '%Y-%m-%d %H:%M'))
+                         for employee_id, event_type, timestamp in events])
+        session.commit()
+        session.close()
+    return add
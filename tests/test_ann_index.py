@@ -0,0 +1,61 @@
+import numpy as np
+
+from ann_index import IVFIndex, measure_recall
+from face_gallery import FaceGallery
+
+
+def clustered_encodings(count, seed=0, dim=128, noise=0.02):
+    rng = np.random.default_rng(seed)
+    encodings = rng.normal(size=(count, dim)).astype(np.float32)
+    encodings /= np.linalg.norm(encodings, axis=1, keepdims=True)
+    picked = rng.choice(count, 100, replace=False)
+    queries = encodings[picked] + rng.normal(scale=noise, size=(100, dim)).astype(np.float32)
+    return encodings, queries
+
+
+def test_recall_against_brute_force():
+    encodings, queries = clustered_encodings(2000)
+    ids = np.arange(1, 2001)
+    index = IVFIndex(n_probe=8)
+    index.train(encodings, ids)
+    assert measure_recall(index, encodings, ids, queries) >= 0.95
+
+
+def test_probing_every_list_is_exact():
+    encodings, _ = clustered_encodings(500)
+    queries = np.random.default_rng(3).normal(size=(50, 128)).astype(np.float32)
+    ids = np.arange(1, 501)
+    index = IVFIndex(n_lists=16)
+    index.train(encodings, ids)
+    assert measure_recall(index, encodings, ids, queries, n_probe=16) == 1.0
+
+
+def test_add_and_remove_after_training():
+    encodings, _ = clustered_encodings(300)
+    index = IVFIndex(n_lists=8, n_probe=8)
+    index.train(encodings[:-1], np.arange(1, 300))
+    index.add(300, encodings[-1])
+    assert index.search(encodings[[-1]])[0][0] == 300
+    assert index.remove(300) and 300 not in index
+    assert index.search(encodings[[-1]])[0][0] != 300
+
+
+def test_save_and_load_round_trip(tmp_path):
+    encodings, queries = clustered_encodings(400)
+    index = IVFIndex(n_lists=12)
+    index.train(encodings, np.arange(1, 401))
+    path = str(tmp_path / 'index.npz')
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    np.testing.assert_array_equal(loaded.search(queries)[0], index.search(queries)[0])
+
+
+def test_gallery_with_index_matches_brute_force_gallery():
+    encodings, queries = clustered_encodings(1000)
+    ids = np.arange(1, 1001)
+    brute = FaceGallery.from_arrays(ids, [str(i) for i in ids], encodings)
+    indexed = FaceGallery.from_arrays(ids, [str(i) for i in ids], encodings)
+    assert indexed.attach_index(IVFIndex(n_probe=8))
+    expected = [employee_id for employee_id, _, _ in brute.match(queries)]
+    found = [employee_id for employee_id, _, _ in indexed.match(queries)]
+    assert np.mean(np.array(found) == np.array(expected)) >= 0.95
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pandas as pd
+
+from attendance_archive import AttendanceArchive
+from models.database import Attendance, ArchivedMonth
+from report_engine import ReportEngine
+from report_rollup import ReportRollup
+
+AUGUST = datetime(2024, 8, 1)
+SEPTEMBER = datetime(2024, 9, 1)
+
+EVENTS = [
+    (1, 'entry', '2024-08-05 09:00'), (1, 'exit', '2024-08-05 17:00'),
+    (2, 'entry', '2024-08-20 08:00'), (2, 'exit', '2024-08-20 16:30'),
+    # Overnight shift across the archived month boundary
+    (1, 'entry', '2024-08-31 22:00'), (1, 'exit', '2024-09-01 06:00'),
+    (1, 'entry', '2024-09-02 09:00'), (1, 'exit', '2024-09-02 12:00'),
+]
+
+
+def live_rows(session_factory):
+    session = session_factory()
+    try:
+        return [(row.id, row.employee_id, row.timestamp, row.event_type)
+                for row in session.query(Attendance).order_by(Attendance.id)]
+    finally:
+        session.close()
+
+
+def reports(engine, employee_ids):
+    days = pd.date_range('2024-08-01', '2024-09-03')
+    return {employee_id: ([engine.daily_report(employee_id, day) for day in days],
+                          engine.weekly_report(employee_id, days[0], days[-1]))
+            for employee_id in employee_ids}
+
+
+def test_archive_round_trip(session_factory, employees, tmp_path, add_events):
+    add_events(EVENTS)
+    archive = AttendanceArchive(session_factory, archive_dir=str(tmp_path / 'archive'))
+    engine = ReportEngine(session_factory, archive=archive)
+    rollup = ReportRollup(engine, session_factory)
+    original = live_rows(session_factory)
+    before = reports(engine, employees)
+
+    deleted = archive_august(archive, rollup)
+
+    august = [row for row in original if row[2] < SEPTEMBER]
+    loaded = archive.load_events(AUGUST, SEPTEMBER).sort_values('id')
+    assert list(loaded.itertuples(index=False, name=None)) == august
+    # Employee 2's newest event stays live for the presence table and toggle
+    remaining = live_rows(session_factory)
+    assert [row for row in remaining if row[2] < SEPTEMBER] == [original[3]]
+    assert deleted == len(august) - 1
+    assert reports(engine, employees) == before
+
+
+def test_late_events_are_merged_into_an_archived_month(session_factory, employees, tmp_path, add_events):
+    add_events(EVENTS)
+    archive = AttendanceArchive(session_factory, archive_dir=str(tmp_path / 'archive'))
+    rollup = ReportRollup(ReportEngine(session_factory, archive=archive), session_factory)
+    archive_august(archive, rollup)
+    assert archive_august(archive, rollup) == 0
+
+    # e.g. a footage backfill after the month was archived
+    session = session_factory()
+    session.add(Attendance(employee_id=3, event_type='entry', timestamp=datetime(2024, 8, 12, 9, 0)))
+    session.commit()
+    session.close()
+    archive_august(archive, rollup)
+
+    session = session_factory()
+    record = session.get(ArchivedMonth, '2024-08')
+    session.close()
+    assert record.row_count == 6
+    assert len(archive.load_events(AUGUST, SEPTEMBER)) == 6
+
+
+def archive_august(archive, rollup):
+    return archive.archive_month(AUGUST, rollup)
+
+
+def test_closed_months_skip_months_without_archivable_rows(session_factory, employees, tmp_path, add_events):
+    add_events(EVENTS)
+    archive = AttendanceArchive(session_factory, archive_dir=str(tmp_path / 'archive'))
+    rollup = ReportRollup(ReportEngine(session_factory, archive=archive), session_factory)
+    now = datetime(2025, 3, 15)
+    assert archive.closed_months(keep_months=3, now=now) == [AUGUST, SEPTEMBER]
+    assert archive.closed_months(keep_months=6, now=now) == [AUGUST]
+
+    archive_august(archive, rollup)
+    # Only employee 2's newest event is left in August, and it stays live
+    assert archive.closed_months(keep_months=3, now=now) == [SEPTEMBER]
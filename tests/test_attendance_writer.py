@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+from attendance_writer import AttendanceWriter
+from models.database import Attendance
+from presence import PresenceTable
+from presence_events import PresenceEvents
+
+START = datetime(2026, 9, 1, 9, 0)
+
+
+def written_events(session_factory):
+    session = session_factory()
+    try:
+        return [(row.employee_id, row.event_type, row.timestamp)
+                for row in session.query(Attendance).order_by(Attendance.timestamp, Attendance.id)]
+    finally:
+        session.close()
+
+
+def run_writer(writer, events):
+    writer.start()
+    for employee_id, seconds in events:
+        assert writer.submit(employee_id, START + timedelta(seconds=seconds))
+    writer.stop()
+
+
+def test_toggles_entry_and_exit(session_factory, employees):
+    writer = AttendanceWriter(session_factory, flush_interval=0.05)
+    run_writer(writer, [(1, 0), (1, 60), (1, 120), (2, 30)])
+    assert written_events(session_factory) == [
+        (1, 'entry', START),
+        (2, 'entry', START + timedelta(seconds=30)),
+        (1, 'exit', START + timedelta(seconds=60)),
+        (1, 'entry', START + timedelta(seconds=120)),
+    ]
+
+
+def test_debounces_repeated_recognitions(session_factory, employees):
+    writer = AttendanceWriter(session_factory, flush_interval=0.05, debounce_seconds=30)
+    run_writer(writer, [(1, 0), (1, 5), (1, 29), (1, 31)])
+    assert [event_type for _, event_type, _ in written_events(session_factory)] == ['entry', 'exit']
+    assert writer.metrics()['debounced'] == 2
+
+
+def test_out_of_order_batch_is_applied_in_time_order(session_factory, employees):
+    writer = AttendanceWriter(session_factory, flush_interval=0.5, batch_size=64)
+    run_writer(writer, [(1, 100), (1, 0)])
+    assert written_events(session_factory) == [
+        (1, 'entry', START),
+        (1, 'exit', START + timedelta(seconds=100)),
+    ]
+
+
+def test_toggle_continues_from_existing_rows(session_factory, employees):
+    session = session_factory()
+    session.add(Attendance(employee_id=1, event_type='entry', timestamp=START - timedelta(hours=1)))
+    session.commit()
+    session.close()
+
+    writer = AttendanceWriter(session_factory, flush_interval=0.05)
+    run_writer(writer, [(1, 0)])
+    assert written_events(session_factory)[-1] == (1, 'exit', START)
+
+
+def test_presence_follows_committed_events(session_factory, employees):
+    presence = PresenceTable(session_factory)
+    writer = AttendanceWriter(session_factory, presence=presence, flush_interval=0.05)
+    run_writer(writer, [(1, 0), (2, 0), (2, 60)])
+    assert presence.status(1) == {'status': 'entry', 'last_timestamp': '2026-09-01 09:00:00'}
+    assert presence.status(2)['status'] == 'exit'
+    assert presence.status(3) == {'status': 'unknown', 'last_timestamp': None}
+
+    rewarmed = PresenceTable(session_factory)
+    rewarmed.warm()
+    assert rewarmed.snapshot() == presence.snapshot()
+
+
+def test_presence_deltas_are_published_after_commit(session_factory, employees):
+    events = PresenceEvents()
+    subscriber = events.subscribe()
+    writer = AttendanceWriter(session_factory, flush_interval=0.05, events=events)
+    run_writer(writer, [(1, 0), (1, 10), (1, 60)])
+
+    messages = []
+    while not subscriber.empty():
+        messages.append(subscriber.get_nowait())
+    assert len(messages) == 2
+    assert 'event: presence' in messages[0] and '"status":"entry"' in messages[0]
+    assert '"status":"exit"' in messages[1]
+    assert events.last_seq == 2
+
+
+def test_reset_forgets_presence(session_factory, employees):
+    presence = PresenceTable(session_factory)
+    writer = AttendanceWriter(session_factory, presence=presence, flush_interval=0.05)
+    run_writer(writer, [(1, 0)])
+    writer.reset()
+    assert presence.last_event(1) is None
@@ -0,0 +1,59 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+from camera_workers import DONE, FRAMES, CameraWorkerPool
+from face_quality import FaceQualityFilter
+
+
+class FakeProcess:
+    def is_alive(self):
+        return True
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, employee_id, timestamp=None):
+        self.submitted.append((employee_id, timestamp))
+        return True
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_progress_reports_reach_metrics_while_workers_run():
+    writer = RecordingWriter()
+    pool = CameraWorkerPool([], gallery=None, attendance_writer=writer)
+    pool._events = queue.Queue()
+    pool._processes = [FakeProcess()]
+    pool.started_at = time.perf_counter() - 2.0
+    seen_at = datetime(2026, 9, 1, 9, 0)
+    collector = threading.Thread(target=pool._collect, daemon=True)
+    collector.start()
+
+    pool._events.put(('door', FRAMES, 40))
+    pool._events.put(('door', 7, seen_at))
+    wait_for(lambda: writer.submitted)
+    metrics = pool.metrics()
+    assert metrics['frames_processed'] == {'door': 40}
+    assert metrics['recognitions'] == {'door': 1}
+    assert metrics['fps'] > 0
+    assert writer.submitted == [(7, seen_at)]
+    assert collector.is_alive()
+
+    pool._events.put(('door', DONE, 50))
+    collector.join(2.0)
+    assert not collector.is_alive()
+    assert pool.metrics()['frames_processed'] == {'door': 50}
+
+
+def test_quality_thresholds_rebuild_the_same_filter():
+    quality_filter = FaceQualityFilter(min_size=80, max_yaw=None)
+    assert FaceQualityFilter(**quality_filter.thresholds).thresholds == quality_filter.thresholds
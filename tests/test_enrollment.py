@@ -0,0 +1,104 @@
+import pickle
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip('dlib')
+
+import attendance_system
+import enrollment
+import face_detection
+from attendance_system import AttendanceSystem
+from gallery_snapshot import gallery_fingerprint, load_gallery_snapshot
+from models.database import Session, Employee
+from tests.test_face_quality import Rect
+
+
+class PassingFilter:
+    def check_box(self, frame, rect):
+        return None
+
+    def check_pose(self, shape):
+        return None
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    # The gallery snapshot and ANN index are written under ./data
+    monkeypatch.chdir(tmp_path)
+    system = AttendanceSystem()
+    system._models = (None, None, None)
+    yield system
+    system.close()
+
+
+def test_encode_photo_holds_the_models_lock(tmp_path, monkeypatch):
+    path = str(tmp_path / 'face.jpg')
+    cv2.imwrite(path, np.full((200, 200, 3), 128, dtype=np.uint8))
+    lock = threading.Lock()
+    calls = []
+
+    def landmarks(shape_predictor, rgb_image, face_locations):
+        calls.append(('landmarks', lock.locked()))
+        return ['shape']
+
+    def descriptors(face_encoder, rgb_images, shapes):
+        calls.append(('descriptors', lock.locked()))
+        return [[np.zeros(128)]]
+
+    monkeypatch.setattr(face_detection, 'detect_faces', lambda *args, **kwargs: [Rect(20, 20, 180, 180)])
+    monkeypatch.setattr(face_detection, 'face_landmarks', landmarks)
+    monkeypatch.setattr(face_detection, 'compute_descriptors', descriptors)
+    _, descriptor, reason = enrollment.encode_photo(path, (None, None, None), PassingFilter(), lock)
+
+    assert reason is None and descriptor.shape == (128,)
+    assert calls == [('landmarks', True), ('descriptors', True)]
+
+
+def test_enrollment_and_pipeline_share_the_models_lock(system, tmp_path, monkeypatch):
+    folder = tmp_path / 'photos' / '7_Ada'
+    folder.mkdir(parents=True)
+    (folder / 'front.jpg').write_bytes(b'')
+    locks = []
+
+    def enroll_people(people, **kwargs):
+        locks.append(kwargs['models_lock'])
+        return {'enrolled': [], 'rejected': {}, 'skipped': {}}
+
+    monkeypatch.setattr(attendance_system, 'enroll_people', enroll_people)
+    system.enroll_photos(root=str(tmp_path / 'photos'))
+    system.register_employee('Ada', 7, root=str(tmp_path / 'photos'))
+    assert locks == [system.models_lock, system.models_lock]
+
+    held = []
+    monkeypatch.setattr(attendance_system, 'face_landmarks',
+                        lambda shape_predictor, rgb_frame, rects: held.append(system.models_lock.locked()) or [])
+    system.quality_filter = PassingFilter()
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    system._recognizable_faces(frame, frame, [Rect(10, 10, 90, 90)])
+    assert held == [True]
+
+
+def test_snapshot_written_after_a_legacy_migration_matches(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    session = Session()
+    session.add(Employee(id=41, name='Legacy', face_encoding=pickle.dumps(np.ones(128))))
+    session.commit()
+    session.close()
+    try:
+        system = AttendanceSystem()
+        system.close()
+        session = Session()
+        try:
+            fingerprint = gallery_fingerprint(session)
+        finally:
+            session.close()
+        employee_ids, names, _ = load_gallery_snapshot(fingerprint)
+        assert employee_ids.tolist() == [41] and names == ['Legacy']
+    finally:
+        session = Session()
+        session.query(Employee).delete()
+        session.commit()
+        session.close()
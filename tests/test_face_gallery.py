@@ -0,0 +1,97 @@
+import numpy as np
+
+from face_gallery import FaceGallery
+
+
+def random_encodings(count, seed=0, dim=128):
+    rng = np.random.default_rng(seed)
+    encodings = rng.normal(size=(count, dim)).astype(np.float32)
+    return encodings / np.linalg.norm(encodings, axis=1, keepdims=True)
+
+
+def test_match_returns_nearest_employee_within_tolerance():
+    encodings = random_encodings(20)
+    gallery = FaceGallery(tolerance=0.6)
+    for employee_id, encoding in enumerate(encodings, start=1):
+        gallery.add(employee_id, f'Employee {employee_id}', encoding)
+
+    queries = encodings[[3, 11]] + 0.01
+    (first_id, first_name, first_distance), (second_id, _, _) = gallery.match(queries)
+    assert (first_id, first_name, second_id) == (4, 'Employee 4', 12)
+    assert first_distance < 0.6
+
+
+def test_match_matches_brute_force_distances():
+    encodings = random_encodings(50)
+    gallery = FaceGallery(tolerance=10.0)
+    gallery.load_arrays(np.arange(1, 51), [str(i) for i in range(1, 51)], encodings)
+    queries = random_encodings(8, seed=1)
+
+    expected = np.linalg.norm(queries[:, None, :] - encodings[None, :, :], axis=2)
+    results = gallery.match(queries)
+    assert [employee_id for employee_id, _, _ in results] == list(expected.argmin(axis=1) + 1)
+    np.testing.assert_allclose([distance for _, _, distance in results], expected.min(axis=1), rtol=1e-4)
+
+
+def test_match_rejects_faces_beyond_tolerance():
+    gallery = FaceGallery(tolerance=0.6)
+    gallery.add(1, 'Employee 1', random_encodings(1)[0])
+    [(employee_id, name, distance)] = gallery.match(random_encodings(1, seed=5))
+    assert employee_id is None and name is None and distance > 0.6
+
+
+def test_empty_gallery_matches_nobody():
+    assert FaceGallery().match(random_encodings(2)) == [(None, None, float('inf'))] * 2
+    assert FaceGallery().match([]) == []
+
+
+def test_add_replaces_existing_employee():
+    first, second = random_encodings(2)
+    gallery = FaceGallery()
+    gallery.add(7, 'Old name', first)
+    gallery.add(7, 'New name', second)
+    assert len(gallery) == 1
+    assert gallery.match([second])[0][:2] == (7, 'New name')
+
+
+def test_add_grows_past_initial_capacity():
+    encodings = random_encodings(10)
+    gallery = FaceGallery(capacity=2)
+    for employee_id, encoding in enumerate(encodings, start=1):
+        gallery.add(employee_id, str(employee_id), encoding)
+    assert len(gallery) == 10
+    assert [employee_id for employee_id, _, _ in gallery.match(encodings)] == list(range(1, 11))
+
+
+def test_remove_moves_last_row_into_the_gap():
+    encodings = random_encodings(3)
+    gallery = FaceGallery()
+    for employee_id, encoding in enumerate(encodings, start=1):
+        gallery.add(employee_id, f'Employee {employee_id}', encoding)
+
+    assert gallery.remove(1)
+    assert not gallery.remove(1)
+    assert len(gallery) == 2 and 1 not in gallery
+    assert gallery.match(encodings[[2]])[0][:2] == (3, 'Employee 3')
+    assert gallery.match(encodings[[0]])[0][0] != 1
+
+
+def test_read_only_arrays_are_copied_on_write():
+    encodings = random_encodings(3)
+    encodings.flags.writeable = False
+    gallery = FaceGallery.from_arrays([1, 2, 3], ['a', 'b', 'c'], encodings)
+    gallery.remove(2)
+    gallery.add(4, 'd', random_encodings(1, seed=9)[0])
+    assert len(gallery) == 3 and 2 not in gallery and 4 in gallery
+
+
+def test_version_changes_on_every_mutation():
+    gallery = FaceGallery()
+    versions = [gallery.version]
+    gallery.add(1, 'a', random_encodings(1)[0])
+    versions.append(gallery.version)
+    gallery.remove(1)
+    versions.append(gallery.version)
+    gallery.clear()
+    versions.append(gallery.version)
+    assert len(set(versions)) == 4
@@ -0,0 +1,65 @@
+import numpy as np
+
+from face_quality import FaceQualityFilter
+
+
+class Rect:
+    """Stand-in for dlib.rectangle"""
+
+    def __init__(self, left, top, right, bottom):
+        self._box = (left, top, right, bottom)
+
+    def left(self):
+        return self._box[0]
+
+    def top(self):
+        return self._box[1]
+
+    def right(self):
+        return self._box[2]
+
+    def bottom(self):
+        return self._box[3]
+
+    def width(self):
+        return self._box[2] - self._box[0]
+
+    def height(self):
+        return self._box[3] - self._box[1]
+
+
+def textured_frame(brightness=128, seed=0):
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(-60, 60, size=(240, 320, 3))
+    return np.clip(brightness + noise, 0, 255).astype(np.uint8)
+
+
+def test_sharp_well_lit_face_passes():
+    assert FaceQualityFilter().check_box(textured_frame(), Rect(100, 60, 200, 160)) is None
+
+
+def test_box_rejections():
+    quality_filter = FaceQualityFilter()
+    face = Rect(100, 60, 200, 160)
+    assert quality_filter.check_box(textured_frame(), Rect(100, 60, 130, 90)) == 'face_too_small'
+    assert quality_filter.check_box(np.full((240, 320, 3), 15, np.uint8), face) == 'too_dark'
+    assert quality_filter.check_box(np.full((240, 320, 3), 245, np.uint8), face) == 'too_bright'
+    assert quality_filter.check_box(np.full((240, 320, 3), 128, np.uint8), face) == 'blurry'
+    assert quality_filter.stats()['rejected'] == {
+        'face_too_small': 1, 'too_dark': 1, 'too_bright': 1, 'blurry': 1}
+
+
+def test_enrollment_thresholds_are_stricter():
+    frame = textured_frame()
+    face = Rect(100, 60, 170, 130)
+    assert FaceQualityFilter().check_box(frame, face) is None
+    assert FaceQualityFilter(min_size=80, min_sharpness=60.0).check_box(frame, face) == 'face_too_small'
+
+
+def test_disabled_checks_are_skipped():
+    quality_filter = FaceQualityFilter(min_size=None, min_brightness=None, min_sharpness=None)
+    assert quality_filter.check_box(np.zeros((240, 320, 3), np.uint8), Rect(0, 0, 10, 10)) is None
+
+
+def test_box_outside_the_frame_is_rejected():
+    assert FaceQualityFilter().check_box(textured_frame(), Rect(400, 300, 500, 400)) == 'face_too_small'
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import face_tracker
+from face_tracker import FaceTracker, box_iou
+
+
+def blank_frame():
+    return np.zeros((240, 320, 3), dtype=np.uint8)
+
+
+def test_box_iou():
+    assert box_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert box_iou((0, 0, 10, 10), (5, 0, 15, 10)) == pytest.approx(50 / 150)
+    assert box_iou((0, 0, 10, 10), (20, 20, 30, 30)) == 0.0
+
+
+def test_detections_keep_the_identity_of_overlapping_tracks():
+    tracker = FaceTracker(tracker_type=None)
+    first, second = tracker.update([(10, 10, 60, 60), (200, 10, 250, 60)], blank_frame())
+    first.employee_id = 7
+
+    moved = tracker.update([(205, 12, 255, 62), (14, 12, 64, 62)], blank_frame())
+    assert [track.track_id for track in moved] == [second.track_id, first.track_id]
+    assert moved[1].employee_id == 7 and moved[1].box == (14, 12, 64, 62)
+
+
+def test_distant_detection_starts_a_new_track():
+    tracker = FaceTracker(tracker_type=None)
+    first, = tracker.update([(10, 10, 60, 60)], blank_frame())
+    second, = tracker.update([(150, 100, 200, 150)], blank_frame())
+    assert second.track_id != first.track_id and not second.recognized
+
+
+def test_unmatched_tracks_expire_after_max_misses():
+    tracker = FaceTracker(tracker_type=None, max_misses=2)
+    track, = tracker.update([(10, 10, 60, 60)], blank_frame())
+    for misses in (1, 2):
+        tracker.update([], blank_frame())
+        assert tracker.tracks == [track] and track.misses == misses
+        # Missed tracks are kept for re-association but not drawn
+        assert tracker.predict(blank_frame()) == []
+    tracker.update([], blank_frame())
+    assert tracker.tracks == []
+
+
+def test_reappearing_face_resets_the_miss_count():
+    tracker = FaceTracker(tracker_type=None, max_misses=2)
+    track, = tracker.update([(10, 10, 60, 60)], blank_frame())
+    tracker.update([], blank_frame())
+    again, = tracker.update([(12, 10, 62, 60)], blank_frame())
+    assert again is track and track.misses == 0
+
+
+def test_default_tracker_exists_in_the_pinned_opencv():
+    assert face_tracker.create_opencv_tracker(FaceTracker().tracker_type) is not None
+
+
+def test_missing_tracker_is_reported_once(monkeypatch, capsys):
+    monkeypatch.setattr(face_tracker, 'create_opencv_tracker', lambda tracker_type: None)
+    tracker = FaceTracker(tracker_type='kcf')
+    tracker.update([(10, 10, 60, 60), (200, 10, 250, 60)], blank_frame())
+    tracker.update([(10, 10, 60, 60)], blank_frame())
+    assert capsys.readouterr().out.count("'kcf' is not available") == 1
+    assert tracker.tracker_type is None
+
+
+def test_unknown_tracker_type_is_rejected():
+    with pytest.raises(ValueError):
+        FaceTracker(tracker_type='boosting')
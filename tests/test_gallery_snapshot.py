@@ -0,0 +1,59 @@
+import numpy as np
+
+from enrollment import upsert_employees
+from face_gallery import FaceGallery
+from gallery_snapshot import gallery_fingerprint, load_gallery_arrays, load_gallery_snapshot, save_gallery_snapshot
+from models.database import Employee
+
+
+def encoding(seed):
+    return np.random.default_rng(seed).standard_normal(128).astype(np.float32)
+
+
+def snapshot(session_factory, path):
+    session = session_factory()
+    try:
+        fingerprint = gallery_fingerprint(session)
+        employee_ids, names, encodings, _ = load_gallery_arrays(session)
+    finally:
+        session.close()
+    gallery = FaceGallery()
+    gallery.load_arrays(employee_ids, names, encodings)
+    save_gallery_snapshot(gallery, fingerprint, path)
+    return fingerprint
+
+
+def current_fingerprint(session_factory):
+    session = session_factory()
+    try:
+        return gallery_fingerprint(session)
+    finally:
+        session.close()
+
+
+def test_snapshot_round_trip(session_factory, tmp_path):
+    upsert_employees([(1, 'Ada', encoding(1)), (2, 'Grace', encoding(2))], session_factory)
+    path = str(tmp_path / 'gallery.npy')
+    fingerprint = snapshot(session_factory, path)
+
+    employee_ids, names, encodings = load_gallery_snapshot(fingerprint, path)
+    assert employee_ids.tolist() == [1, 2]
+    assert names == ['Ada', 'Grace']
+    np.testing.assert_allclose(encodings[1], encoding(2))
+
+
+def test_in_place_update_invalidates_snapshot(session_factory, tmp_path):
+    upsert_employees([(1, 'Ada', encoding(1)), (2, 'Grace', encoding(2))], session_factory)
+    path = str(tmp_path / 'gallery.npy')
+    snapshot(session_factory, path)
+
+    # Same ids, so only updated_at tells the snapshot apart
+    upsert_employees([(2, 'Grace', encoding(3))], session_factory)
+    assert load_gallery_snapshot(current_fingerprint(session_factory), path) is None
+
+    snapshot(session_factory, path)
+    session = session_factory()
+    session.query(Employee).filter_by(id=1).update({'name': 'Ada L.'}, synchronize_session=False)
+    session.commit()
+    session.close()
+    assert load_gallery_snapshot(current_fingerprint(session_factory), path) is None
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from presence_events import PresenceEvents
+
+
+def publish(events, count):
+    events.publish_attendance([(1, 'entry', datetime(2026, 9, 1, 9, 0))] * count)
+
+
+def drain(subscriber):
+    messages = []
+    while not subscriber.empty():
+        messages.append(subscriber.get_nowait())
+    return messages
+
+
+def test_reconnect_replays_missed_events():
+    events = PresenceEvents(history=16, subscriber_queue=8)
+    publish(events, 5)
+    messages = drain(events.subscribe(last_seq=2))
+    assert [message.split('\n')[0] for message in messages] == ['id: 3', 'id: 4', 'id: 5']
+
+
+def test_more_missed_than_the_queue_holds_sends_reset():
+    events = PresenceEvents(history=16, subscriber_queue=4)
+    publish(events, 10)
+    messages = drain(events.subscribe(last_seq=1))
+    assert len(messages) == 1
+    assert 'event: reset' in messages[0] and '"reason":"overflow"' in messages[0]
+
+
+def test_expired_history_sends_reset():
+    events = PresenceEvents(history=4, subscriber_queue=8)
+    publish(events, 10)
+    messages = drain(events.subscribe(last_seq=1))
+    assert len(messages) == 1 and '"reason":"history_expired"' in messages[0]
@@ -0,0 +1,25 @@
+import numpy as np
+
+from recognition_cache import RecognitionCache
+
+
+def test_descriptor_hits_within_radius():
+    cache = RecognitionCache(radius=0.3)
+    encoding = np.zeros(128, dtype=np.float32)
+    cache.store([encoding], [(1, 'Ada', 0.2)], gallery_version=1, now=0.0)
+    assert cache.lookup([encoding + 0.01], gallery_version=1, now=1.0) == [(1, 'Ada', 0.2)]
+    assert cache.lookup([encoding + 1.0], gallery_version=1, now=1.0) == [None]
+    assert cache.lookup([encoding], gallery_version=2, now=1.0) == [None]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_track_lookups_have_their_own_counters():
+    cache = RecognitionCache(ttl=2.0)
+    assert cache.get_track(7, gallery_version=1, now=0.0) is None
+    cache.put_track(7, (1, 'Ada', 0.2), gallery_version=1, now=0.0)
+    assert cache.get_track(7, gallery_version=1, now=1.0) == (1, 'Ada', 0.2)
+    assert cache.get_track(7, gallery_version=1, now=3.0) is None
+
+    metrics = cache.metrics()
+    assert (metrics['track_hits'], metrics['track_misses']) == (1, 2)
+    assert (metrics['hits'], metrics['misses']) == (0, 0)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+import pandas as pd
+
+from report_engine import ReportEngine
+
+
+def daily_seconds(engine, employee_id, day):
+    return engine.daily_report(employee_id, day)['total_seconds']
+
+
+def test_pairs_entries_with_following_exit():
+    engine = ReportEngine(session_factory=None, archive=object())
+    events = pd.DataFrame({
+        'employee_id': [1, 1, 1, 1, 1, 2],
+        'timestamp': pd.to_datetime(['2026-09-01 08:00', '2026-09-01 09:00', '2026-09-01 12:00',
+                                     '2026-09-01 13:00', '2026-09-01 14:00', '2026-09-01 08:00']),
+        'event_type': ['entry', 'entry', 'exit', 'exit', 'entry', 'exit'],
+    })
+    pairs = engine.pair_events(events)
+    # The repeated entry replaces the pending one; stray exits and the open entry are ignored
+    assert pairs.to_dict('records') == [{
+        'employee_id': 1,
+        'entry': pd.Timestamp('2026-09-01 09:00'),
+        'exit': pd.Timestamp('2026-09-01 12:00'),
+    }]
+
+
+def test_pairs_longer_than_max_session_are_dropped():
+    engine = ReportEngine(session_factory=None, max_session=timedelta(hours=16), archive=object())
+    events = pd.DataFrame({
+        'employee_id': [1, 1],
+        'timestamp': pd.to_datetime(['2026-09-01 08:00', '2026-09-02 01:00']),
+        'event_type': ['entry', 'exit'],
+    })
+    assert engine.pair_events(events).empty
+
+
+def test_overnight_session_is_split_at_midnight(session_factory, employees, add_events):
+    add_events([(1, 'entry', '2026-09-04 20:00'), (1, 'exit', '2026-09-05 06:00')])
+    engine = ReportEngine(session_factory)
+
+    assert daily_seconds(engine, 1, '2026-09-04') == 4 * 3600
+    assert daily_seconds(engine, 1, '2026-09-05') == 6 * 3600
+    blocks = engine.daily_report(1, '2026-09-04')['time_blocks']
+    assert blocks == [{'entry': '20:00:00', 'exit': '24:00:00', 'duration': '4:00:00'}]
+    weekly = engine.weekly_report(1, '2026-09-01', '2026-09-07')
+    assert weekly['total_time'] == '10h 0m'
+
+
+def test_totals_do_not_depend_on_the_queried_range(session_factory, employees, add_events):
+    add_events([
+        (1, 'entry', '2026-09-03 09:00'), (1, 'exit', '2026-09-03 17:00'),
+        # Forgotten exit over the weekend
+        (1, 'entry', '2026-09-04 17:30'), (1, 'exit', '2026-09-07 08:30'),
+        (1, 'entry', '2026-09-07 09:00'), (1, 'exit', '2026-09-07 12:00'),
+        (2, 'entry', '2026-09-05 22:00'), (2, 'exit', '2026-09-06 10:00'),
+    ])
+    engine = ReportEngine(session_factory)
+
+    weekly = engine.daily_totals('2026-09-01', '2026-09-10')['total_seconds'].to_dict()
+    for day in pd.date_range('2026-09-01', '2026-09-10'):
+        for employee_id in (1, 2):
+            assert daily_seconds(engine, employee_id, day) == weekly.get((employee_id, day), 0.0)
+    assert engine.daily_totals('2026-09-01', '2026-09-10', [1])['total_seconds'].sum() == 11 * 3600
+    assert weekly[(2, pd.Timestamp('2026-09-06'))] == 10 * 3600
+
+
+def test_seeded_from_last_event_before_range(session_factory, employees, add_events):
+    # Entry well before the range start, exit inside it
+    add_events([(1, 'entry', '2026-09-01 12:00'), (1, 'exit', '2026-09-02 03:00')])
+    engine = ReportEngine(session_factory, max_session=timedelta(hours=16))
+    assert daily_seconds(engine, 1, '2026-09-02') == 3 * 3600
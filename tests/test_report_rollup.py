@@ -0,0 +1,62 @@
+import pandas as pd
+from sqlalchemy.orm import scoped_session
+
+from models.database import Attendance, RollupState
+from report_engine import ReportEngine
+from report_rollup import ROLLUP_NAME, ReportRollup
+
+# A closed week in the past, Monday to Sunday plus the following Monday
+DAYS = pd.date_range('2024-09-02', '2024-09-09')
+
+
+def assert_rollup_matches_engine(rollup, engine, employee_ids):
+    for employee_id in employee_ids:
+        for day in DAYS:
+            assert rollup.daily_report(employee_id, day) == engine.daily_report(employee_id, day), \
+                (employee_id, day)
+        assert rollup.weekly_report(employee_id, DAYS[0], DAYS[-1]) == \
+            engine.weekly_report(employee_id, DAYS[0], DAYS[-1])
+
+
+def test_rollup_matches_raw_reports_across_a_weekend(session_factory, employees, add_events):
+    add_events([
+        (1, 'entry', '2024-09-05 09:00'), (1, 'exit', '2024-09-05 17:00'),
+        # Friday entry with the exit only on Monday morning
+        (1, 'entry', '2024-09-06 17:30'), (1, 'exit', '2024-09-09 08:30'),
+        # Overnight Saturday shift
+        (2, 'entry', '2024-09-07 22:00'), (2, 'exit', '2024-09-08 06:00'),
+        (3, 'entry', '2024-09-06 08:00'), (3, 'exit', '2024-09-06 12:00'),
+        (3, 'entry', '2024-09-06 13:00'), (3, 'exit', '2024-09-06 18:00'),
+    ])
+    engine = ReportEngine(session_factory)
+    rollup = ReportRollup(engine, session_factory)
+    assert_rollup_matches_engine(rollup, engine, employees)
+    assert rollup.daily_report(2, '2024-09-08')['total_seconds'] == 6 * 3600
+
+
+def test_late_events_refresh_the_affected_days(session_factory, employees, add_events):
+    add_events([(1, 'entry', '2024-09-06 20:00')])
+    engine = ReportEngine(session_factory)
+    rollup = ReportRollup(engine, session_factory)
+    assert rollup.refresh() > 0
+    assert rollup.daily_report(1, '2024-09-06')['total_seconds'] == 0
+
+    # The exit arrives later, e.g. from a footage backfill
+    add_events([(1, 'exit', '2024-09-07 04:00')])
+    assert_rollup_matches_engine(rollup, engine, [1])
+    assert rollup.daily_report(1, '2024-09-06')['total_seconds'] == 4 * 3600
+
+
+def test_watermark_is_persisted(session_factory, employees, add_events):
+    add_events([(1, 'entry', '2024-09-05 09:00'), (1, 'exit', '2024-09-05 17:00')])
+    # The engine closes the thread's scoped session after every query
+    scoped = scoped_session(session_factory)
+    rollup = ReportRollup(ReportEngine(scoped), scoped)
+    assert rollup.refresh() > 0
+    assert rollup.refresh() == 0
+
+    session = session_factory()
+    state = session.get(RollupState, ROLLUP_NAME)
+    max_id = session.query(Attendance.id).order_by(Attendance.id.desc()).first()[0]
+    session.close()
+    assert state.last_attendance_id == max_id
@@ -0,0 +1,79 @@
+from stream_broadcast import BroadcastStream
+
+
+class FakePipeline:
+    def __init__(self, opens=True):
+        self.opens = opens
+        self.running = False
+        self.stopped = False
+
+    def start(self):
+        self.running = self.opens
+        return self.opens
+
+    def stop(self):
+        self.running = False
+        self.stopped = True
+
+    def mjpeg_parts(self, profile):
+        yield b'part-1'
+        yield b'part-2'
+
+
+class Factory:
+    def __init__(self, opens=True):
+        self.opens = opens
+        self.created = []
+
+    def __call__(self):
+        pipeline = FakePipeline(self.opens)
+        self.created.append(pipeline)
+        return pipeline
+
+
+def test_viewers_share_one_pipeline_until_the_last_leaves():
+    factory = Factory()
+    broadcast = BroadcastStream(factory)
+    first = broadcast.acquire()
+    second = broadcast.acquire()
+    assert first is second and len(factory.created) == 1
+    assert broadcast.subscribers == 2
+
+    broadcast.release(first)
+    assert not first.stopped and broadcast.subscribers == 1
+    broadcast.release(second)
+    assert first.stopped and broadcast.pipeline is None and broadcast.subscribers == 0
+
+
+def test_stream_releases_its_reference_when_the_viewer_leaves():
+    broadcast = BroadcastStream(Factory())
+    stream = broadcast.stream()
+    assert next(stream) == b'part-1'
+    assert broadcast.subscribers == 1
+    stream.close()
+    assert broadcast.subscribers == 0 and broadcast.pipeline is None
+
+
+def test_dead_pipeline_is_stopped_and_replaced():
+    factory = Factory()
+    broadcast = BroadcastStream(factory)
+    dead = broadcast.acquire()
+    broadcast.acquire()
+    # e.g. the camera stopped returning frames
+    dead.running = False
+
+    fresh = broadcast.acquire()
+    assert fresh is not dead and dead.stopped
+    assert broadcast.subscribers == 1
+
+    # Late releases from the dead pipeline's viewers leave the new one alone
+    broadcast.release(dead)
+    broadcast.release(dead)
+    assert broadcast.pipeline is fresh and broadcast.subscribers == 1 and not fresh.stopped
+
+
+def test_failed_start_takes_no_reference():
+    broadcast = BroadcastStream(Factory(opens=False))
+    assert broadcast.acquire() is None
+    assert broadcast.pipeline is None and broadcast.subscribers == 0
+    assert list(broadcast.stream()) == []
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from models.database import Attendance
+from video_backfill import existing_events, insert_events, last_events_before, plan_events
+
+START = datetime(2024, 9, 2, 8, 0)
+
+
+def at(seconds):
+    return START + timedelta(seconds=seconds)
+
+
+# Someone walks past the door camera, is seen for a while, and leaves later
+DETECTIONS = [(1, at(0)), (1, at(2)), (1, at(20)), (1, at(45)), (2, at(10)), (1, at(3600)), (2, at(4000))]
+
+
+def test_debounce_and_toggle():
+    events = plan_events(DETECTIONS, {}, debounce_seconds=30)
+    assert events == [
+        (1, 'entry', at(0)),
+        (2, 'entry', at(10)),
+        (1, 'exit', at(45)),
+        (1, 'entry', at(3600)),
+        (2, 'exit', at(4000)),
+    ]
+
+
+def test_toggle_continues_from_last_event_before_footage():
+    events = plan_events([(1, at(0))], {1: ('entry', START - timedelta(hours=2))})
+    assert events == [(1, 'exit', at(0))]
+
+
+def test_existing_events_take_part_in_the_toggle():
+    # A live exit during the footage window
+    existing = [(1, 'exit', at(1800))]
+    events = plan_events([(1, at(0)), (1, at(1810)), (1, at(3600))], {}, existing)
+    assert events == [(1, 'entry', at(0)), (1, 'entry', at(3600))]
+
+
+def test_second_run_adds_nothing():
+    first = plan_events(DETECTIONS, {})
+    assert first
+    assert plan_events(DETECTIONS, {}, existing=first) == []
+
+
+def test_second_run_against_the_database_adds_nothing(session_factory, employees):
+    footage_end = at(4000)
+    for expected_new in (5, 0):
+        events = plan_events(DETECTIONS, last_events_before(START, session_factory),
+                             existing_events(START, footage_end, session_factory))
+        assert len(events) == expected_new
+        insert_events(events, session_factory)
+
+    session = session_factory()
+    assert session.query(Attendance).count() == 5
+    session.close()
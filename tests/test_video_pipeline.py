@@ -0,0 +1,108 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from video_pipeline import (DEFAULT_JPEG_QUALITY, DEFAULT_PROFILE, ClientPacer, FramePipeline, LatestSlot,
+                            StreamProfile, parse_stream_profile)
+
+
+def test_latest_slot_keeps_only_the_newest_value():
+    slot = LatestSlot()
+    for value in ('a', 'b', 'c'):
+        slot.put(value)
+    assert slot.get_newer(0) == (3, 'c')
+    # Nothing newer than what the reader already saw
+    assert slot.get_newer(3, timeout=0.01) is None
+    slot.put('d')
+    assert slot.get_newer(1) == (4, 'd')
+
+
+def test_latest_slot_wakes_a_waiting_reader():
+    slot = LatestSlot()
+    results = []
+    reader = threading.Thread(target=lambda: results.append(slot.get_newer(0, timeout=2.0)))
+    reader.start()
+    slot.put('frame')
+    reader.join(2.0)
+    assert results == [(1, 'frame')]
+
+
+def test_closed_slot_releases_readers():
+    slot = LatestSlot()
+    slot.put('frame')
+    slot.close()
+    assert slot.get_newer(0, timeout=2.0) is None
+
+
+def test_parse_stream_profile_defaults():
+    assert parse_stream_profile(MultiDict()) == DEFAULT_PROFILE
+
+
+def test_parse_stream_profile_rounds_to_shared_encoders():
+    profile = parse_stream_profile(MultiDict({'width': '650', 'height': '490', 'quality': '73', 'fps': '7.5'}))
+    assert profile == StreamProfile(640, 480, 70, 7.5)
+    tiny = parse_stream_profile(MultiDict({'width': '20', 'height': '10', 'quality': '3'}))
+    assert tiny == StreamProfile(160, 120, 5, None)
+
+
+@pytest.mark.parametrize('args', [
+    {'width': '0'}, {'height': '-240'}, {'fps': '0'}, {'quality': '0'}, {'quality': '101'},
+])
+def test_parse_stream_profile_rejects_bad_values(args):
+    with pytest.raises(ValueError):
+        parse_stream_profile(MultiDict(args))
+
+
+def test_parse_stream_profile_ignores_non_numeric_values():
+    # MultiDict.get(type=int) falls back to the default
+    assert parse_stream_profile(MultiDict({'width': 'wide', 'quality': 'best'})) == \
+        StreamProfile(None, None, DEFAULT_JPEG_QUALITY, None)
+
+
+def test_client_pacer_backs_off_for_slow_clients_and_recovers():
+    pacer = ClientPacer(max_fps=10, headroom=2.0, smoothing=1.0, max_interval=1.0)
+    assert pacer.interval == pytest.approx(0.1)
+    pacer.sent(0.0, 0.3)
+    assert pacer.interval == pytest.approx(0.6)
+    pacer.sent(0.0, 5.0)
+    assert pacer.interval == 1.0
+    pacer.sent(0.0, 0.01)
+    assert pacer.interval == pytest.approx(0.1)
+
+
+class FailingCamera:
+    def __init__(self, frames=3):
+        self.frames = frames
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.frames == 0:
+            return False, None
+        self.frames -= 1
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+class PassThroughSystem:
+    def process_frame(self, frame):
+        return frame, []
+
+
+def test_pipeline_releases_the_camera_when_reads_fail():
+    camera = FailingCamera()
+    pipeline = FramePipeline(PassThroughSystem(), camera_factory=lambda: camera)
+    assert pipeline.start()
+    deadline = time.monotonic() + 2.0
+    while pipeline.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not pipeline.running
+    assert camera.released and pipeline.camera is None
+    pipeline.stop()
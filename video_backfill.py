@@ -0,0 +1,309 @@
+"""Backfill attendance from recorded footage.
+
+Each video is split into chunks of frames that are decoded and recognized in a
+process pool, sampling a few frames per second of footage. Recognitions are
+stamped with the footage time (video start + frame offset), then debounced and
+toggled into entry/exit events exactly like the live writer, and inserted in
+bulk transactions. Events already stored for the footage window take part in
+the toggle and suppress recognitions near them, so re-running a video adds
+nothing.
+
+Usage: python video_backfill.py --video door.mp4 "2026-10-01 08:00:00" [--video ...]
+                                [--sample-fps 2] [--workers 4] [--dry-run]
+"""
+import argparse
+import bisect
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import cv2
+from sqlalchemy import func
+
+from camera_workers import SharedGallerySnapshot, attach_gallery
+from face_gallery import FaceGallery
+from face_quality import FaceQualityFilter
+from gallery_snapshot import gallery_fingerprint, load_gallery_arrays, load_gallery_snapshot
+from models.database import Session, Attendance
+
+DEFAULT_FPS = 25.0
+DEBOUNCE_SECONDS = 30
+INSERT_BATCH_SIZE = 1000
+
+_worker = {}
+
+
+def parse_timestamp(value):
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"Invalid timestamp {value!r}, expected YYYY-MM-DD HH:MM[:SS]")
+
+
+def video_info(path):
+    """(frame_count, fps) of a video file; fps falls back to DEFAULT_FPS when unknown"""
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise IOError(f"Could not open video {path}")
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS)
+    finally:
+        capture.release()
+    if not fps or fps != fps or fps > 1000:
+        print(f"{path}: frame rate unknown, assuming {DEFAULT_FPS} fps")
+        fps = DEFAULT_FPS
+    return frame_count, fps
+
+
+def plan_chunks(videos, sample_fps=2.0, chunk_seconds=60):
+    """Split (path, start) videos into (path, start, fps, first, last, step) chunks"""
+    chunks = []
+    for path, start in videos:
+        frame_count, fps = video_info(path)
+        step = max(1, int(round(fps / sample_fps))) if sample_fps else 1
+        chunk_frames = max(step, int(fps * chunk_seconds) // step * step)
+        for first in range(0, frame_count, chunk_frames):
+            chunks.append((path, start, fps, first, min(frame_count, first + chunk_frames), step))
+    return chunks
+
+
+def _init_worker(gallery_descriptor, detection_scale, quality_thresholds):
+    # Only the recognition workers need dlib; planning and inserting do not
+    from face_detection import load_face_models
+
+    cv2.setNumThreads(1)
+    shm, gallery = attach_gallery(gallery_descriptor)
+    _worker.update(
+        shm=shm,
+        gallery=gallery,
+        models=load_face_models(),
+        detection_scale=detection_scale,
+        quality_filter=FaceQualityFilter(**(quality_thresholds or {})),
+    )
+
+
+def recognize_chunk(chunk):
+    """Recognize one chunk in a worker; returns (detections, frames_decoded, frames_processed)"""
+    from face_detection import compute_descriptors, detect_faces, face_landmarks
+
+    path, start, fps, first, last, step = chunk
+    face_detector, shape_predictor, face_encoder = _worker['models']
+    gallery, quality_filter = _worker['gallery'], _worker['quality_filter']
+    capture = cv2.VideoCapture(path)
+    detections = []
+    decoded = processed = 0
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, first)
+        for index in range(first, last):
+            if (index - first) % step:
+                # grab() demuxes and decodes but skips the colour conversion of read()
+                if not capture.grab():
+                    break
+                decoded += 1
+                continue
+            ret, frame = capture.read()
+            if not ret:
+                break
+            decoded += 1
+            processed += 1
+            face_locations = detect_faces(face_detector, frame, scale=_worker['detection_scale'])
+            candidates = [rect for rect in face_locations if quality_filter.check_box(frame, rect) is None]
+            if not candidates:
+                continue
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            shapes = [shape for shape in face_landmarks(shape_predictor, rgb_frame, candidates)
+                      if quality_filter.check_pose(shape) is None]
+            if not shapes:
+                continue
+            encodings = compute_descriptors(face_encoder, [rgb_frame], [shapes])[0]
+            timestamp = start + timedelta(seconds=index / fps)
+            for employee_id, _, _ in gallery.match(encodings):
+                if employee_id is not None:
+                    detections.append((employee_id, timestamp))
+    finally:
+        capture.release()
+    return detections, decoded, processed
+
+
+def load_gallery():
+    session = Session()
+    try:
+        fingerprint = gallery_fingerprint(session)
+        snapshot = load_gallery_snapshot(fingerprint)
+        if snapshot is None:
+            employee_ids, names, encodings, _ = load_gallery_arrays(session)
+            snapshot = (employee_ids, names, encodings)
+    finally:
+        session.close()
+    gallery = FaceGallery()
+    gallery.load_arrays(*snapshot)
+    return gallery
+
+
+def last_events_before(timestamp, session_factory=Session):
+    """{employee_id: (event_type, timestamp)} of each employee's last event before timestamp"""
+    session = session_factory()
+    try:
+        latest = session.query(Attendance.employee_id, func.max(Attendance.timestamp).label('timestamp'))\
+            .filter(Attendance.timestamp < timestamp)\
+            .group_by(Attendance.employee_id).subquery()
+        rows = session.query(Attendance.employee_id, Attendance.event_type, Attendance.timestamp)\
+            .join(latest, (Attendance.employee_id == latest.c.employee_id)
+                  & (Attendance.timestamp == latest.c.timestamp)).all()
+        return {employee_id: (event_type, event_time) for employee_id, event_type, event_time in rows}
+    finally:
+        session.close()
+
+
+def existing_events(start, end, session_factory=Session):
+    """[(employee_id, event_type, timestamp)] already stored in [start, end]"""
+    session = session_factory()
+    try:
+        return session.query(Attendance.employee_id, Attendance.event_type, Attendance.timestamp)\
+            .filter(Attendance.timestamp >= start, Attendance.timestamp <= end)\
+            .order_by(Attendance.timestamp, Attendance.id).all()
+    finally:
+        session.close()
+
+
+def plan_events(detections, last_events, existing=(), debounce_seconds=DEBOUNCE_SECONDS):
+    """Turn (employee_id, timestamp) recognitions into (employee_id, event_type, timestamp)
+    rows with the live writer's debounce window and entry/exit toggle.
+
+    Existing (employee_id, event_type, timestamp) rows in the footage window are
+    merged into the toggle timeline, and recognitions within the debounce window
+    of one of them are dropped as already logged.
+    """
+    last_events = dict(last_events)
+    existing_times = {}
+    for employee_id, _, timestamp in existing:
+        existing_times.setdefault(employee_id, []).append(timestamp)
+    for times in existing_times.values():
+        times.sort()
+    # Stored rows sort before recognitions at the same instant
+    timeline = [(timestamp, 0, employee_id, event_type) for employee_id, event_type, timestamp in existing]
+    timeline += [(timestamp, 1, employee_id, None) for employee_id, timestamp in detections]
+    timeline.sort(key=lambda item: item[:2])
+
+    events = []
+    for timestamp, is_detection, employee_id, event_type in timeline:
+        if not is_detection:
+            last_events[employee_id] = (event_type, timestamp)
+            continue
+        times = existing_times.get(employee_id, ())
+        position = bisect.bisect_left(times, timestamp)
+        nearby = times[max(0, position - 1):position + 1]
+        if any(abs((timestamp - other).total_seconds()) < debounce_seconds for other in nearby):
+            continue
+        last = last_events.get(employee_id)
+        if last is None:
+            event_type = 'entry'
+        else:
+            last_type, last_timestamp = last
+            if (timestamp - last_timestamp).total_seconds() < debounce_seconds:
+                continue
+            event_type = 'exit' if last_type == 'entry' else 'entry'
+        last_events[employee_id] = (event_type, timestamp)
+        events.append((employee_id, event_type, timestamp))
+    return events
+
+
+def insert_events(events, session_factory=Session, batch_size=INSERT_BATCH_SIZE):
+    """Bulk insert (employee_id, event_type, timestamp) rows, one transaction per batch"""
+    session = session_factory()
+    try:
+        for offset in range(0, len(events), batch_size):
+            session.bulk_insert_mappings(Attendance, [
+                {'employee_id': employee_id, 'event_type': event_type, 'timestamp': timestamp}
+                for employee_id, event_type, timestamp in events[offset:offset + batch_size]
+            ])
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def backfill(videos, sample_fps=2.0, chunk_seconds=60, workers=None, detection_scale=1.0,
+             quality_thresholds=None, debounce_seconds=DEBOUNCE_SECONDS, dry_run=False):
+    """Recognize every (path, start) video and write the resulting attendance events"""
+    started = time.perf_counter()
+    chunks = plan_chunks(videos, sample_fps, chunk_seconds)
+    if not chunks:
+        raise ValueError("No frames to process")
+    gallery = load_gallery()
+    if not len(gallery):
+        raise ValueError("No enrolled faces to recognize")
+    snapshot = SharedGallerySnapshot(gallery)
+    workers = workers or min(len(chunks), os.cpu_count() or 1) or 1
+    detections, decoded, processed = [], 0, 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(snapshot.descriptor, detection_scale, quality_thresholds)) as executor:
+            for done, (chunk_detections, chunk_decoded, chunk_processed) in enumerate(
+                    executor.map(recognize_chunk, chunks), start=1):
+                detections.extend(chunk_detections)
+                decoded += chunk_decoded
+                processed += chunk_processed
+                elapsed = time.perf_counter() - started
+                print(f"Chunk {done}/{len(chunks)}: {decoded} frames decoded, "
+                      f"{decoded / elapsed:.1f} fps")
+    finally:
+        snapshot.close()
+
+    footage_start = min(start for _, start in videos)
+    footage_end = max(start + timedelta(seconds=last / fps) for _, start, fps, _, last, _ in chunks)
+    events = plan_events(detections, last_events_before(footage_start),
+                         existing_events(footage_start, footage_end), debounce_seconds)
+    if not dry_run:
+        insert_events(events)
+    elapsed = time.perf_counter() - started
+    return {
+        'videos': len(videos),
+        'chunks': len(chunks),
+        'workers': workers,
+        'frames_decoded': decoded,
+        'frames_processed': processed,
+        'recognitions': len(detections),
+        'events_written': 0 if dry_run else len(events),
+        'events_planned': len(events),
+        'seconds': elapsed,
+        'decode_fps': decoded / elapsed if elapsed else 0.0,
+        'processed_fps': processed / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill attendance from recorded video files')
+    parser.add_argument('--video', nargs=2, action='append', required=True, metavar=('PATH', 'START'),
+                        help='video file and the wall-clock time of its first frame')
+    parser.add_argument('--sample-fps', type=float, default=2.0, help='footage frames analysed per second')
+    parser.add_argument('--chunk-seconds', type=float, default=60, help='footage seconds per pool task')
+    parser.add_argument('--workers', type=int, default=None, help='recognition processes')
+    parser.add_argument('--scale', type=float, default=1.0, help='detection downscale factor')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS, help='seconds between events')
+    parser.add_argument('--dry-run', action='store_true', help='recognize but do not write events')
+    args = parser.parse_args()
+
+    videos = [(path, parse_timestamp(start)) for path, start in args.video]
+    result = backfill(videos, sample_fps=args.sample_fps, chunk_seconds=args.chunk_seconds,
+                      workers=args.workers, detection_scale=args.scale,
+                      debounce_seconds=args.debounce, dry_run=args.dry_run)
+    print(f"Processed {result['frames_processed']} of {result['frames_decoded']} decoded frames "
+          f"in {result['seconds']:.1f}s ({result['decode_fps']:.1f} fps decoded, "
+          f"{result['processed_fps']:.1f} fps recognized)")
+    print(f"{result['recognitions']} recognitions -> {result['events_planned']} attendance events"
+          f"{' (dry run, nothing written)' if args.dry_run else ' written'}")
+    if not args.dry_run and result['events_written']:
+        print("Restart the server or refresh presence for the running app to see the new events")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,364 @@
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from camera_utils import initialize_camera
+from metrics import FRAMES_DROPPED, STAGE_SECONDS
+
+MJPEG_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+MJPEG_PART_TRAILER = b'\r\n'
+
+DEFAULT_JPEG_QUALITY = 80
+
+# Per-viewer stream parameters; width/height bound the frame (aspect kept),
+# None keeps the camera resolution or leaves the rate unlimited
+StreamProfile = namedtuple('StreamProfile', ['width', 'height', 'quality', 'max_fps'])
+DEFAULT_PROFILE = StreamProfile(None, None, DEFAULT_JPEG_QUALITY, None)
+
+
+def parse_stream_profile(args):
+    """StreamProfile from width/height/quality/fps query args; raises ValueError.
+
+    Sizes are rounded down to multiples of 16 and quality to multiples of 5 so
+    viewers asking for nearly the same stream share one encoder.
+    """
+    width, height = args.get('width', type=int), args.get('height', type=int)
+    quality = args.get('quality', DEFAULT_JPEG_QUALITY, type=int)
+    max_fps = args.get('fps', type=float)
+    if any(value is not None and value <= 0 for value in (width, height, quality, max_fps)) or quality > 100:
+        raise ValueError('width, height and fps must be positive and quality within 1-100')
+    return StreamProfile(
+        max(160, width // 16 * 16) if width else None,
+        max(120, height // 16 * 16) if height else None,
+        max(5, quality // 5 * 5),
+        max_fps,
+    )
+
+
+class LatestSlot:
+    """Single-value mailbox that keeps only the newest item.
+
+    Writers overwrite whatever is there; readers wait for a sequence number newer
+    than the one they last saw, so slow consumers skip items instead of queueing.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._seq = 0
+        self._value = None
+        self._closed = False
+
+    def put(self, value):
+        with self._condition:
+            self._seq += 1
+            self._value = value
+            self._condition.notify_all()
+
+    def get_newer(self, last_seq, timeout=1.0):
+        """Return (seq, value) newer than last_seq, or None on timeout/close."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._closed or self._seq > last_seq, timeout):
+                return None
+            if self._closed:
+                return None
+            return self._seq, self._value
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def seq(self):
+        return self._seq
+
+
+class StageStats:
+    def __init__(self, name, histogram_stage=None):
+        self.name = name
+        # Stage label for the shared latency histogram; None when the work is
+        # already timed elsewhere (inference is process_frame's 'frame' stage)
+        self.histogram_stage = histogram_stage
+        self._lock = threading.Lock()
+        self.count = 0
+        self.dropped = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds):
+        if self.histogram_stage:
+            STAGE_SECONDS.observe(seconds, stage=self.histogram_stage)
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def drop(self, count=1):
+        FRAMES_DROPPED.inc(count, stage=self.name)
+        with self._lock:
+            self.dropped += count
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'count': self.count,
+                'dropped': self.dropped,
+                'avg_ms': self.total_seconds * 1000 / self.count if self.count else 0.0,
+                'max_ms': self.max_seconds * 1000,
+            }
+
+
+class JpegEncoder:
+    """Encodes annotated frames for one (width, height, quality) on demand.
+
+    The first viewer to ask for a frame encodes it; viewers of the same profile
+    asking for the same frame get the cached part. Frames no viewer was ready
+    for are never encoded, and the downscaling buffer is reused across frames.
+    """
+
+    def __init__(self, width, height, quality, stats):
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        # Shared encode timings; drops are counted here per profile and once
+        # per frame by the pipeline
+        self.stats = stats
+        self.dropped = 0
+        self.viewers = 0
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._part = None
+        self._resized = None
+
+    def part(self, seq, frame):
+        """Multipart JPEG part for annotated frame seq, encoding it if needed."""
+        with self._lock:
+            if seq == self._seq:
+                return self._part
+            start = time.perf_counter()
+            ret, buffer = cv2.imencode('.jpg', self._resize(frame), self.params)
+            if self._seq and seq > self._seq + 1:
+                self.dropped += seq - self._seq - 1
+            self._seq = seq
+            self._part = b''.join((MJPEG_PART_HEADER, buffer, MJPEG_PART_TRAILER)) if ret else None
+            self.stats.record(time.perf_counter() - start)
+            return self._part
+
+    def _resize(self, frame):
+        height, width = frame.shape[:2]
+        scale = min(1.0, (self.width or width) / width, (self.height or height) / height)
+        if scale >= 1.0:
+            return frame
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        shape = (size[1], size[0]) + frame.shape[2:]
+        if self._resized is None or self._resized.shape != shape or self._resized.dtype != frame.dtype:
+            self._resized = np.empty(shape, dtype=frame.dtype)
+        cv2.resize(frame, size, dst=self._resized, interpolation=cv2.INTER_AREA)
+        return self._resized
+
+    def as_dict(self):
+        return {'width': self.width, 'height': self.height, 'quality': self.quality,
+                'viewers': self.viewers, 'dropped': self.dropped}
+
+
+class ClientPacer:
+    """Spaces one viewer's frames by its max FPS and by how fast it drains them.
+
+    A yield blocks while the server hands the part to the client's socket. When
+    that time grows the socket buffer is filling up, so the interval backs off
+    to keep the viewer on live frames instead of a growing backlog, and comes
+    back down as the client catches up.
+    """
+
+    def __init__(self, max_fps=None, headroom=1.5, smoothing=0.2, max_interval=2.0):
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.max_interval = max_interval
+        self.interval = self.min_interval
+        self._drain_seconds = 0.0
+        self._next = 0.0
+
+    def wait(self):
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def sent(self, started, seconds):
+        """Record a part that took seconds to drain, started at perf_counter() started."""
+        self._drain_seconds += self.smoothing * (seconds - self._drain_seconds)
+        self.interval = min(self.max_interval,
+                            max(self.min_interval, self._drain_seconds * self.headroom))
+        self._next = started + self.interval
+
+
+class FramePipeline:
+    """Capture -> inference -> JPEG encode pipeline for the MJPEG stream.
+
+    Capture and inference run in their own thread(s) and hand off through a
+    LatestSlot, so under load frames are dropped rather than queued. Encoding
+    happens in the viewers' threads, once per frame and stream profile, so a
+    slow viewer never stalls the camera or recognition.
+    """
+
+    def __init__(self, attendance_system, camera_factory=initialize_camera, inference_workers=1):
+        self.attendance_system = attendance_system
+        self.camera_factory = camera_factory
+        # process_frame keeps tracking state, so more than one worker only makes
+        # sense with detect_every_n == 1
+        self.inference_workers = inference_workers
+        self.captured = LatestSlot()
+        self.annotated = LatestSlot()
+        self._encoders = {}
+        self._encoders_lock = threading.Lock()
+        self._last_encoded = 0
+        self.stats = {
+            'capture': StageStats('capture', 'capture'),
+            'inference': StageStats('inference'),
+            'encode': StageStats('encode', 'jpeg_encode'),
+        }
+        self._running = threading.Event()
+        self._threads = []
+        self._claim_lock = threading.Lock()
+        self._last_claimed = 0
+        self._last_annotated = 0
+        self.camera = None
+        self._camera_lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def start(self):
+        if self.running:
+            return True
+        self.camera = self.camera_factory()
+        if not self.camera.isOpened():
+            print("Camera initialization failed")
+            self.camera.release()
+            self.camera = None
+            return False
+        self.captured, self.annotated = LatestSlot(), LatestSlot()
+        self._last_claimed = self._last_annotated = self._last_encoded = 0
+        self._running.set()
+        self._threads = [threading.Thread(target=self._capture_loop, name='pipeline-capture', daemon=True)]
+        for n in range(self.inference_workers):
+            self._threads.append(threading.Thread(target=self._inference_loop,
+                                                  name=f'pipeline-inference-{n}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self):
+        self._running.clear()
+        for slot in (self.captured, self.annotated):
+            slot.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self._threads = []
+        self._release_camera()
+
+    def metrics(self):
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def profiles(self):
+        with self._encoders_lock:
+            return [encoder.as_dict() for encoder in self._encoders.values()]
+
+    def _acquire_encoder(self, profile):
+        key = (profile.width, profile.height, profile.quality)
+        with self._encoders_lock:
+            encoder = self._encoders.get(key)
+            if encoder is None:
+                encoder = self._encoders[key] = JpegEncoder(*key, stats=self.stats['encode'])
+            encoder.viewers += 1
+            return encoder
+
+    def _release_encoder(self, encoder):
+        with self._encoders_lock:
+            encoder.viewers -= 1
+            if encoder.viewers == 0:
+                self._encoders.pop((encoder.width, encoder.height, encoder.quality), None)
+
+    def _count_encoded(self, seq):
+        """Count annotated frames skipped before seq as dropped once, however many profiles are encoding."""
+        with self._encoders_lock:
+            if seq <= self._last_encoded:
+                return
+            skipped = seq - self._last_encoded - 1 if self._last_encoded else 0
+            self._last_encoded = seq
+        if skipped:
+            self.stats['encode'].drop(skipped)
+
+    def _capture_loop(self):
+        camera = self.camera
+        try:
+            while self.running:
+                start = time.perf_counter()
+                ret, frame = camera.read()
+                if not ret:
+                    print("Camera read failed, stopping pipeline")
+                    break
+                self.stats['capture'].record(time.perf_counter() - start)
+                self.captured.put(frame)
+        finally:
+            self._running.clear()
+            for slot in (self.captured, self.annotated):
+                slot.close()
+            self._release_camera()
+
+    def _release_camera(self):
+        with self._camera_lock:
+            camera, self.camera = self.camera, None
+        if camera is not None:
+            camera.release()
+
+    def _inference_loop(self):
+        while self.running:
+            with self._claim_lock:
+                item = self.captured.get_newer(self._last_claimed)
+                if item is None:
+                    continue
+                seq, frame = item
+                # Frames overwritten before any worker picked them up
+                if seq > self._last_claimed + 1:
+                    self.stats['capture'].drop(seq - self._last_claimed - 1)
+                self._last_claimed = seq
+            start = time.perf_counter()
+            processed_frame, _ = self.attendance_system.process_frame(frame)
+            self.stats['inference'].record(time.perf_counter() - start)
+            with self._claim_lock:
+                if seq < self._last_annotated:
+                    # Another worker already published a newer frame
+                    self.stats['inference'].drop()
+                    continue
+                self._last_annotated = seq
+            if processed_frame is not None:
+                self.annotated.put(processed_frame)
+
+    def mjpeg_parts(self, profile=DEFAULT_PROFILE, timeout=5.0):
+        """Yield multipart JPEG parts of the newest frames for one viewer until the pipeline stops."""
+        encoder = self._acquire_encoder(profile)
+        pacer = ClientPacer(profile.max_fps)
+        last_seq = 0
+        try:
+            while self.running:
+                pacer.wait()
+                item = self.annotated.get_newer(last_seq, timeout)
+                if item is None:
+                    continue
+                last_seq, frame = item
+                part = encoder.part(last_seq, frame)
+                self._count_encoded(last_seq)
+                if part is None:
+                    continue
+                started = time.perf_counter()
+                yield part
+                pacer.sent(started, time.perf_counter() - started)
+        finally:
+            self._release_encoder(encoder)